@@ -0,0 +1,89 @@
+"""
+Offline batch scoring throughput and peak memory
+
+Writes a synthetic Parquet extract, registers a small XGBoost model in a
+throwaway file-based MLflow store, and runs batch_score.score_file once per
+worker count. Peak RSS is reported for the parent and for the largest worker,
+which should stay flat as --rows grows.
+
+Usage:
+    python benchmarks/bench_batch_score.py [--rows 1000000] [--workers 0 1 2 4]
+"""
+
+import argparse
+import contextlib
+import functools
+import json
+import os
+import resource
+import sys
+import tempfile
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from bench_utils import make_records, register_model, train_classifier
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--chunk-size", type=int, default=100000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1, 2, 4])
+    args = parser.parse_args()
+
+    from batch_score import score_file
+    from model_cache import ModelCache
+    from predict_function import xgb_model
+
+    with tempfile.TemporaryDirectory() as workdir:
+        extract = os.path.join(workdir, "extract.parquet")
+        writer = None
+        for start in range(0, args.rows, args.chunk_size):
+            n_rows = min(args.chunk_size, args.rows - start)
+            table = pa.Table.from_pandas(
+                make_records(n_rows, seed=start), preserve_index=False
+            )
+            if writer is None:
+                writer = pq.ParquetWriter(extract, table.schema)
+            writer.write_table(table)
+        writer.close()
+
+        with contextlib.redirect_stdout(sys.stderr):
+            os.environ["MLFLOW_TRACKING_URI"] = register_model(
+                os.path.join(workdir, "mlruns"), train_classifier()
+            )
+        cache_dir = os.path.join(workdir, "cache")
+        ModelCache(cache_dir).fetch("mlops_project", "champion")
+        load_predictor = functools.partial(
+            xgb_model,
+            "mlops_project",
+            "champion",
+            engine="booster",
+            nthread=1,
+            cache_dir=cache_dir,
+            offline=True,
+        )
+
+        results = {}
+        for workers in args.workers:
+            summary = score_file(
+                extract,
+                os.path.join(workdir, f"scored-{workers}.parquet"),
+                load_predictor,
+                chunk_size=args.chunk_size,
+                workers=workers,
+                keep_columns=[],
+            )
+            summary["parent_peak_rss_mb"] = round(
+                resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1
+            )
+            summary["worker_peak_rss_mb"] = round(
+                resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1
+            )
+            results[f"workers_{workers}"] = summary
+
+    print(json.dumps({"rows": args.rows, "cpus": os.cpu_count(), **results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
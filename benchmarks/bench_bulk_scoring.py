@@ -0,0 +1,97 @@
+"""
+Bulk scoring throughput: /predict_batch (JSON) vs /predict_bulk (Arrow IPC)
+
+Each request goes through the Flask app in process with a real XGBoost model
+on the booster engine; timings include reading the response on the client
+side. Request bodies are built once up front.
+
+Usage:
+    python benchmarks/bench_bulk_scoring.py [--rows 1000 100000 1000000] [--repeats 3]
+"""
+
+import argparse
+import json
+import os
+import time
+
+os.environ.setdefault("TESTING", "true")
+
+import pyarrow as pa  # noqa: E402
+from bench_utils import load_predictor, make_records, train_classifier  # noqa: E402
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+
+def to_arrow_stream(df):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def time_request(post, parse, repeats):
+    """Best wall time over repeats of one request plus reading its response"""
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        response = post()
+        assert response.status_code == 200, response.data[:200]
+        parse(response.data)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 100000, 1000000])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    import service_test
+
+    service_test.predictor = load_predictor(train_classifier(), engine="booster")
+    service_test.MAX_BATCH_SIZE = max(args.rows)
+    client = service_test.app.test_client()
+
+    results = {}
+    for n_rows in args.rows:
+        df = make_records(n_rows)
+        json_body = json.dumps(df.to_dict("records"))
+        arrow_body = to_arrow_stream(df)
+        # One run is enough to see the difference at the largest sizes
+        repeats = args.repeats if n_rows <= 100000 else 1
+
+        json_seconds = time_request(
+            lambda: client.post(
+                "/predict_batch", data=json_body, content_type="application/json"
+            ),
+            json.loads,
+            repeats,
+        )
+        arrow_seconds = time_request(
+            lambda: client.post(
+                "/predict_bulk", data=arrow_body, content_type=ARROW_STREAM
+            ),
+            lambda body: pa.ipc.open_stream(pa.py_buffer(body)).read_all(),
+            repeats,
+        )
+
+        results[n_rows] = {
+            "json_batch": {
+                "seconds": round(json_seconds, 4),
+                "rows_per_s": round(n_rows / json_seconds),
+                "request_bytes": len(json_body),
+            },
+            "arrow_bulk": {
+                "seconds": round(arrow_seconds, 4),
+                "rows_per_s": round(n_rows / arrow_seconds),
+                "request_bytes": len(arrow_body),
+            },
+            "speedup": round(json_seconds / arrow_seconds, 1),
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Model load time and peak memory: pickled sklearn model vs serving bundle
+
+Saves a model both ways and loads each in fresh interpreters:
+
+    pickle        mlflow.sklearn.load_model on the saved MLflow model, the
+                  registry path of xgb_model
+    bundle        model_bundle.read_bundle, which loads booster.ubj by
+                  path with xgb.Booster(model_file=...)
+
+Import time and load time are reported separately, since the pickle path
+also needs mlflow imported. Peak memory is VmHWM after the load, reset
+after the imports (via /proc/self/clear_refs) so it covers the load only.
+A small model like the trained one and a large one are measured.
+
+Usage:
+    python benchmarks/bench_bundle_load.py [--repeats 5]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import xgboost as xgb
+from bench_utils import PROJECT_ROOT, make_records
+
+CHILD = """
+import sys, time
+
+def memory():
+    with open("/proc/self/status") as f:
+        status = dict(line.split(":", 1) for line in f)
+    return int(status["VmRSS"].split()[0]), int(status["VmHWM"].split()[0])
+
+mode, path = sys.argv[1], sys.argv[2]
+started = time.perf_counter()
+if mode == "pickle":
+    import mlflow.sklearn
+else:
+    import model_bundle
+imported = time.perf_counter()
+rss_before, _ = memory()
+with open("/proc/self/clear_refs", "w") as f:
+    f.write("5")
+
+loaded = time.perf_counter()
+if mode == "pickle":
+    booster = mlflow.sklearn.load_model(path).get_booster()
+else:
+    booster, _ = model_bundle.read_bundle(path)
+finished = time.perf_counter()
+rss_after, peak = memory()
+print(imported - started, finished - loaded, rss_before, rss_after, peak)
+"""
+
+
+def train(n_estimators, max_depth):
+    from predict_function import preprocess_pd
+
+    X = preprocess_pd(make_records(20000, seed=3))
+    rng = np.random.default_rng(0)
+    y = ((X["age"].to_numpy() > 30) ^ (rng.random(len(X)) < 0.3)).astype(int)
+    model = xgb.XGBClassifier(
+        n_estimators=n_estimators,
+        max_depth=max_depth,
+        enable_categorical=True,
+        random_state=42,
+        nthread=1,
+    )
+    return model.fit(X, y)
+
+
+def dir_mb(path):
+    total = 0
+    for root, _, names in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in names)
+    return round(total / 1e6, 2)
+
+
+def run_mode(mode, path, repeats):
+    runs = []
+    for _ in range(repeats):
+        result = subprocess.run(
+            [sys.executable, "-c", CHILD, mode, path],
+            cwd=os.path.join(PROJECT_ROOT, "deploy_service"),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        import_s, load_s, rss_before, rss_after, peak = result.stdout.split()[-5:]
+        runs.append(
+            (
+                float(import_s),
+                float(load_s),
+                (int(rss_after) - int(rss_before)) / 1024,
+                (int(peak) - int(rss_before)) / 1024,
+            )
+        )
+    medians = np.median(np.array(runs), axis=0)
+    return {
+        "import_ms": round(float(medians[0]) * 1000, 1),
+        "load_ms": round(float(medians[1]) * 1000, 2),
+        "rss_growth_mb": round(float(medians[2]), 1),
+        "peak_growth_mb": round(float(medians[3]), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    import mlflow.sklearn
+    from model_bundle import export_bundle
+    from predict_function import CATEGORICAL_LEVELS
+
+    results = {}
+    for name, n_estimators, max_depth in (
+        ("small_20x4", 20, 4),
+        ("large_1000x8", 1000, 8),
+    ):
+        model = train(n_estimators, max_depth)
+        with tempfile.TemporaryDirectory() as workdir:
+            pickle_dir = os.path.join(workdir, "model")
+            with contextlib.redirect_stdout(sys.stderr):
+                mlflow.sklearn.save_model(model, pickle_dir)
+            bundle_dir = export_bundle(
+                model, os.path.join(workdir, "bundle"), CATEGORICAL_LEVELS
+            )
+            results[name] = {
+                "pickle_model_mb": dir_mb(pickle_dir),
+                "bundle_mb": dir_mb(bundle_dir),
+                "pickle": run_mode("pickle", pickle_dir, args.repeats),
+                "bundle": run_mode("bundle", bundle_dir, args.repeats),
+            }
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Per-row and per-batch latency of the sklearn and native Booster serving engines,
+and of the Booster engine answering from the precomputed prediction table
+
+Usage:
+    python benchmarks/bench_engines.py [--batch-sizes 1 100 10000] [--iterations 200]
+"""
+
+import argparse
+import copy
+import json
+
+from bench_utils import (
+    load_predictor,
+    make_records,
+    summarize,
+    time_calls,
+    train_classifier,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 100, 10000])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--nthread", type=int, default=1)
+    args = parser.parse_args()
+
+    classifier = train_classifier()
+    predictors = {
+        # Separate copies so the Booster engine's nthread does not leak into sklearn
+        engine: load_predictor(
+            copy.deepcopy(classifier), engine=engine, nthread=args.nthread
+        )
+        for engine in ("sklearn", "booster")
+    }
+    predictors["booster_table"] = load_predictor(
+        copy.deepcopy(classifier),
+        engine="booster",
+        nthread=args.nthread,
+        lookup_table=True,
+    )
+
+    results = {}
+    for batch_size in args.batch_sizes:
+        encoded = predictors["sklearn"].encoder.encode(
+            make_records(batch_size).to_dict("records")
+        )
+        for engine, predictor in predictors.items():
+            latencies = time_calls(
+                lambda: predictor.predict_encoded(encoded), args.iterations
+            )
+            stats = summarize(latencies)
+            stats["per_row_us"] = round(stats["p50_us"] / batch_size, 3)
+            results[f"{engine}_batch_{batch_size}"] = stats
+
+    results["table_stats"] = predictors["booster_table"].table.stats()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
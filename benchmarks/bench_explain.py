@@ -0,0 +1,78 @@
+"""
+/explain latency against /predict for the same model
+
+Drives the Flask app in-process, as bench_predict_latency does, and reports
+per-request p50/p95/p99 for:
+
+    predict / explain          one record
+    predict_batch / explain_batch   batches of 100 and 1000 records
+
+Explanations are measured uncached (explain_cache_size=0, so every request
+computes its contributions) and cached (the same records requested again,
+answered from the LRU cache). The ratios to the matching /predict numbers
+are the latency budget documented in deploy_service/explainer.py.
+
+Usage:
+    python benchmarks/bench_explain.py [--iterations 1000]
+"""
+
+import argparse
+import json
+import os
+
+os.environ.setdefault("TESTING", "true")
+
+from bench_utils import (  # noqa: E402
+    load_predictor,
+    make_records,
+    summarize,
+    time_calls,
+    train_classifier,
+)
+
+
+def measure(client, endpoint, body, iterations):
+    return summarize(time_calls(lambda: client.post(endpoint, json=body), iterations))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=1000)
+    args = parser.parse_args()
+
+    import service_test
+
+    classifier = train_classifier()
+    predictors = {
+        "uncached": load_predictor(classifier, engine="booster", explain_cache_size=0),
+        "cached": load_predictor(classifier, engine="booster"),
+    }
+    client = service_test.app.test_client()
+    records = make_records(1000, seed=11).to_dict("records")
+    batches = {"1": records[0], "100": records[:100], "1000": records}
+
+    results = {}
+    for size, body in batches.items():
+        single = size == "1"
+        predict_endpoint = "/predict" if single else "/predict_batch"
+        explain_endpoint = "/explain" if single else "/explain_batch"
+        iterations = max(args.iterations // int(size), 20)
+
+        service_test.predictor = predictors["cached"]
+        predict = measure(client, predict_endpoint, body, iterations)
+        result = {"predict": predict}
+        for name, predictor in predictors.items():
+            service_test.predictor = predictor
+            explain = measure(client, explain_endpoint, body, iterations)
+            result[f"explain_{name}"] = explain
+            result[f"explain_{name}_vs_predict_p50"] = round(
+                explain["p50_us"] / predict["p50_us"], 2
+            )
+        results[f"batch_{size}"] = result
+
+    results["cache"] = predictors["cached"].explainer.stats()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Service import time and memory: registry model vs exported bundle
+
+Runs `python -X importtime` in fresh interpreters that import service_test
+(which loads the model at import) in each mode:
+
+    registry   MLFLOW_TRACKING_URI points at a throwaway file-based store
+    bundle     MODEL_BUNDLE_DIR points at the same model exported with
+               model_bundle.export_bundle; mlflow is never imported
+
+and reports the wall time of the import, the total and per-package import
+time from -X importtime, the number of modules loaded and RSS. The
+mlflow row of the registry mode is what the bundle mode saves.
+
+Usage:
+    python benchmarks/bench_import_time.py [--repeats 5]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+from bench_utils import PROJECT_ROOT, register_model, train_classifier
+
+# Prints wall time, module count, whether mlflow was loaded and the current
+# and peak RSS after importing the service
+CHILD = """
+import sys, time
+started = time.perf_counter()
+import service_test
+seconds = time.perf_counter() - started
+with open("/proc/self/status") as f:
+    status = dict(line.split(":", 1) for line in f)
+print(
+    seconds,
+    len(sys.modules),
+    "mlflow" in sys.modules,
+    int(status["VmRSS"].split()[0]),
+    int(status["VmHWM"].split()[0]),
+)
+"""
+
+
+def parse_importtime(stderr):
+    """Self import time in microseconds summed per root package, and in total."""
+    packages = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, _, name = line[len("import time:") :].split("|")
+        root = name.strip().split(".")[0]
+        packages[root] = packages.get(root, 0) + int(self_us)
+    return packages, sum(packages.values())
+
+
+def run_mode(env, repeats):
+    runs = []
+    for _ in range(repeats):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", CHILD],
+            cwd=os.path.join(PROJECT_ROOT, "deploy_service"),
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        seconds, n_modules, mlflow_loaded, rss_kb, peak_kb = result.stdout.split()[-5:]
+        packages, total_us = parse_importtime(result.stderr)
+        runs.append(
+            {
+                "seconds": float(seconds),
+                "modules": int(n_modules),
+                "mlflow_imported": mlflow_loaded == "True",
+                "rss_mb": int(rss_kb) / 1024,
+                "peak_rss_mb": int(peak_kb) / 1024,
+                "importtime_total_ms": total_us / 1000,
+                "packages": packages,
+            }
+        )
+
+    def median(key):
+        return float(np.median([run[key] for run in runs]))
+
+    # Medians over the runs, with the packages that take longest to import
+    packages = {
+        name: np.median([run["packages"].get(name, 0) for run in runs]) / 1000
+        for name in runs[0]["packages"]
+    }
+    heaviest = sorted(packages.items(), key=lambda item: -item[1])[:8]
+    return {
+        "import_and_load_s": round(median("seconds"), 3),
+        "importtime_total_ms": round(median("importtime_total_ms"), 1),
+        "modules": runs[0]["modules"],
+        "rss_mb": round(median("rss_mb"), 1),
+        "peak_rss_mb": round(median("peak_rss_mb"), 1),
+        "mlflow_imported": runs[0]["mlflow_imported"],
+        "heaviest_packages_ms": {name: round(ms, 1) for name, ms in heaviest},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    from model_bundle import export_bundle
+    from predict_function import CATEGORICAL_LEVELS
+
+    env = dict(os.environ, WARMUP_REQUESTS="0")
+    for key in ("TESTING", "MODEL_BUNDLE_DIR", "MODEL_CACHE_DIR"):
+        env.pop(key, None)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        classifier = train_classifier()
+        with contextlib.redirect_stdout(sys.stderr):
+            tracking_uri = register_model(os.path.join(workdir, "mlruns"), classifier)
+        bundle_dir = export_bundle(
+            classifier,
+            os.path.join(workdir, "bundle"),
+            CATEGORICAL_LEVELS,
+            model_name="mlops_project",
+            model_version="1",
+        )
+
+        results = {
+            "registry": run_mode(
+                dict(env, MLFLOW_TRACKING_URI=tracking_uri), args.repeats
+            ),
+            "bundle": run_mode(dict(env, MODEL_BUNDLE_DIR=bundle_dir), args.repeats),
+        }
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Overhead of the /metrics instrumentation on the /predict hot path
+
+Times /predict through the Flask test client with metrics recording enabled
+and disabled, and the cost of a single histogram observation.
+
+Usage:
+    python benchmarks/bench_metrics_overhead.py [--iterations 3000]
+"""
+
+import argparse
+import json
+import os
+
+os.environ.setdefault("TESTING", "true")
+
+from bench_utils import (  # noqa: E402
+    load_predictor,
+    make_records,
+    summarize,
+    time_calls,
+    train_classifier,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=3000)
+    args = parser.parse_args()
+
+    import service_metrics
+    import service_test
+
+    service_test.predictor = load_predictor(train_classifier(), engine="booster")
+    record = make_records(1).to_dict("records")[0]
+    client = service_test.app.test_client()
+
+    def post():
+        client.post("/predict", json=record)
+
+    results = {}
+    # Interleave runs so drift affects both settings equally
+    for run in range(2):
+        for enabled in (False, True):
+            service_metrics.enabled = enabled
+            key = "metrics_on" if enabled else "metrics_off"
+            results[f"{key}_run{run}"] = summarize(time_calls(post, args.iterations))
+
+    service_metrics.enabled = True
+    results["single_observation"] = summarize(
+        time_calls(
+            lambda: service_metrics.observe_stage("/bench", "stage", 0.001),
+            args.iterations,
+        )
+    )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
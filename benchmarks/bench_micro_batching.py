@@ -0,0 +1,84 @@
+"""
+Throughput vs latency of /predict scoring with and without the micro-batcher
+
+Each concurrency level runs that many client threads, each scoring single
+records back to back, first directly against the predictor and then through
+MicroBatcher at several max delays.
+
+Usage:
+    python benchmarks/bench_micro_batching.py [--concurrency 1 4 16 64]
+"""
+
+import argparse
+import json
+import threading
+import time
+
+import numpy as np
+from bench_utils import load_predictor, make_records, summarize, train_classifier
+from micro_batcher import MicroBatcher
+
+
+def drive(predict, records, concurrency, requests_per_client):
+    """Run client threads and collect per-request latencies in microseconds"""
+    latencies = [[] for _ in range(concurrency)]
+    start = threading.Barrier(concurrency + 1)
+
+    def client(i):
+        start.wait()
+        for j in range(requests_per_client):
+            record = records[(i * requests_per_client + j) % len(records)]
+            began = time.perf_counter()
+            predict(record)
+            latencies[i].append((time.perf_counter() - began) * 1e6)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    began = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - began
+
+    stats = summarize(np.concatenate(latencies))
+    stats["throughput_rps"] = round(concurrency * requests_per_client / elapsed, 1)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--max-delays-ms", type=float, nargs="+", default=[0.5, 2, 5])
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--engine", default="booster")
+    args = parser.parse_args()
+
+    predictor = load_predictor(train_classifier(), engine=args.engine)
+    records = make_records(1000).to_dict("records")
+
+    results = {}
+    for concurrency in args.concurrency:
+        per_client = max(1, args.requests // concurrency)
+        results[f"direct_c{concurrency}"] = drive(
+            predictor.predict, records, concurrency, per_client
+        )
+        for delay_ms in args.max_delays_ms:
+            batcher = MicroBatcher(
+                lambda: predictor,
+                max_batch_size=args.max_batch_size,
+                max_delay=delay_ms / 1000,
+            )
+            try:
+                results[f"batched_{delay_ms}ms_c{concurrency}"] = drive(
+                    batcher.predict, records, concurrency, per_client
+                )
+            finally:
+                batcher.stop()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Optuna search wall time: serial study vs parallel trial workers
+
+Runs train_xgboost_with_optuna on a create_dataset sample against a
+throwaway file-based MLflow store, once serially (in-memory study, one
+process) and once per worker count with the trials split across worker
+processes sharing a journal-file study (one worker is the serial path
+with the journal storage). Each trial trains with trial_threads(n_workers)
+XGBoost threads.
+
+Reports wall time, speedup over serial and the best ROC AUC per run. The
+parallel runs include starting the workers, which import ml_function
+(several seconds, mostly evidently) in parallel.
+
+Usage:
+    python benchmarks/bench_optuna_parallel.py [--trials 16] [--workers 1 2 4 8]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+from bench_utils import PROJECT_ROOT  # noqa: F401  (puts the DAGs on sys.path)
+
+
+def run_search(splits, n_trials, n_workers, workdir, name):
+    from ml_function import train_xgboost_with_optuna, trial_threads
+
+    os.environ["MLFLOW_GCS_ARTIFACT_ROOT"] = os.path.join(workdir, name, "artifacts")
+    storage = None
+    if n_workers is not None:
+        storage = os.path.join(workdir, name, "study.journal")
+        os.makedirs(os.path.dirname(storage), exist_ok=True)
+
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(sys.stderr):
+        best = train_xgboost_with_optuna(
+            *splits,
+            mlflow_uri=f"file://{os.path.join(workdir, name, 'mlruns')}",
+            n_trials=n_trials,
+            n_workers=n_workers or 1,
+            storage=storage,
+        )
+    return {
+        "wall_s": round(time.perf_counter() - started, 2),
+        "xgboost_threads_per_trial": trial_threads(n_workers or 1),
+        "best_roc_auc": round(best, 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--trials", type=int, default=16)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--samples", type=int, default=5000)
+    args = parser.parse_args()
+
+    from ml_function import (
+        available_cpus,
+        create_dataset,
+        prepare_data_function,
+        preprocess_pd,
+    )
+
+    data = prepare_data_function(create_dataset(args.samples))
+    splits = (
+        preprocess_pd(data["X_train"].copy()),
+        data["y_train"],
+        preprocess_pd(data["X_test"].copy()),
+        data["y_test"],
+    )
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        results["serial"] = run_search(splits, args.trials, None, workdir, "serial")
+        for n_workers in args.workers:
+            name = f"workers_{n_workers}"
+            result = run_search(splits, args.trials, n_workers, workdir, name)
+            result["speedup"] = round(results["serial"]["wall_s"] / result["wall_s"], 2)
+            results[name] = result
+
+    print(
+        json.dumps(
+            {"cpus": available_cpus(), "trials": args.trials, **results}, indent=2
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
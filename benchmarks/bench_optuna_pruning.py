@@ -0,0 +1,117 @@
+"""
+Optuna search cost with and without early stopping and pruning
+
+Runs train_xgboost_with_optuna serially against a throwaway file-based
+MLflow store, on create_dataset records whose target is made to depend on
+the features (create_dataset's own target is random, so every trial would
+score about 0.5). Scenarios:
+
+    full               every trial trains all n_estimators rounds
+    early_stopping     trials stop after EARLY_STOPPING_ROUNDS rounds
+                       without validation improvement
+    median / halving   early stopping plus the median or successive
+                       halving pruner
+
+Reports wall time, the best test ROC AUC, the boosting rounds trained over
+all trials and how many trials were pruned.
+
+Usage:
+    python benchmarks/bench_optuna_pruning.py [--trials 30] [--samples 20000]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from bench_utils import PROJECT_ROOT  # noqa: F401  (puts the DAGs on sys.path)
+
+SCENARIOS = {
+    "full": {"early_stopping_rounds": None, "pruner": "none"},
+    "early_stopping": {"pruner": "none"},
+    "median": {"pruner": "median"},
+    "halving": {"pruner": "halving"},
+}
+
+
+def make_splits(n_samples):
+    from ml_function import create_dataset, prepare_data_function, preprocess_pd
+
+    np.random.seed(0)
+    dat = create_dataset(n_samples)
+    rng = np.random.default_rng(0)
+    logit = (
+        1.2 * (dat["night_bottle_feeding"] == "Yes")
+        + 0.8 * (dat["smoke_mother"] == "Yes")
+        - 0.6 * (dat["household_income"] == ">=4000")
+        + 0.05 * (dat["age"] - 30)
+        - 0.7
+    )
+    dat["caries"] = np.where(
+        rng.random(n_samples) < 1 / (1 + np.exp(-logit)), "Yes", "No"
+    )
+    data = prepare_data_function(dat)
+    return (
+        preprocess_pd(data["X_train"].copy()),
+        data["y_train"],
+        preprocess_pd(data["X_test"].copy()),
+        data["y_test"],
+    )
+
+
+def run_search(splits, n_trials, workdir, name, options):
+    import optuna
+    from ml_function import open_study_storage, train_xgboost_with_optuna
+
+    os.makedirs(os.path.join(workdir, name))
+    os.environ["MLFLOW_GCS_ARTIFACT_ROOT"] = os.path.join(workdir, name, "artifacts")
+    storage = os.path.join(workdir, name, "study.journal")
+
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(sys.stderr):
+        best = train_xgboost_with_optuna(
+            *splits,
+            mlflow_uri=f"file://{os.path.join(workdir, name, 'mlruns')}",
+            n_trials=n_trials,
+            n_workers=1,
+            storage=storage,
+            **options,
+        )
+    wall = time.perf_counter() - started
+
+    (summary,) = optuna.get_all_study_summaries(open_study_storage(storage))
+    trials = optuna.load_study(
+        study_name=summary.study_name, storage=open_study_storage(storage)
+    ).trials
+    return {
+        "wall_s": round(wall, 2),
+        "best_roc_auc": round(best, 4),
+        "boosting_rounds": sum(t.user_attrs["n_boosting_rounds"] for t in trials),
+        "pruned_trials": sum(t.state == optuna.trial.TrialState.PRUNED for t in trials),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--trials", type=int, default=30)
+    parser.add_argument("--samples", type=int, default=20000)
+    args = parser.parse_args()
+
+    splits = make_splits(args.samples)
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, options in SCENARIOS.items():
+            results[name] = run_search(splits, args.trials, workdir, name, options)
+            results[name]["wall_vs_full"] = round(
+                results[name]["wall_s"] / results["full"]["wall_s"], 2
+            )
+
+    print(json.dumps({"trials": args.trials, **results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Single-record /predict latency: DataFrame + preprocess_pd path vs FeatureEncoder path
+
+Usage:
+    python benchmarks/bench_predict_latency.py [--iterations 2000]
+"""
+
+import argparse
+import json
+import os
+
+os.environ.setdefault("TESTING", "true")
+
+import pandas as pd  # noqa: E402
+from bench_utils import (  # noqa: E402
+    load_predictor,
+    make_records,
+    summarize,
+    time_calls,
+    train_classifier,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    import service_test
+
+    predictor = load_predictor(train_classifier())
+    service_test.predictor = predictor
+    record = make_records(1).to_dict("records")[0]
+    client = service_test.app.test_client()
+
+    results = {
+        "dataframe_predict": summarize(
+            time_calls(
+                lambda: predictor.predict(pd.DataFrame([record])), args.iterations
+            )
+        ),
+        "encoded_predict": summarize(
+            time_calls(lambda: predictor.predict(record), args.iterations)
+        ),
+        "endpoint_predict": summarize(
+            time_calls(lambda: client.post("/predict", json=record), args.iterations)
+        ),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
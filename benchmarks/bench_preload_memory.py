@@ -0,0 +1,121 @@
+"""
+Gunicorn memory with and without PRELOAD_MODEL at several worker counts
+
+Registers a small XGBoost model in a throwaway file-based MLflow store and
+starts gunicorn once per (workers, preload) pair. Memory is read from
+/proc/<pid>/smaps_rollup after every worker has booted and again after a
+short burst of /predict requests, since copy-on-write pages are only copied
+once a worker touches them. Per-worker RSS counts shared pages in every
+worker, so the totals compare PSS summed over the master and its workers.
+
+Usage:
+    python benchmarks/bench_preload_memory.py [--workers 2 4 8]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_utils import make_records, register_model, train_classifier
+from load_test import child_pids, drive, smaps_mb, start_server
+
+
+def wait_for_workers(process, n_workers, timeout=300):
+    """Wait until n_workers children exist and their memory stops growing."""
+    started = time.perf_counter()
+    previous = None
+    while time.perf_counter() - started < timeout:
+        workers = child_pids(process.pid)
+        if len(workers) == n_workers:
+            current = [smaps_mb(pid)["rss"] for pid in workers]
+            if previous is not None and current == previous:
+                return time.perf_counter() - started
+            previous = current
+        time.sleep(1)
+    raise RuntimeError(f"{n_workers} workers did not settle within {timeout}s")
+
+
+def measure(process):
+    workers = [smaps_mb(pid) for pid in child_pids(process.pid)]
+    master = smaps_mb(process.pid)
+    return {
+        "master": master,
+        "worker_mean": {
+            key: round(sum(w[key] for w in workers) / len(workers), 1)
+            for key in ("rss", "pss", "private")
+        },
+        "total_pss_mb": round(master["pss"] + sum(w["pss"] for w in workers), 1),
+    }
+
+
+def run(args, env, n_workers, preload, payloads):
+    server_args = argparse.Namespace(
+        server="gunicorn", port=args.port, workers=n_workers, threads=1
+    )
+    env = dict(env, PRELOAD_MODEL="true" if preload else "false")
+    started = time.perf_counter()
+    process, _ = start_server(server_args, env)
+    try:
+        wait_for_workers(process, n_workers)
+        boot_seconds = time.perf_counter() - started
+        result = {"boot_s": round(boot_seconds, 2), "idle": measure(process)}
+        drive(
+            f"http://127.0.0.1:{args.port}/predict",
+            payloads,
+            n_workers,
+            args.requests,
+            1,
+        )
+        result["after_load"] = measure(process)
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--port", type=int, default=9797)
+    args = parser.parse_args()
+
+    payloads = [
+        json.dumps(record) for record in make_records(200, seed=7).to_dict("records")
+    ]
+    env = dict(os.environ)
+    env.pop("TESTING", None)
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        with contextlib.redirect_stdout(sys.stderr):
+            env["MLFLOW_TRACKING_URI"] = register_model(
+                os.path.join(workdir, "mlruns"), train_classifier()
+            )
+        env["PROMETHEUS_MULTIPROC_DIR"] = os.path.join(workdir, "metrics")
+
+        for n_workers in args.workers:
+            default = run(args, env, n_workers, False, payloads)
+            preloaded = run(args, env, n_workers, True, payloads)
+            results[f"workers_{n_workers}"] = {
+                "default": default,
+                "preload": preloaded,
+                "saved_pss_mb": round(
+                    default["after_load"]["total_pss_mb"]
+                    - preloaded["after_load"]["total_pss_mb"],
+                    1,
+                ),
+            }
+
+    print(json.dumps({"cpus": os.cpu_count(), **results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
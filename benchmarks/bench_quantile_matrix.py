@@ -0,0 +1,160 @@
+"""
+Per-trial fit time: XGBClassifier.fit on frames vs prebuilt QuantileDMatrix
+
+Times one Optuna trial's training both ways on create_dataset records with
+a learnable target (see bench_optuna_pruning.make_splits), at each size:
+
+    sklearn    XGBClassifier.fit on the training frame with the validation
+               frame as eval_set, as trials did before; every fit quantizes
+               both frames again
+    native     xgb.train on matrices from ml_function.build_matrices, built
+               once per search, then loading the booster into an
+               XGBClassifier as objective_xgboost does
+
+Both train the same params with early stopping on validation AUC and give
+the same model. Reports the one-time matrix build, the median seconds per
+trial fit and the boosting rounds trained.
+
+Usage:
+    python benchmarks/bench_quantile_matrix.py [--samples 1000 100000 1000000]
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+from bench_optuna_pruning import make_splits
+from bench_utils import PROJECT_ROOT  # noqa: F401  (puts the DAGs on sys.path)
+
+# Mid-range values of objective_xgboost's search space
+PARAMS = {
+    "n_estimators": 150,
+    "max_depth": 6,
+    "learning_rate": 0.1,
+    "subsample": 0.8,
+    "colsample_bytree": 0.8,
+    "reg_alpha": 1.0,
+    "reg_lambda": 1.0,
+    "random_state": 42,
+}
+
+
+def fit_sklearn(X_fit, y_fit, X_valid, y_valid, n_jobs, early_stopping_rounds):
+    import xgboost as xgb
+
+    model = xgb.XGBClassifier(
+        **PARAMS,
+        enable_categorical=True,
+        n_jobs=n_jobs,
+        eval_metric="auc",
+        early_stopping_rounds=early_stopping_rounds,
+    )
+    model.fit(X_fit, y_fit, eval_set=[(X_valid, y_valid)], verbose=False)
+    return model.get_booster().num_boosted_rounds()
+
+
+def fit_native(dtrain, dvalid, n_jobs, early_stopping_rounds):
+    import xgboost as xgb
+    from ml_function import truncate_to_best_iteration
+
+    booster_params = {
+        key: value
+        for key, value in PARAMS.items()
+        if key not in ("n_estimators", "random_state")
+    }
+    booster_params.update(
+        objective="binary:logistic",
+        eval_metric="auc",
+        tree_method="hist",
+        seed=PARAMS["random_state"],
+        nthread=n_jobs,
+    )
+    booster = xgb.train(
+        booster_params,
+        dtrain,
+        num_boost_round=PARAMS["n_estimators"],
+        evals=[(dvalid, "validation_0")],
+        early_stopping_rounds=early_stopping_rounds,
+        verbose_eval=False,
+    )
+    rounds = booster.num_boosted_rounds()
+    model = xgb.XGBClassifier(**PARAMS, enable_categorical=True, n_jobs=n_jobs)
+    model.load_model(bytearray(truncate_to_best_iteration(booster).save_raw("ubj")))
+    return rounds
+
+
+def time_trials(fits, n_trials):
+    """Median seconds per fit, alternating the fits so drift hits each alike"""
+    seconds = {name: [] for name in fits}
+    rounds = {}
+    for _ in range(n_trials):
+        for name, fit in fits.items():
+            started = time.perf_counter()
+            rounds[name] = fit()
+            seconds[name].append(time.perf_counter() - started)
+    return {
+        name: {
+            "per_trial_s": round(float(np.median(seconds[name])), 4),
+            "rounds": rounds[name],
+        }
+        for name in fits
+    }
+
+
+def run_size(n_samples, n_trials):
+    from ml_function import (
+        EARLY_STOPPING_ROUNDS,
+        VALIDATION_FRACTION,
+        available_cpus,
+        build_matrices,
+    )
+    from sklearn.model_selection import train_test_split
+
+    X_train, y_train, _, _ = make_splits(n_samples)
+    X_fit, X_valid, y_fit, y_valid = train_test_split(
+        X_train,
+        y_train,
+        test_size=VALIDATION_FRACTION,
+        random_state=42,
+        stratify=y_train,
+    )
+    n_jobs = available_cpus()
+
+    started = time.perf_counter()
+    dtrain, dvalid = build_matrices(X_fit, y_fit, X_valid, y_valid, n_jobs)
+    build_s = time.perf_counter() - started
+
+    timings = time_trials(
+        {
+            "sklearn": lambda: fit_sklearn(
+                X_fit, y_fit, X_valid, y_valid, n_jobs, EARLY_STOPPING_ROUNDS
+            ),
+            "native": lambda: fit_native(dtrain, dvalid, n_jobs, EARLY_STOPPING_ROUNDS),
+        },
+        n_trials,
+    )
+    return {
+        "training_rows": len(X_fit),
+        "build_matrices_s": round(build_s, 4),
+        **timings,
+        "speedup": round(
+            timings["sklearn"]["per_trial_s"] / timings["native"]["per_trial_s"], 2
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--samples", type=int, nargs="+", default=[1000, 100000, 1000000]
+    )
+    parser.add_argument("--trials", type=int, default=5)
+    args = parser.parse_args()
+
+    results = {str(n): run_size(n, args.trials) for n in args.samples}
+    print(json.dumps({"trials": args.trials, **results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
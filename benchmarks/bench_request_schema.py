@@ -0,0 +1,69 @@
+"""
+Request decoding: pd.DataFrame + preprocess_pd vs the compiled RequestSchema
+
+Times only input handling (no model call) for one record and for a batch,
+with and without FeatureEncoder producing the model matrix afterwards.
+
+Usage:
+    python benchmarks/bench_request_schema.py [--iterations 5000] [--batch-size 1000]
+"""
+
+import argparse
+import json
+
+import pandas as pd
+from bench_utils import make_records, preprocess_pd, summarize, time_calls
+from predict_function import FeatureEncoder
+from request_schema import RequestSchema
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    schema = RequestSchema()
+    encoder = FeatureEncoder()
+    # Round-trip through JSON so values have the types a request body has
+    record = json.loads(json.dumps(make_records(1).to_dict("records")[0]))
+    batch = json.loads(json.dumps(make_records(args.batch_size).to_dict("records")))
+    batch_iterations = max(10, args.iterations // 50)
+
+    results = {
+        "single": {
+            "dataframe_preprocess": summarize(
+                time_calls(
+                    lambda: preprocess_pd(pd.DataFrame([record])), args.iterations
+                )
+            ),
+            "schema_decode": summarize(
+                time_calls(lambda: schema.decode_record(record), args.iterations)
+            ),
+            "schema_decode_encode": summarize(
+                time_calls(
+                    lambda: encoder.encode(schema.decode_record(record)),
+                    args.iterations,
+                )
+            ),
+        },
+        f"batch_{args.batch_size}": {
+            "dataframe_preprocess": summarize(
+                time_calls(lambda: preprocess_pd(pd.DataFrame(batch)), batch_iterations)
+            ),
+            "schema_decode": summarize(
+                time_calls(lambda: schema.decode_batch(batch), batch_iterations)
+            ),
+            "schema_decode_encode": summarize(
+                time_calls(
+                    lambda: encoder.encode(schema.decode_batch(batch)[0]),
+                    batch_iterations,
+                )
+            ),
+        },
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
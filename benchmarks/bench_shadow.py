@@ -0,0 +1,103 @@
+"""
+Champion latency with and without a shadow challenger
+
+Starts gunicorn (one worker, --threads request threads) with the prediction
+log enabled and drives /predict and /predict_batch from concurrent clients,
+once without shadow mode and then with SHADOW_MODE=true and a challenger
+registered under the challenger alias. Each challenger runs in the worker
+on the shadow thread, so on a saturated CPU it competes with the champion;
+the heavier one is several times slower per call than the champion.
+
+Reports champion p50/p95/p99 and throughput per scenario, and how many
+records the challenger scored or dropped (from /healthz).
+
+Usage:
+    python benchmarks/bench_shadow.py [--requests 2000] [--concurrency 4]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import requests
+from bench_utils import make_records, register_model, train_classifier
+from load_test import drive, start_server
+
+
+def run_scenario(args, env):
+    server_args = argparse.Namespace(
+        server="gunicorn", port=args.port, workers=1, threads=args.threads
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    records = make_records(1000, seed=7).to_dict("records")
+    single = [json.dumps(record) for record in records]
+    batch = [json.dumps(records[i : i + 100]) for i in range(0, 1000, 100)]
+
+    process, _ = start_server(server_args, env)
+    try:
+        drive(f"{base_url}/predict", single, args.concurrency, 100, 1)
+        result = {
+            "predict": drive(
+                f"{base_url}/predict", single, args.concurrency, args.requests, 1
+            ),
+            "predict_batch100": drive(
+                f"{base_url}/predict_batch",
+                batch,
+                args.concurrency,
+                args.requests // 10,
+                100,
+            ),
+        }
+        result["shadow"] = requests.get(f"{base_url}/healthz").json()["shadow"]
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--port", type=int, default=9797)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.pop("TESTING", None)
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        tracking_dir = os.path.join(workdir, "mlruns")
+        with contextlib.redirect_stdout(sys.stderr):
+            env["MLFLOW_TRACKING_URI"] = register_model(
+                tracking_dir, train_classifier()
+            )
+        env["PROMETHEUS_MULTIPROC_DIR"] = os.path.join(workdir, "metrics")
+
+        challengers = {
+            "same_size": train_classifier(seed=1),
+            "heavier_500x8": train_classifier(n_estimators=500, max_depth=8, seed=1),
+        }
+        scenarios = [("shadow_off", None)] + list(challengers.items())
+        for name, challenger in scenarios:
+            scenario_env = dict(
+                env, PREDICTION_LOG_DIR=os.path.join(workdir, f"log-{name}")
+            )
+            if challenger is not None:
+                with contextlib.redirect_stdout(sys.stderr):
+                    register_model(tracking_dir, challenger, alias="challenger")
+                scenario_env["SHADOW_MODE"] = "true"
+            results[name] = run_scenario(args, scenario_env)
+
+    print(json.dumps({"cpus": os.cpu_count(), **results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Per-trial MLflow logging cost: eager vs deferred trial logging
+
+Runs train_xgboost_with_optuna serially with log_mode "eager" (params
+logged one request each, signature inferred and model uploaded for every
+trial) and "deferred" (one batched request per trial from a background
+thread, signature inferred once, models uploaded for the top k trials at
+the end), against:
+
+    file      a throwaway file-based store
+    server    a local `mlflow server` on a SQLite backend, so every
+              tracking call is an HTTP request as with the real server
+
+Reports wall time and the median per-trial seconds spent fitting,
+evaluating, inferring the signature and logging (from each trial's
+"timings" user attribute), plus the time left outside the trials, which
+for deferred logging is mostly uploading the top k models.
+
+Usage:
+    python benchmarks/bench_trial_logging.py [--trials 20] [--top-k 3]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import requests
+from bench_optuna_pruning import make_splits
+from bench_utils import PROJECT_ROOT  # noqa: F401  (puts the DAGs on sys.path)
+
+
+@contextlib.contextmanager
+def mlflow_server(workdir, port):
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "mlflow",
+            "server",
+            "--backend-store-uri",
+            f"sqlite:///{os.path.join(workdir, 'server.db')}",
+            "--default-artifact-root",
+            os.path.join(workdir, "server-artifacts"),
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--workers",
+            "1",
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        # mlflow server runs gunicorn as a child; stop both together
+        start_new_session=True,
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.time() + 120
+        while True:
+            try:
+                if requests.get(f"{url}/health", timeout=1).ok:
+                    break
+            except requests.RequestException:
+                pass
+            if time.time() > deadline or process.poll() is not None:
+                raise RuntimeError("mlflow server did not start")
+            time.sleep(0.5)
+        yield url
+    finally:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=30)
+
+
+def run_search(splits, args, tracking_uri, workdir, name, log_mode):
+    import optuna
+    from ml_function import open_study_storage, train_xgboost_with_optuna
+
+    os.makedirs(os.path.join(workdir, name))
+    os.environ["MLFLOW_GCS_ARTIFACT_ROOT"] = os.path.join(workdir, name, "artifacts")
+    storage = os.path.join(workdir, name, "study.journal")
+
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(sys.stderr):
+        best = train_xgboost_with_optuna(
+            *splits,
+            mlflow_uri=tracking_uri,
+            experiment_name=name,
+            n_trials=args.trials,
+            n_workers=1,
+            storage=storage,
+            pruner="none",
+            log_mode=log_mode,
+            top_k=args.top_k,
+        )
+    wall = time.perf_counter() - started
+
+    (summary,) = optuna.get_all_study_summaries(open_study_storage(storage))
+    trials = optuna.load_study(
+        study_name=summary.study_name, storage=open_study_storage(storage)
+    ).trials
+    timings = [trial.user_attrs["timings"] for trial in trials]
+    in_trials = sum(sum(t.values()) for t in timings)
+    per_trial = {
+        f"{stage}_s": round(float(np.median([t.get(stage, 0.0) for t in timings])), 4)
+        for stage in ("fit", "evaluate", "signature", "log")
+    }
+    return {
+        "wall_s": round(wall, 2),
+        "best_roc_auc": round(best, 4),
+        "median_per_trial": per_trial,
+        "outside_trials_s": round(wall - in_trials, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--trials", type=int, default=20)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--samples", type=int, default=20000)
+    parser.add_argument("--port", type=int, default=5123)
+    args = parser.parse_args()
+
+    splits = make_splits(args.samples)
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        stores = {"file": f"file://{os.path.join(workdir, 'mlruns')}"}
+        with mlflow_server(workdir, args.port) as server_url:
+            stores["server"] = server_url
+            for store, tracking_uri in stores.items():
+                for log_mode in ("eager", "deferred"):
+                    name = f"{store}_{log_mode}"
+                    results[name] = run_search(
+                        splits, args, tracking_uri, workdir, name, log_mode
+                    )
+
+    print(json.dumps({"trials": args.trials, "top_k": args.top_k, **results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
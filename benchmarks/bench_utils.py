@@ -0,0 +1,112 @@
+"""
+Shared helpers for the benchmark scripts
+Builds a small real XGBoost model so benchmarks run without an MLflow server
+"""
+
+import os
+import sys
+import time
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "deploy_service"))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "local-airflow", "dags"))
+
+from predict_function import (  # noqa: E402
+    CATEGORICAL_LEVELS,
+    FEATURE_COLUMNS,
+    preprocess_pd,
+    xgb_model,
+)
+
+
+def make_records(n_samples, seed=42):
+    """Synthetic patient records with the same distributions as create_dataset"""
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for col in FEATURE_COLUMNS:
+        if col in CATEGORICAL_LEVELS:
+            columns[col] = rng.choice(CATEGORICAL_LEVELS[col], n_samples)
+        else:
+            lam = 30 if col == "age" else 12
+            columns[col] = rng.poisson(lam, n_samples).astype("float64")
+    return pd.DataFrame(columns)
+
+
+def train_classifier(n_samples=1000, n_estimators=100, max_depth=6, seed=42):
+    """Train an XGBClassifier the way train_xgboost_with_optuna does"""
+    import xgboost as xgb
+
+    X = preprocess_pd(make_records(n_samples, seed))
+    y = np.random.default_rng(seed).integers(0, 2, n_samples)
+    model = xgb.XGBClassifier(
+        n_estimators=n_estimators,
+        max_depth=max_depth,
+        enable_categorical=True,
+        random_state=seed,
+    )
+    model.fit(X, y)
+    return model
+
+
+def register_model(
+    tracking_dir, classifier, model_name="mlops_project", alias="champion"
+):
+    """
+    Register a classifier as model_name@alias in a file-based MLflow store.
+
+    Returns:
+        str: Tracking URI of the store
+    """
+    import mlflow
+    import mlflow.sklearn
+
+    tracking_uri = f"file://{os.path.abspath(tracking_dir)}"
+    mlflow.set_tracking_uri(tracking_uri)
+    with mlflow.start_run():
+        info = mlflow.sklearn.log_model(
+            sk_model=classifier,
+            artifact_path="xgboost_model",
+            registered_model_name=model_name,
+        )
+    mlflow.MlflowClient().set_registered_model_alias(
+        model_name, alias, str(info.registered_model_version)
+    )
+    return tracking_uri
+
+
+def load_predictor(classifier, version="1", **kwargs):
+    """Wrap a trained classifier in xgb_model without contacting MLflow"""
+    # Import the real module first, so the patch does not land on mlflow's
+    # lazy placeholder for it
+    import mlflow.sklearn  # noqa: F401
+
+    with patch("mlflow.sklearn.load_model", return_value=classifier), patch(
+        "predict_function.resolve_model_version", return_value=version
+    ):
+        return xgb_model(model_name="mlops_project", model_version="champion", **kwargs)
+
+
+def time_calls(fn, n_iter, warmup=10):
+    """Run fn repeatedly and return per-call latencies in microseconds"""
+    for _ in range(warmup):
+        fn()
+    latencies = np.empty(n_iter)
+    for i in range(n_iter):
+        start = time.perf_counter()
+        fn()
+        latencies[i] = time.perf_counter() - start
+    return latencies * 1e6
+
+
+def summarize(latencies_us):
+    """p50/p95/p99 of a latency sample in microseconds"""
+    p50, p95, p99 = np.percentile(latencies_us, [50, 95, 99])
+    return {
+        "p50_us": round(float(p50), 1),
+        "p95_us": round(float(p95), 1),
+        "p99_us": round(float(p99), 1),
+    }
@@ -0,0 +1,135 @@
+"""
+First-request latency after startup, with and without warmup
+
+Starts gunicorn with one worker and a small XGBoost model registered in a
+throwaway file-based MLflow store, waits for /readyz, then times the first
+request to each scoring endpoint against the median of the requests that
+follow. Each configuration is restarted --restarts times since a single
+first request is noisy.
+
+Usage:
+    python benchmarks/bench_warmup.py [--restarts 5] [--follow 50]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pyarrow as pa
+import requests
+from bench_utils import make_records, register_model, train_classifier
+from load_test import start_server
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+
+def wait_ready(base_url, timeout=120):
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        response = requests.get(f"{base_url}/readyz", timeout=5)
+        if response.status_code == 200:
+            return response.json()
+        time.sleep(0.05)
+    raise RuntimeError(f"/readyz not ready within {timeout}s")
+
+
+def endpoint_requests(records):
+    """(name, path, request kwargs) for each scoring endpoint"""
+    batch = records[:100]
+    table = pa.Table.from_pylist(batch)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return [
+        ("predict", "/predict", {"json": records[0]}),
+        ("predict_batch100", "/predict_batch", {"json": batch}),
+        (
+            "predict_bulk100",
+            "/predict_bulk",
+            {
+                "data": sink.getvalue().to_pybytes(),
+                "headers": {"Content-Type": ARROW_STREAM},
+            },
+        ),
+    ]
+
+
+def run_once(args, env, scenarios):
+    server_args = argparse.Namespace(
+        server="gunicorn", port=args.port, workers=1, threads=1
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    process, _ = start_server(server_args, env)
+    try:
+        health = wait_ready(base_url)
+        session = requests.Session()
+        result = {}
+        for name, path, kwargs in scenarios:
+            latencies = []
+            for _ in range(args.follow + 1):
+                started = time.perf_counter()
+                response = session.post(f"{base_url}{path}", **kwargs)
+                latencies.append((time.perf_counter() - started) * 1000)
+                assert response.status_code == 200, response.text[:200]
+            result[name] = (latencies[0], float(np.median(latencies[1:])))
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    return result, health
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--restarts", type=int, default=5)
+    parser.add_argument("--follow", type=int, default=50)
+    parser.add_argument("--port", type=int, default=9797)
+    args = parser.parse_args()
+
+    records = make_records(100, seed=7)
+    records = [
+        {
+            key: value.item() if hasattr(value, "item") else value
+            for key, value in r.items()
+        }
+        for r in records.to_dict("records")
+    ]
+    scenarios = endpoint_requests(records)
+
+    env = dict(os.environ)
+    env.pop("TESTING", None)
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        with contextlib.redirect_stdout(sys.stderr):
+            env["MLFLOW_TRACKING_URI"] = register_model(
+                os.path.join(workdir, "mlruns"), train_classifier()
+            )
+        env["PROMETHEUS_MULTIPROC_DIR"] = os.path.join(workdir, "metrics")
+
+        for warmup_requests in (0, 20):
+            env["WARMUP_REQUESTS"] = str(warmup_requests)
+            runs = [run_once(args, env, scenarios) for _ in range(args.restarts)]
+            summary = {}
+            for name, _, _ in scenarios:
+                first = [run[0][name][0] for run in runs]
+                steady = [run[0][name][1] for run in runs]
+                summary[name] = {
+                    "first_ms_median": round(float(np.median(first)), 3),
+                    "steady_p50_ms": round(float(np.median(steady)), 3),
+                }
+            summary["readyz"] = runs[-1][1]
+            results[f"warmup_{warmup_requests}"] = summary
+
+    print(json.dumps({"cpus": os.cpu_count(), **results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
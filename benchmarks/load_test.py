@@ -0,0 +1,334 @@
+"""
+Load test for the prediction service
+
+Starts the service as a real server process, either with the TESTING mock
+predictor or with a small XGBoost model registered in a throwaway file-based
+MLflow store, then drives /predict and /predict_batch at each concurrency
+level and reports JSON with:
+
+    cold_start_s   process start until GET / answers
+    rss_mb         resident memory of the server and each worker
+    scenarios      throughput, p50/p95/p99 latency and errors per scenario
+
+With --baseline the run is compared against a stored result and the script
+exits non-zero if any scenario lost more than --tolerance of its throughput
+or gained more than --tolerance on its p99 latency.
+
+Usage:
+    python benchmarks/load_test.py --model xgboost --server gunicorn --workers 2 \\
+        --concurrency 1 8 32 --output results.json
+    python benchmarks/load_test.py --baseline results.json
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import requests
+from bench_utils import PROJECT_ROOT, make_records, register_model, train_classifier
+
+DEPLOY_SERVICE_DIR = os.path.join(PROJECT_ROOT, "deploy_service")
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def server_command(server, port, workers, threads):
+    if server == "gunicorn":
+        return [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "-c",
+            "gunicorn.conf.py",
+            f"--bind=127.0.0.1:{port}",
+            f"--workers={workers}",
+            f"--threads={threads}",
+            "service_test:app",
+        ]
+    if server == "uvicorn":
+        return [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "asgi_app:app",
+            "--host=127.0.0.1",
+            f"--port={port}",
+            f"--workers={workers}",
+        ]
+    raise ValueError(f"Unknown server '{server}'")
+
+
+def start_server(args, env, timeout=120):
+    """
+    Start the server and wait until it answers.
+
+    Returns:
+        tuple: (process, cold start seconds)
+    """
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        server_command(args.server, args.port, args.workers, args.threads),
+        cwd=DEPLOY_SERVICE_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{args.port}/"
+    while time.perf_counter() - started < timeout:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            if requests.get(url, timeout=1).status_code == 200:
+                return process, time.perf_counter() - started
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.05)
+    process.kill()
+    raise RuntimeError(f"Server did not answer within {timeout}s")
+
+
+def child_pids(pid):
+    """Direct children of a process, from /proc."""
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name may contain spaces; fields resume after ")"
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == pid:
+            children.append(int(entry))
+    return sorted(children)
+
+
+def rss_mb(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return round(int(line.split()[1]) / 1024, 1)
+    return None
+
+
+def smaps_mb(pid):
+    """
+    RSS, PSS and private memory of a process from /proc/<pid>/smaps_rollup.
+
+    RSS counts pages shared with other processes in full; PSS splits them
+    between the sharers, so PSS summed over processes is the real total.
+    """
+    fields = {"Rss": "rss", "Pss": "pss", "Private_Clean": None, "Private_Dirty": None}
+    usage = {"rss": 0.0, "pss": 0.0, "private": 0.0}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            name, _, rest = line.partition(":")
+            if name in fields:
+                usage[fields[name] or "private"] += int(rest.split()[0]) / 1024
+    return {key: round(value, 1) for key, value in usage.items()}
+
+
+def memory_report(process):
+    workers = child_pids(process.pid)
+    return {
+        "server": rss_mb(process.pid),
+        "workers": [rss_mb(pid) for pid in workers],
+    }
+
+
+def drive(url, payloads, concurrency, n_requests, rows_per_request):
+    """Send n_requests POSTs from concurrency client threads."""
+    latencies = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+    per_client = max(1, n_requests // concurrency)
+    start = threading.Barrier(concurrency + 1)
+
+    def client(i):
+        session = requests.Session()
+        start.wait()
+        for j in range(per_client):
+            payload = payloads[(i * per_client + j) % len(payloads)]
+            began = time.perf_counter()
+            try:
+                response = session.post(url, data=payload, headers=JSON_HEADERS)
+                if response.status_code != 200:
+                    errors[i] += 1
+            except requests.exceptions.RequestException:
+                errors[i] += 1
+            latencies[i].append(time.perf_counter() - began)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    began = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - began
+
+    all_latencies = np.concatenate(latencies) * 1000
+    p50, p95, p99 = np.percentile(all_latencies, [50, 95, 99])
+    total = concurrency * per_client
+    return {
+        "requests": total,
+        "errors": sum(errors),
+        "throughput_rps": round(total / elapsed, 1),
+        "rows_per_s": round(total * rows_per_request / elapsed, 1),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+    }
+
+
+def run_scenarios(args):
+    base_url = f"http://127.0.0.1:{args.port}"
+    records = make_records(1000, seed=7).to_dict("records")
+    single = [json.dumps(record) for record in records]
+    batch = [
+        json.dumps(records[i : i + args.batch_size])
+        for i in range(0, len(records) - args.batch_size + 1, args.batch_size)
+    ] or [json.dumps(records[: args.batch_size])]
+
+    # Warm every worker before measuring
+    drive(f"{base_url}/predict", single, max(args.concurrency), 50, 1)
+
+    scenarios = {}
+    for concurrency in args.concurrency:
+        scenarios[f"predict_c{concurrency}"] = drive(
+            f"{base_url}/predict", single, concurrency, args.requests, 1
+        )
+        scenarios[f"predict_batch{args.batch_size}_c{concurrency}"] = drive(
+            f"{base_url}/predict_batch",
+            batch,
+            concurrency,
+            max(concurrency, args.requests // 10),
+            args.batch_size,
+        )
+    return scenarios
+
+
+def compare_to_baseline(result, baseline, tolerance):
+    """
+    Compare scenario results against a baseline run.
+
+    Returns:
+        list: Human readable regressions, empty if none
+    """
+    regressions = []
+    for name, base in baseline.get("scenarios", {}).items():
+        current = result["scenarios"].get(name)
+        if current is None:
+            continue
+        if current["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: throughput {current['throughput_rps']} rps "
+                f"< baseline {base['throughput_rps']} rps"
+            )
+        if current["p99_ms"] > base["p99_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: p99 {current['p99_ms']} ms > baseline {base['p99_ms']} ms"
+            )
+        if current["errors"] > base["errors"]:
+            regressions.append(
+                f"{name}: {current['errors']} errors > baseline {base['errors']}"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--model", choices=["mock", "xgboost"], default="xgboost")
+    parser.add_argument("--server", choices=["gunicorn", "uvicorn"], default="gunicorn")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--port", type=int, default=9797)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument(
+        "--env",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="Extra environment for the server, e.g. SERVING_ENGINE=sklearn",
+    )
+    parser.add_argument("--output", help="Write the JSON result to this file")
+    parser.add_argument("--baseline", help="Compare against a stored JSON result")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.pop("PROMETHEUS_MULTIPROC_DIR", None)
+    with tempfile.TemporaryDirectory() as workdir:
+        if args.model == "mock":
+            env["TESTING"] = "true"
+        else:
+            env.pop("TESTING", None)
+            # MLflow prints registration messages; keep stdout pure JSON
+            with contextlib.redirect_stdout(sys.stderr):
+                env["MLFLOW_TRACKING_URI"] = register_model(
+                    os.path.join(workdir, "mlruns"), train_classifier()
+                )
+        if args.workers > 1 or args.server == "gunicorn":
+            # gunicorn.conf.py prepares it for gunicorn, uvicorn needs it made
+            env["PROMETHEUS_MULTIPROC_DIR"] = os.path.join(workdir, "metrics")
+            os.makedirs(env["PROMETHEUS_MULTIPROC_DIR"])
+        for item in args.env:
+            key, value = item.split("=", 1)
+            env[key] = value
+
+        process, cold_start = start_server(args, env)
+        try:
+            result = {
+                "config": {
+                    key: getattr(args, key)
+                    for key in (
+                        "model",
+                        "server",
+                        "workers",
+                        "threads",
+                        "concurrency",
+                        "requests",
+                        "batch_size",
+                        "env",
+                    )
+                },
+                "cold_start_s": round(cold_start, 3),
+                "rss_mb": memory_report(process),
+            }
+            result["scenarios"] = run_scenarios(args)
+            result["rss_mb_after_load"] = memory_report(process)
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(result, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+ASGI entry point for the prediction service
+
+Serves the same routes as the Flask app in service_test.py and shares its
+predictor, micro-batcher and scoring code. Requests beyond
+ASGI_MAX_IN_FLIGHT are rejected with 503 before their bodies are read;
+admitted bodies are read on the event loop and decoded and scored in a
+bounded thread pool.
+
+Run with:
+    uvicorn asgi_app:app --host 0.0.0.0 --port 9696
+"""
+
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import service_metrics
+import service_test
+from starlette.applications import Starlette
+from starlette.responses import HTMLResponse, JSONResponse, Response
+from starlette.routing import Route
+
+# Threads running CPU-bound decoding and scoring
+ASGI_EXECUTOR_THREADS = int(os.getenv("ASGI_EXECUTOR_THREADS", "2"))
+# Requests accepted at once before new ones get 503
+ASGI_MAX_IN_FLIGHT = int(os.getenv("ASGI_MAX_IN_FLIGHT", "64"))
+
+executor = ThreadPoolExecutor(
+    max_workers=ASGI_EXECUTOR_THREADS, thread_name_prefix="scoring"
+)
+in_flight = 0
+
+with open(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates", "index.html")
+) as f:
+    INDEX_HTML = f.read()
+
+
+def mimetype_of(request):
+    return request.headers.get("content-type", "").split(";")[0].strip().lower()
+
+
+def json_response(endpoint, payload, status=200):
+    started = time.perf_counter()
+    response = JSONResponse(payload, status_code=status)
+    service_metrics.observe_stage(endpoint, "serialize", time.perf_counter() - started)
+    return service_test.with_model_version(response, payload.get("model_version"))
+
+
+def predict_body(body):
+    """Decode and score a /predict body; runs in the executor."""
+    started = time.perf_counter()
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return {"error": "Malformed JSON payload"}, 400
+    service_metrics.observe_stage("/predict", "parse", time.perf_counter() - started)
+    try:
+        return service_test.score_record(data), 200
+    except (ValueError, TypeError, KeyError) as e:
+        return service_test.error_payload(e), 400
+
+
+def predict_batch_body(body, mimetype):
+    """Decode and score a /predict_batch body; runs in the executor."""
+    try:
+        started = time.perf_counter()
+        records = service_test.parse_batch_body(body, mimetype)
+        service_metrics.observe_stage(
+            "/predict_batch", "parse", time.perf_counter() - started
+        )
+        return service_test.score_batch(records)
+    except (ValueError, TypeError, KeyError) as e:
+        return service_test.error_payload(e), 400
+
+
+def predict_bulk_body(body, mimetype):
+    """Decode, score and encode a /predict_bulk body; runs in the executor."""
+    try:
+        started = time.perf_counter()
+        table = service_test.read_bulk_body(body, mimetype)
+        parsed = time.perf_counter()
+        service_metrics.observe_stage("/predict_bulk", "parse", parsed - started)
+        result, status = service_test.score_bulk(table)
+        if status != 200:
+            return result, status
+
+        scored = time.perf_counter()
+        response = Response(
+            service_test.write_bulk_body(result, mimetype),
+            headers={"Content-Type": mimetype},
+        )
+        service_metrics.observe_stage(
+            "/predict_bulk", "serialize", time.perf_counter() - scored
+        )
+        return service_test.with_model_version(
+            response, service_test.bulk_model_version(result)
+        )
+    except (ValueError, TypeError, KeyError) as e:
+        return service_test.error_payload(e), 400
+
+
+def explain_body(body):
+    """Decode and explain a /explain body; runs in the executor."""
+    started = time.perf_counter()
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return {"error": "Malformed JSON payload"}, 400
+    service_metrics.observe_stage("/explain", "parse", time.perf_counter() - started)
+    try:
+        return service_test.explain_record(data), 200
+    except (ValueError, TypeError, KeyError) as e:
+        return service_test.error_payload(e), 400
+
+
+def explain_batch_body(body, mimetype):
+    """Decode and explain a /explain_batch body; runs in the executor."""
+    try:
+        started = time.perf_counter()
+        records = service_test.parse_batch_body(body, mimetype)
+        service_metrics.observe_stage(
+            "/explain_batch", "parse", time.perf_counter() - started
+        )
+        return service_test.explain_batch(records)
+    except (ValueError, TypeError, KeyError) as e:
+        return service_test.error_payload(e), 400
+
+
+async def run_bounded(endpoint, request, started, fn, *args):
+    """
+    Read the request body and run fn(body, *args) in the scoring executor,
+    or shed load if too many requests are already in flight.
+
+    The in-flight check comes before the body is read, so rejected requests
+    are never buffered and the limit bounds memory as well as work.
+
+    fn returns either a (payload, status) pair, sent as JSON, or a finished
+    Response.
+    """
+    global in_flight
+    if in_flight >= ASGI_MAX_IN_FLIGHT:
+        response = JSONResponse(
+            {"error": "Server busy, retry later"},
+            status_code=503,
+            headers={"Retry-After": "1"},
+        )
+    else:
+        in_flight += 1
+        try:
+            body = await request.body()
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(executor, fn, body, *args)
+            if isinstance(result, Response):
+                response = result
+            else:
+                response = json_response(endpoint, *result)
+        finally:
+            in_flight -= 1
+
+    service_metrics.observe_request(
+        endpoint, response.status_code, time.perf_counter() - started
+    )
+    return response
+
+
+async def index(request):
+    return HTMLResponse(INDEX_HTML)
+
+
+async def healthz_api(request):
+    return JSONResponse(service_test.health_payload())
+
+
+async def readyz_api(request):
+    return JSONResponse(
+        service_test.health_payload(),
+        status_code=200 if service_test.service_state["ready"] else 503,
+    )
+
+
+async def metrics_api(request):
+    body, content_type = service_metrics.render()
+    return Response(body, headers={"Content-Type": content_type})
+
+
+async def predict_api(request):
+    started = time.perf_counter()
+    if not service_test.is_json_mimetype(mimetype_of(request)):
+        service_metrics.observe_request("/predict", 400, time.perf_counter() - started)
+        return JSONResponse({"error": "Request must be JSON"}, status_code=400)
+    return await run_bounded("/predict", request, started, predict_body)
+
+
+async def predict_batch_api(request):
+    started = time.perf_counter()
+    return await run_bounded(
+        "/predict_batch", request, started, predict_batch_body, mimetype_of(request)
+    )
+
+
+async def predict_bulk_api(request):
+    started = time.perf_counter()
+    return await run_bounded(
+        "/predict_bulk", request, started, predict_bulk_body, mimetype_of(request)
+    )
+
+
+async def explain_api(request):
+    started = time.perf_counter()
+    if not service_test.is_json_mimetype(mimetype_of(request)):
+        service_metrics.observe_request("/explain", 400, time.perf_counter() - started)
+        return JSONResponse({"error": "Request must be JSON"}, status_code=400)
+    return await run_bounded("/explain", request, started, explain_body)
+
+
+async def explain_batch_api(request):
+    started = time.perf_counter()
+    return await run_bounded(
+        "/explain_batch", request, started, explain_batch_body, mimetype_of(request)
+    )
+
+
+app = Starlette(
+    routes=[
+        Route("/", index, methods=["GET"]),
+        Route("/healthz", healthz_api, methods=["GET"]),
+        Route("/readyz", readyz_api, methods=["GET"]),
+        Route("/metrics", metrics_api, methods=["GET"]),
+        Route("/predict", predict_api, methods=["POST"]),
+        Route("/predict_batch", predict_batch_api, methods=["POST"]),
+        Route("/predict_bulk", predict_bulk_api, methods=["POST"]),
+        Route("/explain", explain_api, methods=["POST"]),
+        Route("/explain_batch", explain_batch_api, methods=["POST"]),
+    ]
+)
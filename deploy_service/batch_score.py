@@ -0,0 +1,331 @@
+"""
+Offline batch scoring of CSV or Parquet files
+
+Streams the input in fixed-size chunks, scores them in a pool of worker
+processes that each load the model once, and writes the predictions to
+Parquet in input order. At most --max-pending chunks are in flight, so
+memory stays bounded whatever the size of the input.
+
+Usage:
+    python batch_score.py extract.parquet scored.parquet \\
+        --chunk-size 100000 --workers 4 --keep-columns patient_id
+"""
+
+import argparse
+import functools
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import mlflow
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from model_bundle import DEFAULT_THRESHOLD
+from model_cache import ModelCache
+from predict_function import CATEGORICAL_LEVELS, FEATURE_COLUMNS, xgb_model
+from request_schema import RequestSchema, format_errors
+
+logger = logging.getLogger(__name__)
+
+# Predictor loaded once per worker process by _init_worker
+_worker_predictor = None
+_worker_schema = None
+
+
+def read_chunks(path, chunk_size, columns=None):
+    """
+    Stream a CSV or Parquet file as tables of at most chunk_size rows.
+
+    Args:
+        path: Input file; ".csv" (optionally compressed) or Parquet
+        chunk_size: Rows per yielded table
+        columns: Columns to read (None reads all)
+
+    Yields:
+        pyarrow.Table: Consecutive slices of the input
+    """
+    if ".csv" in os.path.basename(path):
+        # Fix the feature types up front; per-block inference can disagree
+        # between blocks, e.g. for a block where a column is all null
+        column_types = {
+            col: pa.string() if col in CATEGORICAL_LEVELS else pa.float64()
+            for col in FEATURE_COLUMNS
+        }
+        reader = pa_csv.open_csv(
+            path,
+            convert_options=pa_csv.ConvertOptions(
+                column_types=column_types,
+                include_columns=columns,
+                strings_can_be_null=True,
+            ),
+        )
+        batches = iter(reader)
+    else:
+        batches = pq.ParquetFile(path).iter_batches(
+            batch_size=chunk_size, columns=columns
+        )
+
+    # Re-slice reader batches into chunks of exactly chunk_size rows
+    pending, n_pending = [], 0
+    for batch in batches:
+        pending.append(batch)
+        n_pending += batch.num_rows
+        while n_pending >= chunk_size:
+            table = pa.Table.from_batches(pending)
+            yield table.slice(0, chunk_size)
+            rest = table.slice(chunk_size)
+            pending, n_pending = rest.to_batches(), rest.num_rows
+    if n_pending:
+        yield pa.Table.from_batches(pending)
+
+
+def count_rows(path):
+    """Row count from Parquet metadata, or None where it is not cheap to get."""
+    if ".csv" in os.path.basename(path):
+        return None
+    return pq.ParquetFile(path).metadata.num_rows
+
+
+def _init_worker(load_predictor):
+    global _worker_predictor, _worker_schema
+    _worker_predictor = load_predictor()
+    _worker_schema = RequestSchema()
+
+
+def _to_ipc(table) -> bytes:
+    # Pickling a sliced table would copy the whole parent buffers; the IPC
+    # writer only serializes the rows in the slice
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _score_ipc_chunk(payload):
+    return _score_chunk(pa.ipc.open_stream(pa.py_buffer(payload)).read_all())
+
+
+def _score_chunk(table):
+    """
+    Score one chunk with the worker's predictor.
+
+    Returns:
+        tuple: (probabilities, valid mask, per-row error messages or None,
+        the predictor's decision threshold)
+    """
+    feature_names = getattr(
+        getattr(_worker_predictor, "encoder", None), "feature_names", None
+    )
+    encoded, errors = _worker_schema.decode_table(table, feature_names)
+
+    valid = np.ones(table.num_rows, dtype=bool)
+    valid[list(errors)] = False
+    probabilities = np.zeros(table.num_rows, dtype=np.float32)
+    if valid.any():
+        probabilities[valid] = _worker_predictor.predict_encoded(
+            encoded[valid] if errors else encoded
+        )
+
+    messages = None
+    if errors:
+        messages = [None] * table.num_rows
+        for i, row_errors in errors.items():
+            messages[i] = format_errors(row_errors)
+    # The bundle's tuned threshold, as online serving applies it
+    threshold = getattr(_worker_predictor, "threshold", DEFAULT_THRESHOLD)
+    return probabilities, valid, messages, threshold
+
+
+def result_table(chunk, scored, keep_columns):
+    """Output rows for one chunk: kept input columns plus the predictions."""
+    probabilities, valid, messages, threshold = scored
+    columns = {col: chunk.column(col) for col in keep_columns}
+    columns["prediction"] = pa.array(
+        (probabilities > threshold).astype(np.int8), mask=~valid
+    )
+    columns["predict_proba"] = pa.array(probabilities, mask=~valid)
+    columns["error"] = (
+        pa.array(messages, type=pa.string())
+        if messages is not None
+        else pa.nulls(chunk.num_rows, type=pa.string())
+    )
+    return pa.table(columns)
+
+
+def score_file(
+    input_path,
+    output_path,
+    load_predictor,
+    chunk_size=100000,
+    workers=0,
+    max_pending=None,
+    keep_columns=None,
+    progress_every=10.0,
+):
+    """
+    Score a CSV or Parquet file into a Parquet file.
+
+    Args:
+        input_path: CSV or Parquet file with one column per feature
+        output_path: Parquet file written with the predictions
+        load_predictor: Picklable callable returning a predictor with
+            predict_encoded, and the threshold its predictions use (else
+            DEFAULT_THRESHOLD); called once per worker
+        chunk_size: Rows scored per task
+        workers: Worker processes (0 scores in this process)
+        max_pending: Chunks read ahead of the writer (defaults to 2 per worker)
+        keep_columns: Input columns copied to the output (None keeps all)
+        progress_every: Seconds between progress log lines
+
+    Returns:
+        dict: Rows scored, invalid rows, elapsed seconds and rows per second
+    """
+    if max_pending is None:
+        max_pending = max(2, 2 * workers)
+    columns = None
+    if keep_columns is not None:
+        columns = list(dict.fromkeys(FEATURE_COLUMNS + list(keep_columns)))
+
+    total_rows = count_rows(input_path)
+    chunks = read_chunks(input_path, chunk_size, columns)
+
+    if workers > 0:
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            # Fresh interpreters rather than forks, so no OpenMP or MLflow
+            # state is inherited from this process
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(load_predictor,),
+        )
+        submit = functools.partial(executor.submit, _score_ipc_chunk)
+    else:
+        executor = None
+        _init_worker(load_predictor)
+
+    started = time.perf_counter()
+    last_report = started
+    rows_done = 0
+    invalid_rows = 0
+    writer = None
+    in_flight = deque()
+
+    def write_next():
+        nonlocal writer, rows_done, invalid_rows, last_report
+        chunk, scored = in_flight.popleft()
+        if executor is not None:
+            scored = scored.result()
+        kept = chunk.column_names if keep_columns is None else keep_columns
+        table = result_table(chunk, scored, kept)
+        if writer is None:
+            writer = pq.ParquetWriter(output_path, table.schema)
+        writer.write_table(table)
+        rows_done += table.num_rows
+        invalid_rows += int((~scored[1]).sum())
+
+        now = time.perf_counter()
+        if now - last_report >= progress_every:
+            last_report = now
+            done = f"{rows_done}" + (f"/{total_rows}" if total_rows else "")
+            logger.info(f"Scored {done} rows, {rows_done / (now - started):.0f} rows/s")
+
+    try:
+        for chunk in chunks:
+            if executor is not None:
+                in_flight.append((chunk, submit(_to_ipc(chunk))))
+            else:
+                in_flight.append((chunk, _score_chunk(chunk)))
+            # Results are written strictly in input order; waiting on the
+            # oldest chunk also caps how far reading runs ahead
+            if len(in_flight) >= max_pending:
+                write_next()
+        while in_flight:
+            write_next()
+    finally:
+        if writer is not None:
+            writer.close()
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    elapsed = time.perf_counter() - started
+    summary = {
+        "rows": rows_done,
+        "invalid_rows": invalid_rows,
+        "seconds": round(elapsed, 3),
+        "rows_per_s": round(rows_done / elapsed) if elapsed > 0 else None,
+    }
+    logger.info(f"Batch scoring finished: {summary}")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("input", help="CSV or Parquet file to score")
+    parser.add_argument("output", help="Parquet file to write")
+    parser.add_argument("--model-name", default="mlops_project")
+    parser.add_argument("--alias", default="champion")
+    parser.add_argument("--chunk-size", type=int, default=100000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--max-pending", type=int, default=None)
+    parser.add_argument(
+        "--keep-columns",
+        nargs="*",
+        default=None,
+        help="Input columns copied to the output (default: all)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=os.getenv("MODEL_CACHE_DIR"),
+        help="Model artifact cache shared by the workers",
+    )
+    parser.add_argument("--progress-every", type=float, default=10.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(message)s", stream=sys.stderr
+    )
+    mlflow.set_tracking_uri(os.getenv("MLFLOW_TRACKING_URI", "http://localhost:5000"))
+
+    with tempfile.TemporaryDirectory() as scratch_cache:
+        # Download once here; workers then load the same version from the
+        # cache without contacting MLflow
+        cache_dir = args.cache_dir or scratch_cache
+        version, _ = ModelCache(cache_dir).fetch(args.model_name, args.alias)
+        logger.info(f"Scoring with {args.model_name} version {version}")
+
+        load_predictor = functools.partial(
+            xgb_model,
+            args.model_name,
+            args.alias,
+            engine="booster",
+            nthread=1,
+            cache_dir=cache_dir,
+            offline=True,
+        )
+        summary = score_file(
+            args.input,
+            args.output,
+            load_predictor,
+            chunk_size=args.chunk_size,
+            workers=args.workers,
+            max_pending=args.max_pending,
+            keep_columns=args.keep_columns,
+            progress_every=args.progress_every,
+        )
+
+    summary["model_version"] = version
+    print(json.dumps(summary))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent single-record predictions into one vectorized call.
+
+    Request threads enqueue their record and block on a future. A worker
+    thread takes the first waiting record, keeps collecting until either
+    max_batch_size records are queued or max_delay seconds have passed, and
+    scores the whole batch with a single predictor.predict call. This only
+    helps when requests are served concurrently, e.g. gunicorn with
+    --threads or the ASGI app.
+
+    A batch that fails outside the model call fails its own requests only;
+    the worker carries on with the next one. Callers wait at most timeout
+    seconds for their result.
+    """
+
+    def __init__(self, get_predictor, max_batch_size=32, max_delay=0.002, timeout=5.0):
+        """
+        Args:
+            get_predictor: Callable returning the predictor to score with, read
+                once per batch so hot-swapped models are picked up
+            max_batch_size: Most records scored in one call
+            max_delay: Longest a record waits for others to join its batch
+            timeout: Longest a caller waits for its result
+        """
+        self.get_predictor = get_predictor
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._run, name="micro-batcher", daemon=True
+        )
+        self._thread.start()
+
+    def predict(self, record: dict) -> dict:
+        """
+        Score one record as part of the next batch.
+
+        Args:
+            record: A patient record dict
+
+        Returns:
+            dict: "prediction" and "predict_proba" arrays of length one, the
+                "model_version" and stage "timings" of the batch, and the
+                "batch_size" the record was scored in
+
+        Raises:
+            concurrent.futures.TimeoutError: No result within timeout seconds
+        """
+        future = Future()
+        self._queue.put((record, future))
+        try:
+            return future.result(timeout=self.timeout)
+        finally:
+            # A record given up on before its batch started is skipped; once
+            # done or being scored this does nothing
+            future.cancel()
+
+    def stop(self, timeout=None) -> None:
+        """Stop the worker thread once queued records are scored."""
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            batch = [item]
+            stopping = False
+            try:
+                stopping = self._collect(batch)
+                self._score(batch)
+            except Exception as e:
+                # Letting this end the thread would leave every later request
+                # waiting; fail the batch's own requests instead
+                logger.error(f"Micro-batch of {len(batch)} failed: {e}")
+                for _, future in batch:
+                    try:
+                        future.set_exception(e)
+                    except InvalidStateError:
+                        # Already answered, or cancelled by a timed-out caller
+                        pass
+            if stopping:
+                return
+
+    def _collect(self, batch) -> bool:
+        """
+        Add queued records to batch until it is full or max_delay is up.
+
+        Returns:
+            bool: True if stop() was called while collecting
+        """
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                return False
+            if item is None:
+                return True
+            batch.append(item)
+        return False
+
+    def _score(self, batch) -> None:
+        # Drop records whose callers timed out before the batch started
+        batch[:] = [
+            (record, future)
+            for record, future in batch
+            if future.set_running_or_notify_cancel()
+        ]
+        if not batch:
+            return
+
+        predictor = self.get_predictor()
+        try:
+            predicted = predictor.predict([record for record, _ in batch])
+        except Exception:
+            # Score records one by one so a single bad record only fails its
+            # own request
+            for record, future in batch:
+                try:
+                    future.set_result(predictor.predict(record))
+                except Exception as e:
+                    future.set_exception(e)
+            return
+
+        predictions = np.asarray(predicted["prediction"])
+        probabilities = np.asarray(predicted["predict_proba"])
+        model_version = predicted.get("model_version")
+        timings = predicted.get("timings")
+        for i, (_, future) in enumerate(batch):
+            future.set_result(
+                {
+                    "prediction": predictions[i : i + 1],
+                    "predict_proba": probabilities[i : i + 1],
+                    "model_version": model_version,
+                    "timings": timings,
+                    "batch_size": len(batch),
+                }
+            )
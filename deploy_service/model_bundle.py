@@ -0,0 +1,238 @@
+"""
+Serving bundles: a trained booster plus the feature spec it was trained with
+
+A bundle is a directory holding
+
+    booster.ubj    the booster in XGBoost's UBJSON model format
+    bundle.json    format version, model name and registry version, feature
+                   column order, the category levels of each categorical
+                   and the decision threshold
+
+and is everything the "booster" engine needs to score. Loading one needs
+xgboost only, and no pickled sklearn wrapper. Version 1 bundles, which have no
+threshold, load with DEFAULT_THRESHOLD.
+
+Training logs a bundle next to each model (the "bundle" artifact of the
+run, see ml_function.log_model_bundle). The export command, run when a
+version is promoted or at container start, writes the bundle of the
+version an alias points to, taking the logged bundle when there is one
+and unpickling the model otherwise:
+
+    python model_bundle.py export --model-name mlops_project --alias champion \\
+        --output /app/bundle
+
+The service serves a bundle when MODEL_BUNDLE_DIR points at one.
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+
+import xgboost as xgb
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_FORMAT_VERSION = 2
+SUPPORTED_FORMAT_VERSIONS = (1, 2)
+BOOSTER_FILE = "booster.ubj"
+SPEC_FILE = "bundle.json"
+BUNDLE_ARTIFACT_PATH = "bundle"
+DEFAULT_THRESHOLD = 0.5
+
+
+def export_bundle(
+    model,
+    directory,
+    categorical_levels,
+    model_name=None,
+    model_version=None,
+    threshold=DEFAULT_THRESHOLD,
+) -> str:
+    """
+    Write the serving bundle of a trained model.
+
+    The bundle is written next to its destination and renamed into place,
+    so a reader never sees a partial bundle.
+
+    Args:
+        model: Trained XGBClassifier, or its Booster
+        directory: Bundle directory to create (replaced if it exists)
+        categorical_levels: Levels per categorical column, as preprocess_pd
+            encodes them
+        model_name: Registered model name recorded in the bundle
+        model_version: Registry version recorded in the bundle
+        threshold: Probability above which a record is predicted positive
+
+    Returns:
+        str: The bundle directory
+    """
+    booster = model.get_booster() if hasattr(model, "get_booster") else model
+    feature_names = getattr(model, "feature_names_in_", None)
+    if feature_names is None:
+        feature_names = booster.feature_names
+    if feature_names is None:
+        raise ValueError("Model has no feature names to record in the bundle")
+    feature_names = [str(name) for name in feature_names]
+
+    spec = {
+        "format_version": BUNDLE_FORMAT_VERSION,
+        "model_name": model_name,
+        "model_version": None if model_version is None else str(model_version),
+        "feature_names": feature_names,
+        "categorical_levels": {
+            col: list(levels)
+            for col, levels in categorical_levels.items()
+            if col in feature_names
+        },
+        "threshold": float(threshold),
+        "xgboost_version": xgb.__version__,
+    }
+
+    directory = os.path.abspath(directory)
+    parent = os.path.dirname(directory)
+    os.makedirs(parent, exist_ok=True)
+    staging_dir = tempfile.mkdtemp(prefix=".bundle-", dir=parent)
+    try:
+        booster.save_model(os.path.join(staging_dir, BOOSTER_FILE))
+        with open(os.path.join(staging_dir, SPEC_FILE), "w") as f:
+            json.dump(spec, f, indent=2)
+        if os.path.isdir(directory):
+            shutil.rmtree(directory)
+        os.rename(staging_dir, directory)
+    except BaseException:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+
+    logger.info(f"Exported bundle of {model_name} version {model_version}")
+    return directory
+
+
+def read_bundle(directory):
+    """
+    Load a bundle's booster and feature spec.
+
+    Args:
+        directory: Bundle directory written by export_bundle
+
+    Returns:
+        tuple: (xgboost.Booster, spec dict)
+    """
+    with open(os.path.join(directory, SPEC_FILE)) as f:
+        spec = json.load(f)
+    if spec.get("format_version") not in SUPPORTED_FORMAT_VERSIONS:
+        raise ValueError(
+            f"Unsupported bundle format {spec.get('format_version')} in "
+            f"{directory}, expected one of {SUPPORTED_FORMAT_VERSIONS}"
+        )
+    spec.setdefault("threshold", DEFAULT_THRESHOLD)
+
+    booster = load_booster(os.path.join(directory, BOOSTER_FILE))
+    return booster, spec
+
+
+def load_booster(path) -> xgb.Booster:
+    """
+    Load a booster file by path.
+
+    XGBoost reads the file itself and parses it straight into its trees.
+    Handing it a memory-mapped or pre-read buffer instead measured no
+    faster (benchmarks/bench_bundle_load.py), since the parse dominates.
+
+    Args:
+        path: Booster saved by Booster.save_model
+
+    Returns:
+        xgboost.Booster: The loaded booster
+    """
+    return xgb.Booster(model_file=path)
+
+
+def export_registered_bundle(model_name, version, directory, scratch_dir) -> str:
+    """
+    Write the bundle of a registered model version.
+
+    Uses the bundle logged with the version's training run when there is
+    one, and unpickles the registered model to export it otherwise.
+
+    Args:
+        model_name: Registered model name
+        version: Registry version to export
+        directory: Bundle directory to create
+        scratch_dir: Directory for downloaded artifacts
+
+    Returns:
+        str: "logged_bundle" or "pickled_model", the source of the booster
+    """
+    import mlflow.artifacts
+    from mlflow.tracking import MlflowClient
+    from predict_function import CATEGORICAL_LEVELS
+
+    client = MlflowClient()
+    run_id = client.get_model_version(model_name, version).run_id
+    if run_id and client.list_artifacts(run_id, BUNDLE_ARTIFACT_PATH):
+        logged_dir = mlflow.artifacts.download_artifacts(
+            run_id=run_id, artifact_path=BUNDLE_ARTIFACT_PATH, dst_path=scratch_dir
+        )
+        booster, spec = read_bundle(logged_dir)
+        export_bundle(
+            booster,
+            directory,
+            spec["categorical_levels"],
+            model_name=model_name,
+            model_version=version,
+            threshold=spec["threshold"],
+        )
+        return "logged_bundle"
+
+    import mlflow.sklearn
+
+    model = mlflow.sklearn.load_model(f"models:/{model_name}/{version}")
+    export_bundle(
+        model,
+        directory,
+        CATEGORICAL_LEVELS,
+        model_name=model_name,
+        model_version=version,
+    )
+    return "pickled_model"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export = subparsers.add_parser(
+        "export", help="Write the bundle of a registered model version"
+    )
+    export.add_argument("--model-name", default="mlops_project")
+    export.add_argument("--alias", default="champion")
+    export.add_argument("--output", required=True, help="Bundle directory")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(message)s", stream=sys.stderr
+    )
+
+    import mlflow
+    from model_cache import resolve_model_version
+
+    mlflow.set_tracking_uri(os.getenv("MLFLOW_TRACKING_URI", "http://localhost:5000"))
+    version = resolve_model_version(args.model_name, args.alias)
+    with tempfile.TemporaryDirectory() as scratch:
+        source = export_registered_bundle(
+            args.model_name, version, args.output, scratch
+        )
+    print(
+        json.dumps(
+            {"model_name": args.model_name, "model_version": version, "source": source}
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+ARTIFACTS_DIR = "artifacts"
+
+
+def resolve_model_version(model_name: str, alias: str) -> str:
+    """Look up the model version an alias points to in the registry."""
+    from mlflow.tracking import MlflowClient
+
+    model_version = MlflowClient().get_model_version_by_alias(model_name, alias)
+    return str(model_version.version)
+
+
+def file_sha256(path: str) -> str:
+    """SHA-256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_manifest(artifact_dir: str) -> dict:
+    """
+    Hash every file under an artifact directory.
+
+    Args:
+        artifact_dir: Directory holding the downloaded model artifacts
+
+    Returns:
+        dict: Per-file digests and an overall digest over all of them
+    """
+    files = {}
+    for root, _, names in os.walk(artifact_dir):
+        for name in names:
+            path = os.path.join(root, name)
+            rel_path = os.path.relpath(path, artifact_dir).replace(os.sep, "/")
+            files[rel_path] = file_sha256(path)
+
+    overall = hashlib.sha256()
+    for rel_path in sorted(files):
+        overall.update(f"{rel_path}\0{files[rel_path]}\n".encode())
+    return {"digest": overall.hexdigest(), "files": files}
+
+
+class ModelCache:
+    """
+    Local on-disk cache of registered model artifacts.
+
+    Entries are keyed by model version and artifact digest:
+
+        <cache_dir>/<model_name>/<version>/<digest>/manifest.json
+        <cache_dir>/<model_name>/<version>/<digest>/artifacts/...
+        <cache_dir>/<model_name>/aliases/<alias>.json
+
+    The alias file records the version and digest an alias last resolved to,
+    so a warm cache can be loaded without contacting the MLflow server.
+    Entries are written to a temporary directory and renamed into place, so
+    several gunicorn workers can share one cache directory.
+    """
+
+    def __init__(self, cache_dir: str):
+        """
+        Args:
+            cache_dir: Root directory of the cache
+        """
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def fetch(self, model_name: str, alias: str, offline: bool = False):
+        """
+        Resolve an alias and return a verified local copy of its artifacts.
+
+        Args:
+            model_name: Name of the registered model in MLflow
+            alias: Version alias (e.g., "champion")
+            offline: Use only the cached alias pointer, never the registry
+
+        Returns:
+            tuple: (model version, local artifact directory)
+        """
+        cached = self._read_alias(model_name, alias)
+
+        if offline:
+            if cached is None:
+                raise LookupError(
+                    f"No cached model for {model_name}@{alias} in offline mode"
+                )
+            version = cached["version"]
+        else:
+            try:
+                version = self.resolve_alias(model_name, alias)
+            except Exception as e:
+                if cached is None:
+                    raise
+                logger.warning(
+                    f"Could not resolve {model_name}@{alias} from the registry "
+                    f"({str(e)}), using cached version {cached['version']}"
+                )
+                version = cached["version"]
+
+        entry_dir = self._find_entry(model_name, version)
+        if entry_dir is None:
+            if offline:
+                raise LookupError(
+                    f"Cached model {model_name} version {version} failed verification"
+                )
+            entry_dir = self._download(model_name, version)
+
+        digest = os.path.basename(entry_dir)
+        self._write_alias(model_name, alias, {"version": version, "digest": digest})
+        return version, os.path.join(entry_dir, ARTIFACTS_DIR)
+
+    def resolve_alias(self, model_name: str, alias: str) -> str:
+        """Look up the model version an alias points to in the registry."""
+        return resolve_model_version(model_name, alias)
+
+    def _find_entry(self, model_name: str, version: str):
+        """Return a cached entry for a version that passes verification."""
+        version_dir = os.path.join(self.cache_dir, model_name, version)
+        if not os.path.isdir(version_dir):
+            return None
+
+        for digest in sorted(os.listdir(version_dir)):
+            if digest.startswith("."):
+                # In-progress download staging directory
+                continue
+            entry_dir = os.path.join(version_dir, digest)
+            if self._verify(entry_dir, digest):
+                return entry_dir
+            logger.warning(f"Discarding corrupt cache entry {entry_dir}")
+            shutil.rmtree(entry_dir, ignore_errors=True)
+        return None
+
+    def _verify(self, entry_dir: str, digest: str) -> bool:
+        """Check the artifacts on disk still match the recorded manifest."""
+        try:
+            with open(os.path.join(entry_dir, MANIFEST_FILE)) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        actual = build_manifest(os.path.join(entry_dir, ARTIFACTS_DIR))
+        return manifest["digest"] == digest and actual == manifest
+
+    def _download(self, model_name: str, version: str) -> str:
+        """Download a model version and move it into the cache atomically."""
+        import mlflow.artifacts
+
+        model_uri = f"models:/{model_name}/{version}"
+        logger.info(f"Model cache miss, downloading {model_uri}")
+
+        version_dir = os.path.join(self.cache_dir, model_name, version)
+        os.makedirs(version_dir, exist_ok=True)
+        staging_dir = tempfile.mkdtemp(prefix=".download-", dir=version_dir)
+        try:
+            mlflow.artifacts.download_artifacts(
+                artifact_uri=model_uri,
+                dst_path=os.path.join(staging_dir, ARTIFACTS_DIR),
+            )
+            manifest = build_manifest(os.path.join(staging_dir, ARTIFACTS_DIR))
+            with open(os.path.join(staging_dir, MANIFEST_FILE), "w") as f:
+                json.dump(manifest, f, indent=2)
+
+            entry_dir = os.path.join(version_dir, manifest["digest"])
+            try:
+                os.rename(staging_dir, entry_dir)
+            except OSError:
+                # Another worker already cached the same artifacts
+                if not self._verify(entry_dir, manifest["digest"]):
+                    raise
+            return entry_dir
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+    def _alias_path(self, model_name: str, alias: str) -> str:
+        return os.path.join(self.cache_dir, model_name, "aliases", f"{alias}.json")
+
+    def _read_alias(self, model_name: str, alias: str):
+        try:
+            with open(self._alias_path(model_name, alias)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_alias(self, model_name: str, alias: str, pointer: dict) -> None:
+        path = self._alias_path(model_name, alias)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(pointer, f)
+        os.replace(tmp_path, path)
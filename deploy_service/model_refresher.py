@@ -0,0 +1,88 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRefresher:
+    """
+    Poll a model alias in the background and hot-swap new versions.
+
+    A new version is loaded on the refresher thread, off the request path,
+    and handed to on_swap, which warms and installs it (see
+    warmup.warm_predictor). Requests that already hold a reference to the
+    old predictor finish on it.
+    """
+
+    def __init__(
+        self,
+        load_predictor,
+        resolve_version,
+        on_swap,
+        current_version=None,
+        interval=60.0,
+    ):
+        """
+        Args:
+            load_predictor: Callable returning a freshly loaded predictor
+            resolve_version: Callable returning the version the alias points to
+            on_swap: Callable that warms and installs a new predictor
+            current_version: Version currently being served
+            interval: Seconds between alias polls
+        """
+        self.load_predictor = load_predictor
+        self.resolve_version = resolve_version
+        self.on_swap = on_swap
+        self.current_version = current_version
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def check_once(self) -> bool:
+        """
+        Swap in a new model if the alias has moved.
+
+        Returns:
+            bool: True if a new predictor was installed
+        """
+        try:
+            version = self.resolve_version()
+            if version == self.current_version:
+                return False
+
+            logger.info(
+                f"Alias moved from version {self.current_version} to {version}, "
+                f"loading new model"
+            )
+            new_predictor = self.load_predictor()
+            # If warming or installing fails, the current model keeps serving
+            # and the next poll retries
+            self.on_swap(new_predictor)
+        except Exception as e:
+            logger.error(f"Model refresh failed, keeping current model: {str(e)}")
+            return False
+
+        self.current_version = getattr(new_predictor, "registry_version", version)
+        logger.info(f"Now serving model version {self.current_version}")
+        return True
+
+    def start(self) -> None:
+        """Start polling on a daemon thread."""
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="model-refresher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout=None) -> None:
+        """Stop polling and wait for the thread to exit."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            self.check_once()
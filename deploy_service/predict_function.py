@@ -1,27 +1,44 @@
 import logging
+import time
 
-import mlflow
-import mlflow.sklearn
-import mlflow.xgboost
 import numpy as np
 import pandas as pd
+from explainer import ContributionExplainer
+from model_bundle import DEFAULT_THRESHOLD, read_bundle
+from model_cache import ModelCache, resolve_model_version
+from prediction_table import PredictionTable
 
 logger = logging.getLogger(__name__)
 
+CATEGORICAL_LEVELS = {
+    "race": ["chinese", "malay", "indian"],
+    "gender": ["male", "female"],
+    "mother_occupation": ["professional", "non-professional"],
+    "household_income": ["<4000", ">=4000"],
+    "mother_edu": ["no education", "primary/secondary", "university"],
+    "delivery_type": ["normal", "not normal"],
+    "smoke_mother": ["No", "Yes"],
+    "night_bottle_feeding": ["No", "Yes"],
+}
+
+# Column order the model was trained with
+FEATURE_COLUMNS = [
+    "race",
+    "age",
+    "gender",
+    "breast_feeding_month",
+    "mother_occupation",
+    "household_income",
+    "mother_edu",
+    "delivery_type",
+    "smoke_mother",
+    "night_bottle_feeding",
+]
+
 
 def preprocess_pd(dat):
-    categorical_levels = {
-        "race": ["chinese", "malay", "indian"],
-        "gender": ["male", "female"],
-        "mother_occupation": ["professional", "non-professional"],
-        "household_income": ["<4000", ">=4000"],
-        "mother_edu": ["no education", "primary/secondary", "university"],
-        "delivery_type": ["normal", "not normal"],
-        "smoke_mother": ["No", "Yes"],
-        "night_bottle_feeding": ["No", "Yes"],
-    }
     # Convert categorical columns with predefined levels
-    for col, categories in categorical_levels.items():
+    for col, categories in CATEGORICAL_LEVELS.items():
         if col in dat.columns:
             # Create categorical with specific categories to match training data
             dat[col] = pd.Categorical(dat[col], categories=categories)
@@ -38,73 +55,436 @@ def preprocess_pd(dat):
     return dat
 
 
+class FeatureEncoder:
+    """
+    Encode patient records straight into the numeric matrix the model expects.
+
+    Categorical columns become their category codes (as pd.Categorical would
+    produce in preprocess_pd) and numeric columns are passed through, so no
+    DataFrame is built on the request path. Unknown categories and missing
+    numeric values are encoded as NaN, which XGBoost treats as missing.
+    """
+
+    def __init__(self, feature_names=None, categorical_levels=None):
+        """
+        Precompile the lookup tables for each feature column.
+
+        Args:
+            feature_names: Column order expected by the model
+            categorical_levels: Mapping of categorical column to its levels
+        """
+        if feature_names is None:
+            feature_names = FEATURE_COLUMNS
+        if categorical_levels is None:
+            categorical_levels = CATEGORICAL_LEVELS
+        self.feature_names = list(feature_names)
+
+        # (column, {level: code}) for categoricals, (column, None) for numerics
+        self._columns = []
+        for col in self.feature_names:
+            levels = categorical_levels.get(col)
+            codes = None
+            if levels is not None:
+                codes = {level: float(code) for code, level in enumerate(levels)}
+            self._columns.append((col, codes))
+
+    @property
+    def n_features(self) -> int:
+        return len(self.feature_names)
+
+    def encode(self, records) -> np.ndarray:
+        """
+        Encode one record or a list of records.
+
+        Args:
+            records: A patient record dict, or a list of them
+
+        Returns:
+            np.ndarray: C-contiguous float32 array of shape (n_records, n_features)
+        """
+        if isinstance(records, dict):
+            records = [records]
+
+        encoded = np.empty((len(records), self.n_features), dtype=np.float32)
+        for j, (col, codes) in enumerate(self._columns):
+            try:
+                values = [record[col] for record in records]
+            except KeyError:
+                raise ValueError(f"Missing required field '{col}'")
+
+            if codes is None:
+                try:
+                    encoded[:, j] = [np.nan if v is None else v for v in values]
+                except (TypeError, ValueError):
+                    raise ValueError(f"Invalid numeric value for '{col}'")
+            else:
+                encoded[:, j] = [codes.get(v, np.nan) for v in values]
+                if np.isnan(encoded[:, j]).any():
+                    unknown_vals = [v for v in values if v not in codes]
+                    logger.warning(
+                        f"Unknown categories in column '{col}': {unknown_vals}"
+                    )
+
+        return encoded
+
+
+SERVING_ENGINES = ("sklearn", "booster")
+
+
+def best_iteration_range(booster) -> tuple:
+    """
+    Boosting rounds XGBClassifier.predict_proba scores with.
+
+    A model trained with early stopping and not truncated keeps the rounds
+    after its best one; the sklearn wrapper stops at best_iteration, while
+    the Booster methods use every tree unless given this range.
+    """
+    best_iteration = booster.attr("best_iteration")
+    if best_iteration is None:
+        return (0, 0)
+    return (0, int(best_iteration) + 1)
+
+
 class xgb_model:
     """
     A class to load XGBoost models from MLflow and make predictions.
+
+    Two serving engines are available: "sklearn" scores through
+    XGBClassifier.predict_proba, "booster" scores through the underlying
+    Booster's inplace_predict with a fixed thread count, skipping the
+    per-call DMatrix construction and dtype validation of the wrapper.
+
+    With bundle_dir the booster is read from an exported bundle (see
+    model_bundle.py) instead of the MLflow registry, mlflow is never
+    imported and records are predicted positive above the bundle's
+    threshold rather than DEFAULT_THRESHOLD.
     """
 
-    def __init__(self, model_name, model_version):
+    def __init__(
+        self,
+        model_name,
+        model_version,
+        engine="sklearn",
+        nthread=1,
+        cache_dir=None,
+        offline=False,
+        lookup_table=False,
+        table_ranges=None,
+        bundle_dir=None,
+        explain_cache_size=10000,
+    ):
         """
         Initialize the MLflow XGBoost predictor.
 
         Args:
             model_name: Name of the registered model in MLflow
             model_version: Version alias (e.g., "champion")
+            engine: Serving engine, "sklearn" or "booster"
+            nthread: Thread count used by the "booster" engine
+            cache_dir: Local model artifact cache directory (None disables it)
+            offline: Load from the cache only, without contacting MLflow
+            lookup_table: Precompute predictions over the bounded feature grid
+            table_ranges: Inclusive integer range per numeric feature for the
+                lookup table (defaults to DEFAULT_NUMERIC_RANGES)
+            bundle_dir: Exported model bundle to serve instead of the registry
+                model; requires the "booster" engine
+            explain_cache_size: Records whose explanations are cached (0
+                disables the cache)
         """
+        if engine not in SERVING_ENGINES:
+            raise ValueError(
+                f"Unknown serving engine '{engine}', expected one of {SERVING_ENGINES}"
+            )
+        if bundle_dir is not None and engine != "booster":
+            raise ValueError("Model bundles are served by the 'booster' engine only")
+
         self.model = None
+        self.booster = None
+        self.encoder = None
+        self.table = None
+        self.explainer = None
+        self.iteration_range = (0, 0)
+        self.explain_cache_size = explain_cache_size
+        self.lookup_table = lookup_table
+        self.table_ranges = table_ranges
+        self.engine = engine
+        self.nthread = nthread
         self.model_name = model_name
         self.model_version = model_version
+        self.registry_version = None
+        self.threshold = DEFAULT_THRESHOLD
+        self.load_seconds = None
+        self.cache = ModelCache(cache_dir) if cache_dir else None
+        self.offline = offline
+        self.bundle_dir = bundle_dir
         self.is_loaded = False
 
         self.load_model(model_name, model_version)
 
     def load_model(self, model_name: str, model_version: str) -> None:
         """
-        Load XGBoost model from MLflow model registry.
+        Load XGBoost model from MLflow model registry, or from bundle_dir.
 
         Args:
             model_name: Name of the registered model in MLflow
             model_version: Version alias (e.g., "champion")
         """
+        started = time.perf_counter()
         try:
-            # Construct model URI
-            model_uri = f"models:/{model_name}@{model_version}"
+            if self.bundle_dir is not None:
+                self._load_bundle()
+                model_uri = self.bundle_dir
+            else:
+                if self.cache is not None:
+                    # Resolve the alias and load a verified local copy
+                    self.registry_version, model_uri = self.cache.fetch(
+                        model_name, model_version, offline=self.offline
+                    )
+                else:
+                    # Pin the version the alias points to now, so the loaded
+                    # model and the reported version always agree
+                    self.registry_version = resolve_model_version(
+                        model_name, model_version
+                    )
+                    model_uri = f"models:/{model_name}/{self.registry_version}"
 
-            # Load the model from MLflow
-            self.model = mlflow.sklearn.load_model(model_uri)
+                # Imported here so serving from a bundle never loads mlflow
+                import mlflow.sklearn
+
+                self.model = mlflow.sklearn.load_model(model_uri)
+                self.encoder = FeatureEncoder(
+                    getattr(self.model, "feature_names_in_", None)
+                )
+                if self.engine == "booster":
+                    self.booster = self.model.get_booster()
+            if self.booster is not None:
+                self.booster.set_param({"nthread": self.nthread})
+            booster = (
+                self.booster if self.booster is not None else self.model.get_booster()
+            )
+            self.iteration_range = best_iteration_range(booster)
+            # Built here rather than on the first /explain, which concurrent
+            # requests could each build; a swapped-in model is a new
+            # xgb_model and starts a fresh cache
+            self.explainer = ContributionExplainer(
+                booster,
+                nthread=self.nthread,
+                cache_size=self.explain_cache_size,
+                iteration_range=self.iteration_range,
+            )
+            if self.lookup_table:
+                self.table = self.build_table()
 
             self.model_name = model_name
             self.model_version = model_version
+            self.load_seconds = time.perf_counter() - started
             self.is_loaded = True
 
-            logger.info(f"Model loaded successfully from MLflow: {model_uri}")
+            logger.info(f"Model loaded successfully from {model_uri}")
 
         except Exception as e:
             logger.error(f"Failed to load model {model_name}@{model_version}: {str(e)}")
             raise
 
+    def _load_bundle(self) -> None:
+        """Read the booster and feature spec from the exported bundle."""
+        self.booster, spec = read_bundle(self.bundle_dir)
+        levels = spec["categorical_levels"]
+        # Requests are validated against CATEGORICAL_LEVELS; a bundle encoding
+        # categories differently would score them as other levels
+        mismatched = [
+            col
+            for col, col_levels in levels.items()
+            if col_levels != CATEGORICAL_LEVELS.get(col)
+        ]
+        if mismatched:
+            raise ValueError(f"Bundle category levels differ for {mismatched}")
+        self.encoder = FeatureEncoder(spec["feature_names"], levels)
+        self.registry_version = spec.get("model_version")
+        self.threshold = spec["threshold"]
+
     def predict(self, dat: pd.DataFrame) -> np.ndarray:
         """
         Make predictions using the loaded XGBoost model.
 
         Args:
-            dat: Input features as pandas DataFrame (will be modified in-place)
+            dat: Input features as pandas DataFrame (will be modified in-place),
+                or a record dict / list of record dicts for the encoded path
 
         Returns:
-            np.ndarray: Binary predictions (True/False)
+            np.ndarray: Binary predictions (True/False). Record input returns a
+                dict of "prediction" and "predict_proba" arrays instead.
         """
         if not self.is_loaded:
             raise ValueError("Model not loaded. Call load_model() first.")
 
+        if isinstance(dat, (dict, list)):
+            return self.predict_records(dat)
+
         try:
-            dat_tmp = dat.copy()
-            dat_tmp = preprocess_pd(dat_tmp)
-            # Get prediction probabilities and make binary predictions
-            dat_tmp["predict_proba"] = self.model.predict_proba(dat_tmp)[:, 1]
-            dat_tmp["prediction"] = (dat_tmp["predict_proba"] > 0.5).astype(int)
+            return self._predict_frame(dat)
+        except Exception as e:
+            logger.error(f"Prediction failed: {str(e)}")
+            raise ValueError("Not able to predict outcome")
+
+    def _predict_frame(self, dat: pd.DataFrame) -> pd.DataFrame:
+        """DataFrame scoring behind predict, without the loaded check."""
+        dat_tmp = dat.copy()
+        dat_tmp = preprocess_pd(dat_tmp)
+        # Get prediction probabilities and make binary predictions
+        dat_tmp["predict_proba"] = self._predict_proba(dat_tmp)
+        dat_tmp["prediction"] = (dat_tmp["predict_proba"] > self.threshold).astype(int)
 
-            return dat_tmp
+        return dat_tmp
 
+    def predict_records(self, records) -> dict:
+        """
+        Score patient records without building a DataFrame.
+
+        Args:
+            records: A patient record dict, or a list of them
+
+        Returns:
+            dict: "prediction" and "predict_proba" arrays in input order, the
+                "model_version" that produced them, and per-stage "timings"
+                in seconds
+        """
+        started = time.perf_counter()
+        encoded = self.encoder.encode(records)
+        encoded_at = time.perf_counter()
+        proba = self.predict_encoded(encoded)
+        finished = time.perf_counter()
+        return {
+            "prediction": (proba > self.threshold).astype(int),
+            "predict_proba": proba,
+            "model_version": self.registry_version,
+            "timings": {
+                "encode": encoded_at - started,
+                "predict": finished - encoded_at,
+            },
+        }
+
+    def explain_records(self, records) -> dict:
+        """
+        Per-feature contributions to the predictions for patient records.
+
+        Args:
+            records: A patient record dict, or a list of them
+
+        Returns:
+            dict: "contributions" of shape (n_records, n_features) in
+                "feature_names" order and the "base_value" they add to, both
+                in log-odds, with the "prediction" and "predict_proba" they
+                produce, the "model_version" and per-stage "timings"
+        """
+        started = time.perf_counter()
+        encoded = self.encoder.encode(records)
+        encoded_at = time.perf_counter()
+        try:
+            contributions = self.explainer.explain(encoded)
+        except Exception as e:
+            logger.error(f"Explanation failed: {str(e)}")
+            raise ValueError("Not able to explain outcome")
+        finished = time.perf_counter()
+
+        proba = 1.0 / (1.0 + np.exp(-contributions.sum(axis=1, dtype=np.float64)))
+        return {
+            "feature_names": self.encoder.feature_names,
+            "contributions": contributions[:, :-1],
+            "base_value": contributions[:, -1],
+            "prediction": (proba > self.threshold).astype(int),
+            "predict_proba": proba,
+            "model_version": self.registry_version,
+            "timings": {
+                "encode": encoded_at - started,
+                "predict": finished - encoded_at,
+            },
+        }
+
+    def predict_encoded(self, encoded: np.ndarray) -> np.ndarray:
+        """
+        Score rows already encoded by FeatureEncoder.
+
+        Args:
+            encoded: float32 array of shape (n_records, n_features)
+
+        Returns:
+            np.ndarray: Positive class probabilities
+        """
+        try:
+            if self.table is not None:
+                return self.table.predict(encoded, self._predict_proba)
+            return self._predict_proba(encoded)
         except Exception as e:
             logger.error(f"Prediction failed: {str(e)}")
             raise ValueError("Not able to predict outcome")
+
+    def set_nthread(self, nthread: int) -> None:
+        """
+        Change the thread count of the "booster" engine.
+
+        XGBoost starts its OpenMP threads on the first multi-threaded call,
+        so a model loaded with nthread=1 in a parent process can be given
+        its real thread count in each forked child without the child
+        inheriting a thread pool that no longer exists.
+
+        Args:
+            nthread: Thread count for subsequent predictions
+        """
+        self.nthread = nthread
+        if self.booster is not None:
+            self.booster.set_param({"nthread": nthread})
+        if self.explainer is not None:
+            self.explainer.nthread = nthread
+
+    def build_table(self) -> PredictionTable:
+        """
+        Precompute the lookup table for the loaded model and check it.
+
+        The table is filled from encoded rows, so it is checked against the
+        DataFrame path of predict on the same rows decoded back to records,
+        on and off the grid.
+
+        Returns:
+            PredictionTable: Table matching the DataFrame path on sampled rows
+        """
+        table = PredictionTable(
+            self.encoder.feature_names,
+            CATEGORICAL_LEVELS,
+            self._predict_proba,
+            numeric_ranges=self.table_ranges,
+        )
+
+        def score_decoded(rows):
+            return self._predict_frame(self._decode(rows))["predict_proba"].to_numpy()
+
+        max_diff = table.check_parity(self._predict_proba, score_decoded)
+        if max_diff > 1e-6:
+            raise ValueError(f"Prediction table differs from model by {max_diff}")
+        logger.info(f"Prediction table ready: {table.stats()}")
+        return table
+
+    def _decode(self, encoded: np.ndarray) -> pd.DataFrame:
+        """Records for FeatureEncoder rows; NaN categories become unknown."""
+        columns = {}
+        for j, col in enumerate(self.encoder.feature_names):
+            levels = CATEGORICAL_LEVELS.get(col)
+            if levels is None:
+                columns[col] = encoded[:, j]
+            else:
+                columns[col] = [
+                    None if np.isnan(code) else levels[int(code)]
+                    for code in encoded[:, j]
+                ]
+        return pd.DataFrame(columns)
+
+    def _predict_proba(self, dat) -> np.ndarray:
+        """Positive class probabilities from the configured engine"""
+        if self.engine == "booster":
+            # Encoded arrays carry no names; their order comes from the encoder
+            return self.booster.inplace_predict(
+                dat,
+                iteration_range=self.iteration_range,
+                validate_features=isinstance(dat, pd.DataFrame),
+            )
+        return self.model.predict_proba(dat)[:, 1]
@@ -0,0 +1,341 @@
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from predict_function import CATEGORICAL_LEVELS, FEATURE_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+
+def log_schema(feature_columns=None, categorical_columns=None) -> pa.Schema:
+    """
+    Parquet schema of the prediction log.
+
+    One row per scored record: the request features (categoricals as
+    strings, numerics as float64, null when missing or unparseable) followed
+    by the prediction metadata. In shadow mode a record has a row per model,
+    told apart by model_role and paired by request_id.
+    """
+    if feature_columns is None:
+        feature_columns = FEATURE_COLUMNS
+    if categorical_columns is None:
+        categorical_columns = CATEGORICAL_LEVELS
+    fields = [
+        pa.field(col, pa.string() if col in categorical_columns else pa.float64())
+        for col in feature_columns
+    ]
+    fields += [
+        pa.field("timestamp", pa.timestamp("ms", tz="UTC")),
+        pa.field("endpoint", pa.string()),
+        pa.field("model_version", pa.string()),
+        pa.field("model_role", pa.string()),
+        pa.field("request_id", pa.string()),
+        pa.field("prediction", pa.int8()),
+        pa.field("predict_proba", pa.float64()),
+        pa.field("latency_ms", pa.float64()),
+    ]
+    return pa.schema(fields)
+
+
+def _to_float(value):
+    try:
+        return None if value is None else float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_str(value):
+    return None if value is None else str(value)
+
+
+class PredictionLogger:
+    """
+    Non-blocking prediction log written as rotating Parquet files.
+
+    log() only appends a reference to the scored records to an in-memory
+    queue; a writer thread converts them to columns and appends row groups
+    to the current file. Memory is bounded by max_pending_rows: a batch
+    is queued up to the room left under it, and only the rows beyond that
+    are dropped and counted instead of blocking the request, so a bulk
+    request larger than the buffer is still partly logged.
+
+    Files are written as .predictions-*.parquet and renamed to
+    predictions-*.parquet when rotated, so readers of the directory (which
+    skip dot-files, as pandas and pyarrow do by default) only ever see
+    complete files.
+    """
+
+    def __init__(
+        self,
+        directory,
+        max_pending_rows=100000,
+        flush_rows=10000,
+        flush_interval=5.0,
+        rotate_bytes=64 * 1024 * 1024,
+        rotate_interval=3600.0,
+        on_drop=None,
+        feature_columns=None,
+        categorical_columns=None,
+    ):
+        """
+        Args:
+            directory: Directory the Parquet files are written to
+            max_pending_rows: Rows buffered before further rows are dropped
+            flush_rows: Buffered rows that trigger writing a row group
+            flush_interval: Longest a row waits before being written
+            rotate_bytes: File size after which a new file is started
+            rotate_interval: File age in seconds after which a new file is
+                started
+            on_drop: Optional callable receiving the number of dropped rows
+            feature_columns: Request fields logged, in column order
+            categorical_columns: Request fields logged as strings
+        """
+        self.directory = directory
+        self.max_pending_rows = max_pending_rows
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.rotate_bytes = rotate_bytes
+        self.rotate_interval = rotate_interval
+        self.on_drop = on_drop
+        if feature_columns is None:
+            feature_columns = FEATURE_COLUMNS
+        if categorical_columns is None:
+            categorical_columns = CATEGORICAL_LEVELS
+        self.feature_columns = list(feature_columns)
+        self._categorical = set(categorical_columns)
+        self.schema = log_schema(self.feature_columns, self._categorical)
+
+        self.logged_rows = 0
+        self.dropped_rows = 0
+        self.written_rows = 0
+        self.files_written = 0
+
+        self._pending_rows = 0
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._writer = None
+        self._path = None
+        self._opened_at = None
+        self._file_seq = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._thread = threading.Thread(
+            target=self._run, name="prediction-logger", daemon=True
+        )
+        self._thread.start()
+
+    def log(
+        self,
+        records,
+        predictions,
+        probabilities,
+        model_version,
+        latency,
+        endpoint,
+        request_id=None,
+        model_role="champion",
+    ) -> bool:
+        """
+        Queue scored records for writing without touching the disk.
+
+        Args:
+            records: Request records as dicts, or a pyarrow.Table with one
+                column per field, in scoring order
+            predictions: Predicted labels, one per record
+            probabilities: Positive class probabilities, one per record
+            model_version: Version of the model that scored them
+            latency: Scoring latency in seconds, shared by the records
+            endpoint: Route the records arrived on
+            request_id: Identifier of the request, shared by the rows of
+                every model that scored it
+            model_role: "champion", or "challenger" for shadow scores
+
+        Returns:
+            bool: False if some or all rows were dropped because the buffer
+            is full
+        """
+        n_rows = len(records)
+        with self._lock:
+            accepted = max(0, min(n_rows, self.max_pending_rows - self._pending_rows))
+            self._pending_rows += accepted
+            self.logged_rows += accepted
+            self.dropped_rows += n_rows - accepted
+
+        if accepted < n_rows and self.on_drop is not None:
+            self.on_drop(n_rows - accepted)
+        if accepted == 0:
+            return False
+
+        if accepted < n_rows:
+            # Keep the rows that fit; the writer converts them off this thread
+            if isinstance(records, pa.Table):
+                records = records.slice(0, accepted)
+            else:
+                records = records[:accepted]
+            predictions = predictions[:accepted]
+            probabilities = probabilities[:accepted]
+
+        self._queue.put(
+            (
+                records,
+                predictions,
+                probabilities,
+                model_version,
+                latency,
+                endpoint,
+                request_id,
+                model_role,
+                time.time(),
+            )
+        )
+        return accepted == n_rows
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = self._pending_rows
+        return {
+            "logged_rows": self.logged_rows,
+            "dropped_rows": self.dropped_rows,
+            "written_rows": self.written_rows,
+            "pending_rows": pending,
+            "files_written": self.files_written,
+        }
+
+    def stop(self, timeout=None) -> None:
+        """Write everything queued, close the current file and stop."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        columns = self._empty_columns()
+        buffered = 0
+        first_buffered_at = None
+        while True:
+            timeout = self.flush_interval
+            if first_buffered_at is not None:
+                timeout = max(
+                    0.0, first_buffered_at + self.flush_interval - time.time()
+                )
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = ()
+
+            if item is None:
+                self._flush(columns, buffered)
+                self._close_file()
+                return
+
+            if item:
+                buffered += self._append(columns, *item)
+                if first_buffered_at is None:
+                    first_buffered_at = time.time()
+
+            due = first_buffered_at is not None and (
+                time.time() - first_buffered_at >= self.flush_interval
+            )
+            if buffered >= self.flush_rows or due:
+                self._flush(columns, buffered)
+                columns = self._empty_columns()
+                buffered = 0
+                first_buffered_at = None
+
+            if self._writer is not None and (
+                os.path.getsize(self._path) >= self.rotate_bytes
+                or time.time() - self._opened_at >= self.rotate_interval
+            ):
+                self._close_file()
+
+    def _empty_columns(self) -> dict:
+        return {name: [] for name in self.schema.names}
+
+    def _append(
+        self,
+        columns,
+        records,
+        predictions,
+        probabilities,
+        model_version,
+        latency,
+        endpoint,
+        request_id,
+        model_role,
+        logged_at,
+    ) -> int:
+        n_rows = len(records)
+        for col in self.feature_columns:
+            convert = _to_str if col in self._categorical else _to_float
+            if isinstance(records, pa.Table):
+                # Columnar requests are only converted here, off the request path
+                values = (
+                    records.column(col).to_pylist()
+                    if col in records.column_names
+                    else [None] * n_rows
+                )
+            else:
+                values = (record.get(col) for record in records)
+            columns[col].extend(convert(value) for value in values)
+
+        version = _to_str(model_version)
+        timestamp = datetime.fromtimestamp(logged_at, tz=timezone.utc)
+        columns["timestamp"].extend([timestamp] * n_rows)
+        columns["endpoint"].extend([endpoint] * n_rows)
+        columns["model_version"].extend([version] * n_rows)
+        columns["model_role"].extend([model_role] * n_rows)
+        columns["request_id"].extend([request_id] * n_rows)
+        columns["prediction"].extend(np.asarray(predictions, dtype=np.int8).tolist())
+        columns["predict_proba"].extend(
+            np.asarray(probabilities, dtype=np.float64).tolist()
+        )
+        columns["latency_ms"].extend([latency * 1000] * n_rows)
+        return n_rows
+
+    def _flush(self, columns, n_rows) -> None:
+        if n_rows == 0:
+            return
+        try:
+            table = pa.Table.from_pydict(columns, schema=self.schema)
+            if self._writer is None:
+                self._open_file()
+            self._writer.write_table(table)
+            self.written_rows += n_rows
+        except Exception as e:
+            logger.error(f"Failed to write {n_rows} logged predictions: {str(e)}")
+            self.dropped_rows += n_rows
+            if self.on_drop is not None:
+                self.on_drop(n_rows)
+        finally:
+            with self._lock:
+                self._pending_rows -= n_rows
+
+    def _open_file(self) -> None:
+        self._file_seq += 1
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        name = f"predictions-{stamp}-{os.getpid()}-{self._file_seq:04d}.parquet"
+        self._path = os.path.join(self.directory, "." + name)
+        self._writer = pq.ParquetWriter(self._path, self.schema)
+        self._opened_at = time.time()
+
+    def _close_file(self) -> None:
+        if self._writer is None:
+            return
+        try:
+            self._writer.close()
+            final_path = os.path.join(
+                self.directory, os.path.basename(self._path).lstrip(".")
+            )
+            os.replace(self._path, final_path)
+            self.files_written += 1
+        except Exception as e:
+            logger.error(f"Failed to close prediction log {self._path}: {str(e)}")
+        finally:
+            self._writer = None
+            self._path = None
+            self._opened_at = None
@@ -0,0 +1,208 @@
+import logging
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Integer ranges (inclusive) precomputed for the numeric features. Both are
+# small Poisson counts in the training data (means 30 and 12).
+DEFAULT_NUMERIC_RANGES = {
+    "age": (0, 60),
+    "breast_feeding_month": (0, 36),
+}
+
+
+class PredictionTable:
+    """
+    Precomputed predict_proba for every point of the bounded feature grid.
+
+    Each feature becomes one axis of a dense float32 array: categoricals are
+    indexed by category code and numerics by (value - range start). A request
+    encoded by FeatureEncoder is answered by one array lookup if all of its
+    values fall on the grid; anything else (unknown categories, missing or
+    fractional values, out-of-range numerics) goes to the live model.
+    """
+
+    def __init__(
+        self,
+        feature_names,
+        categorical_levels,
+        score_fn,
+        numeric_ranges=None,
+        chunk_size=65536,
+    ):
+        """
+        Build the table by scoring every grid point with the live model.
+
+        Args:
+            feature_names: Column order produced by FeatureEncoder
+            categorical_levels: Mapping of categorical column to its levels
+            score_fn: Callable scoring an encoded float32 matrix
+            numeric_ranges: Inclusive (low, high) integer range per numeric
+            chunk_size: Grid points scored per model call while building
+        """
+        if numeric_ranges is None:
+            numeric_ranges = DEFAULT_NUMERIC_RANGES
+
+        self.feature_names = list(feature_names)
+        self._numeric_columns = {
+            j
+            for j, col in enumerate(self.feature_names)
+            if col not in categorical_levels
+        }
+        offsets, shape = [], []
+        for col in self.feature_names:
+            if col in categorical_levels:
+                offsets.append(0)
+                shape.append(len(categorical_levels[col]))
+            elif col in numeric_ranges:
+                low, high = numeric_ranges[col]
+                offsets.append(low)
+                shape.append(high - low + 1)
+            else:
+                raise ValueError(f"No grid range configured for feature '{col}'")
+
+        self.offsets = np.asarray(offsets, dtype=np.float32)
+        self.shape = tuple(shape)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        started = time.perf_counter()
+        self.table = np.empty(int(np.prod(self.shape)), dtype=np.float32)
+        for start in range(0, self.table.size, chunk_size):
+            flat = np.arange(start, min(start + chunk_size, self.table.size))
+            self.table[start : start + len(flat)] = score_fn(self._grid_rows(flat))
+        self.build_seconds = time.perf_counter() - started
+
+        logger.info(
+            f"Prediction table built: {self.table.size} entries, "
+            f"{self.memory_bytes / 1e6:.1f} MB in {self.build_seconds:.1f}s"
+        )
+
+    @property
+    def memory_bytes(self) -> int:
+        return self.table.nbytes
+
+    @property
+    def hit_rate(self) -> float:
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        """Footprint and hit counters for reporting."""
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            "entries": self.table.size,
+            "memory_bytes": self.memory_bytes,
+            "build_seconds": round(self.build_seconds, 3),
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+        }
+
+    def lookup(self, encoded: np.ndarray):
+        """
+        Look up encoded rows in the table.
+
+        Args:
+            encoded: float32 array of shape (n_records, n_features)
+
+        Returns:
+            tuple: (probabilities, hit mask); probabilities are only valid
+                where the mask is True
+        """
+        proba, hit = self._lookup(encoded)
+        n_hits = int(hit.sum())
+        # Request threads share the table
+        with self._lock:
+            self.hits += n_hits
+            self.misses += len(encoded) - n_hits
+        return proba, hit
+
+    def _lookup(self, encoded: np.ndarray):
+        """lookup without counting hits."""
+        index = encoded - self.offsets
+        with np.errstate(invalid="ignore"):
+            hit = (
+                (index >= 0).all(axis=1)
+                & (index < self.shape).all(axis=1)
+                & (index == np.floor(index)).all(axis=1)
+            )
+
+        proba = np.empty(len(encoded), dtype=np.float32)
+        if hit.any():
+            flat = np.ravel_multi_index(index[hit].astype(np.intp).T, self.shape)
+            proba[hit] = self.table[flat]
+        return proba, hit
+
+    def predict(self, encoded: np.ndarray, score_fn) -> np.ndarray:
+        """
+        Probabilities from the table, falling back to score_fn for misses.
+
+        Args:
+            encoded: float32 array of shape (n_records, n_features)
+            score_fn: Callable scoring the rows that are off the grid
+
+        Returns:
+            np.ndarray: Positive class probabilities in input order
+        """
+        proba, hit = self.lookup(encoded)
+        if not hit.all():
+            proba[~hit] = score_fn(encoded[~hit])
+        return proba
+
+    def check_parity(
+        self, score_fn, reference_fn, n_samples=1000, n_edge=100, seed=0
+    ) -> float:
+        """
+        Compare the table's answers with a scoring path that did not build it.
+
+        Covers random grid points, both ends of every numeric range and rows
+        just off the grid (fractional, past either end, missing, unknown
+        category), so the stored entries and the fallback are both checked.
+        Not counted in the hit statistics.
+
+        Args:
+            score_fn: Callable scoring the rows that are off the grid, as
+                passed to predict
+            reference_fn: Callable scoring encoded rows independently of
+                score_fn
+            n_samples: Random grid points
+            n_edge: Rows per edge and off-grid variant of each feature
+            seed: Seed for sampling the grid
+
+        Returns:
+            float: Largest absolute probability difference
+        """
+        rng = np.random.default_rng(seed)
+        grid = self._grid_rows(rng.integers(0, self.table.size, n_samples))
+        rows = [grid]
+        for j in range(len(self.feature_names)):
+            if j in self._numeric_columns:
+                low = self.offsets[j]
+                high = low + self.shape[j] - 1
+                values = (low, high, low - 1, high + 1, low + 0.5, np.nan)
+            else:
+                values = (np.nan,)
+            for value in values:
+                variant = grid[:n_edge].copy()
+                variant[:, j] = value
+                rows.append(variant)
+        rows = np.concatenate(rows)
+
+        proba, hit = self._lookup(rows)
+        if not hit.all():
+            proba[~hit] = score_fn(rows[~hit])
+        return float(np.abs(proba - reference_fn(rows)).max())
+
+    def _grid_rows(self, flat: np.ndarray) -> np.ndarray:
+        """Encoded feature rows for flat grid indices."""
+        index = np.column_stack(np.unravel_index(flat, self.shape))
+        return np.ascontiguousarray(index + self.offsets, dtype=np.float32)
@@ -0,0 +1,322 @@
+import math
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from predict_function import CATEGORICAL_LEVELS, FEATURE_COLUMNS
+
+# Plausibility bounds (inclusive) for the numeric fields. Far wider than the
+# training data (Poisson counts with means 30 and 12); they only reject values
+# that cannot be a real patient.
+NUMERIC_LIMITS = {
+    "age": (0, 120),
+    "breast_feeding_month": (0, 60),
+}
+
+# Placeholder for fields absent from a record
+_MISSING = object()
+
+
+class SchemaError(ValueError):
+    """A request record failed validation; errors maps field to message."""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__(f"Invalid request: {format_errors(errors)}")
+
+
+def format_errors(row_errors) -> str:
+    """One-line message for a row's per-field errors."""
+    return "; ".join(f"{field}: {message}" for field, message in row_errors.items())
+
+
+def _categorical_decoder(levels):
+    allowed = frozenset(levels)
+    message = f"must be one of {list(levels)}"
+
+    def decode(value):
+        try:
+            if value is None or value in allowed:
+                return value, None
+        except TypeError:
+            pass  # unhashable, e.g. a list or object
+        return None, message
+
+    return decode
+
+
+def _numeric_decoder(low, high):
+    range_message = f"must be between {low} and {high}"
+
+    def decode(value):
+        if value is None:
+            return None, None
+        if isinstance(value, bool):
+            return None, "must be a number"
+        if isinstance(value, str):
+            try:
+                value = float(value)
+            except ValueError:
+                return None, "must be a number"
+        elif not isinstance(value, (int, float)):
+            return None, "must be a number"
+        if not math.isfinite(value):
+            return None, "must be a finite number"
+        if value < low or value > high:
+            return None, range_message
+        return value, None
+
+    return decode
+
+
+class RequestSchema:
+    """
+    Compiled validator and decoder for patient records.
+
+    Each field gets a decoder closure built once from the category levels
+    used by preprocess_pd and the numeric limits, so a record is checked and
+    normalized in a single pass over its fields without building a DataFrame.
+    Every field is required; null is accepted and scored as missing, as the
+    model was trained to handle. Fields outside the schema are dropped.
+    """
+
+    def __init__(
+        self, feature_names=None, categorical_levels=None, numeric_limits=None
+    ):
+        """
+        Args:
+            feature_names: Fields a record must contain
+            categorical_levels: Mapping of categorical field to allowed levels
+            numeric_limits: Inclusive (low, high) bounds per numeric field
+        """
+        if feature_names is None:
+            feature_names = FEATURE_COLUMNS
+        if categorical_levels is None:
+            categorical_levels = CATEGORICAL_LEVELS
+        if numeric_limits is None:
+            numeric_limits = NUMERIC_LIMITS
+
+        self.feature_names = list(feature_names)
+        self._levels = {
+            field: pa.array(levels, type=pa.string())
+            for field, levels in categorical_levels.items()
+            if field in self.feature_names
+        }
+        self._bounds = {}
+        self._decoders = []
+        # (field, decoder, allowed levels or None, numeric bounds or None) for
+        # the column-wise batch path
+        self._columns = []
+        for field in self.feature_names:
+            if field in categorical_levels:
+                levels = categorical_levels[field]
+                decoder = _categorical_decoder(levels)
+                self._columns.append((field, decoder, frozenset(levels), None))
+            else:
+                low, high = numeric_limits.get(field, (-math.inf, math.inf))
+                decoder = _numeric_decoder(low, high)
+                self._columns.append((field, decoder, None, (low, high)))
+                self._bounds[field] = (low, high)
+            self._decoders.append((field, decoder))
+
+    def decode(self, record) -> tuple:
+        """
+        Validate and normalize one record.
+
+        Args:
+            record: Parsed JSON value of one patient record
+
+        Returns:
+            tuple: (decoded record, errors); errors maps field to message and
+                is empty when the record is valid
+        """
+        if not isinstance(record, dict):
+            return None, {"record": "must be a JSON object"}
+
+        decoded, errors = {}, {}
+        for field, decoder in self._decoders:
+            if field not in record:
+                errors[field] = "is required"
+                continue
+            value, error = decoder(record[field])
+            if error is None:
+                decoded[field] = value
+            else:
+                errors[field] = error
+        return decoded, errors
+
+    def decode_record(self, record) -> dict:
+        """
+        Decode one record, raising on invalid input.
+
+        Raises:
+            SchemaError: With the per-field errors
+        """
+        decoded, errors = self.decode(record)
+        if errors:
+            raise SchemaError(errors)
+        return decoded
+
+    def decode_batch(self, records) -> tuple:
+        """
+        Decode a batch, keeping valid rows and reporting invalid ones.
+
+        Works column by column: each field is checked for the whole batch
+        with a set lookup (categoricals) or one vectorized range check
+        (numerics), and only the offending values go through the per-value
+        decoder to get their error message.
+
+        Args:
+            records: List of parsed patient records
+
+        Returns:
+            tuple: (valid decoded records, their indices in records, errors
+                mapping row index to its per-field errors)
+        """
+        errors = {}
+        rows = []
+        for i, record in enumerate(records):
+            if isinstance(record, dict):
+                rows.append(i)
+            else:
+                errors[i] = {"record": "must be a JSON object"}
+        objects = [records[i] for i in rows]
+
+        columns = []
+        # Positions whose values the decoders normalized
+        changed = set()
+        for field, decoder, levels, bounds in self._columns:
+            try:
+                values = [record[field] for record in objects]
+            except KeyError:
+                values = [record.get(field, _MISSING) for record in objects]
+            if levels is not None:
+                bad = self._check_categorical(values, levels)
+            else:
+                bad = self._check_numeric(values, bounds)
+            for j in bad:
+                if values[j] is _MISSING:
+                    message = "is required"
+                else:
+                    values[j], message = decoder(values[j])
+                if message is None:
+                    changed.add(j)
+                else:
+                    errors.setdefault(rows[j], {})[field] = message
+            columns.append(values)
+
+        # A record holding exactly the schema fields with untouched values is
+        # passed on as is instead of being rebuilt
+        n_fields = len(self.feature_names)
+        valid, indices = [], []
+        for j, i in enumerate(rows):
+            if i in errors:
+                continue
+            record = objects[j]
+            if j in changed or len(record) != n_fields:
+                record = {
+                    field: values[j]
+                    for field, values in zip(self.feature_names, columns)
+                }
+            valid.append(record)
+            indices.append(i)
+        return valid, indices, dict(sorted(errors.items()))
+
+    @staticmethod
+    def _check_categorical(values, levels) -> list:
+        """Positions that are not an allowed level or null."""
+        try:
+            return [
+                j for j, v in enumerate(values) if v is not None and v not in levels
+            ]
+        except TypeError:
+            # An unhashable value; let the decoder judge every position
+            return list(range(len(values)))
+
+    @staticmethod
+    def _check_numeric(values, bounds) -> list:
+        """
+        Positions that are not a number within bounds or null.
+
+        Also returns numeric strings, which the decoder converts.
+        """
+        if not set(map(type, values)) <= {int, float, type(None)}:
+            # Strings, booleans or missing fields; decode every position
+            return list(range(len(values)))
+        array = np.array(values, dtype=np.float64)
+        null = np.fromiter((v is None for v in values), dtype=bool, count=len(values))
+        with np.errstate(invalid="ignore"):
+            ok = null | ((array >= bounds[0]) & (array <= bounds[1]))
+        return np.flatnonzero(~ok).tolist()
+
+    def decode_table(self, table, feature_names=None) -> tuple:
+        """
+        Validate and encode an Arrow table column by column.
+
+        Categorical columns (string or dictionary encoded) become their
+        category codes and numeric columns float32, so the result can go
+        straight to the model without converting rows to Python objects.
+
+        Args:
+            table: pyarrow.Table with one column per field
+            feature_names: Column order of the returned matrix (defaults to
+                the schema's field order)
+
+        Returns:
+            tuple: (float32 array of shape (n_rows, n_features), errors
+                mapping row index to its per-field errors)
+
+        Raises:
+            ValueError: If a column is missing or has an unusable type
+        """
+        if feature_names is None:
+            feature_names = self.feature_names
+        decoders = dict(self._decoders)
+
+        encoded = np.empty((table.num_rows, len(feature_names)), dtype=np.float32)
+        errors = {}
+        for j, field in enumerate(feature_names):
+            if field not in table.column_names:
+                raise ValueError(f"Missing required column '{field}'")
+            column = table.column(field).combine_chunks()
+
+            if field in self._levels:
+                codes, bad = self._encode_categorical(field, column)
+                encoded[:, j] = codes
+            else:
+                values, bad = self._encode_numeric(field, column)
+                encoded[:, j] = values
+
+            for i in np.flatnonzero(bad).tolist():
+                _, message = decoders[field](column[i].as_py())
+                errors.setdefault(i, {})[field] = message
+        return encoded, dict(sorted(errors.items()))
+
+    def _encode_categorical(self, field, column) -> tuple:
+        """Category codes (NaN for null) and the mask of unknown levels."""
+        if pa.types.is_dictionary(column.type):
+            # Look up each dictionary entry once, then expand by the indices
+            codes = pc.take(
+                pc.index_in(column.dictionary.cast(pa.string()), self._levels[field]),
+                column.indices,
+            )
+        elif pa.types.is_string(column.type) or pa.types.is_large_string(column.type):
+            codes = pc.index_in(column, self._levels[field])
+        else:
+            raise ValueError(f"Column '{field}' must be strings")
+        bad = pc.and_(pc.is_null(codes), pc.is_valid(column))
+        return (
+            codes.cast(pa.float32()).to_numpy(zero_copy_only=False),
+            bad.to_numpy(zero_copy_only=False),
+        )
+
+    def _encode_numeric(self, field, column) -> tuple:
+        """Values as float64 (NaN for null) and the mask of invalid values."""
+        if not (pa.types.is_integer(column.type) or pa.types.is_floating(column.type)):
+            raise ValueError(f"Column '{field}' must be numeric")
+        values = column.cast(pa.float64()).to_numpy(zero_copy_only=False)
+        low, high = self._bounds[field]
+        null = column.is_null().to_numpy(zero_copy_only=False)
+        with np.errstate(invalid="ignore"):
+            ok = null | ((values >= low) & (values <= high))
+        return values, ~ok
@@ -0,0 +1,191 @@
+"""
+Prometheus metrics for the prediction service
+
+Per-stage latency histograms, request counters, batch sizes and the active
+model version. Under gunicorn set PROMETHEUS_MULTIPROC_DIR (see
+gunicorn.conf.py) so every worker writes to shared files and /metrics on
+any worker reports the sum over all of them.
+"""
+
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# Set METRICS_ENABLED=false to turn every recording call into a no-op
+enabled = os.getenv("METRICS_ENABLED", "true") != "false"
+
+# Unlabelled metrics below open their files as they are created, so the
+# multiprocess directory has to exist before then. gunicorn.conf.py also
+# empties it at startup; under uvicorn nothing else creates it
+if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+# Request stages run from tens of microseconds (encode, table lookups)
+# to hundreds of milliseconds (large batches)
+STAGE_BUCKETS = (
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+# Stages the service records for every scoring endpoint
+STAGES = ("parse", "validate", "encode", "predict", "serialize", "total")
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 1024, 4096, 16384, 65536)
+
+STAGE_SECONDS = Histogram(
+    "prediction_stage_seconds",
+    "Time spent in each stage of a prediction request",
+    ["endpoint", "stage"],
+    buckets=STAGE_BUCKETS,
+)
+REQUESTS = Counter(
+    "prediction_requests_total",
+    "Prediction requests by endpoint and HTTP status",
+    ["endpoint", "status"],
+)
+ERRORS = Counter(
+    "prediction_errors_total",
+    "Prediction requests that returned an error status",
+    ["endpoint"],
+)
+BATCH_SIZE = Histogram(
+    "prediction_batch_size",
+    "Records scored per model call",
+    ["endpoint"],
+    buckets=BATCH_BUCKETS,
+)
+PREDICTION_LOG_DROPPED = Counter(
+    "prediction_log_dropped_total",
+    "Scored records not written to the prediction log",
+)
+SHADOW_RECORDS = Counter(
+    "shadow_records_total",
+    "Records handed to the challenger in shadow mode, by outcome",
+    ["outcome"],
+)
+MODEL_INFO = Gauge(
+    "prediction_model_info",
+    "Model version currently served (1 for the active version)",
+    ["version"],
+    multiprocess_mode="liveall",
+)
+
+# Labelled children are cached so the hot path skips the label lookup
+_stage_children = {}
+_active_version = None
+
+
+def initialize(endpoints, stages=STAGES) -> None:
+    """
+    Create the labelled series of the given endpoints up front.
+
+    They are then exported as zeros before the first request, and the first
+    request does not pay for creating them (a new file entry per series
+    under PROMETHEUS_MULTIPROC_DIR).
+    """
+    if not enabled:
+        return
+    for endpoint in endpoints:
+        for stage in stages:
+            _stage_child(endpoint, stage)
+        REQUESTS.labels(endpoint=endpoint, status="200")
+        ERRORS.labels(endpoint=endpoint)
+        BATCH_SIZE.labels(endpoint=endpoint)
+
+
+def _stage_child(endpoint: str, stage: str):
+    child = _stage_children.get((endpoint, stage))
+    if child is None:
+        child = STAGE_SECONDS.labels(endpoint=endpoint, stage=stage)
+        _stage_children[(endpoint, stage)] = child
+    return child
+
+
+def observe_stage(endpoint: str, stage: str, seconds: float) -> None:
+    """Record the duration of one request stage."""
+    if not enabled:
+        return
+    _stage_child(endpoint, stage).observe(seconds)
+
+
+def observe_timings(endpoint: str, timings) -> None:
+    """Record the stage timings a predictor returned with its result."""
+    if not timings:
+        return
+    for stage, seconds in timings.items():
+        observe_stage(endpoint, stage, seconds)
+
+
+def observe_request(endpoint: str, status: int, seconds: float) -> None:
+    """Count a finished request and record its total duration."""
+    if not enabled:
+        return
+    REQUESTS.labels(endpoint=endpoint, status=str(status)).inc()
+    if status >= 400:
+        ERRORS.labels(endpoint=endpoint).inc()
+    observe_stage(endpoint, "total", seconds)
+
+
+def observe_batch_size(endpoint: str, size: int) -> None:
+    if not enabled:
+        return
+    BATCH_SIZE.labels(endpoint=endpoint).observe(size)
+
+
+def observe_log_dropped(n_rows: int) -> None:
+    if not enabled:
+        return
+    PREDICTION_LOG_DROPPED.inc(n_rows)
+
+
+def observe_shadow(outcome: str, n_rows: int) -> None:
+    """Count shadow records that were "scored", "dropped" or "failed"."""
+    if not enabled:
+        return
+    SHADOW_RECORDS.labels(outcome=outcome).inc(n_rows)
+
+
+def set_model_version(version) -> None:
+    """Mark the given model version as the one being served."""
+    global _active_version
+    if not enabled or version is None:
+        return
+    if _active_version is not None:
+        MODEL_INFO.labels(version=str(_active_version)).set(0)
+    MODEL_INFO.labels(version=str(version)).set(1)
+    _active_version = version
+
+
+def render() -> tuple:
+    """
+    Metrics in Prometheus text format.
+
+    Returns:
+        tuple: (body bytes, content type)
+    """
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -1,9 +1,29 @@
+import atexit
+import json
+import logging
 import os
+import time
+import uuid
 
-import mlflow
+import numpy as np
 import pandas as pd
-from flask import Flask, jsonify, render_template, request
-from predict_function import preprocess_pd, xgb_model
+import pyarrow as pa
+import service_metrics
+from flask import Flask, Response, g, jsonify, render_template, request
+from micro_batcher import MicroBatcher
+from model_bundle import DEFAULT_THRESHOLD
+from model_cache import resolve_model_version
+from model_refresher import ModelRefresher
+from predict_function import FEATURE_COLUMNS, preprocess_pd, xgb_model
+from prediction_logger import PredictionLogger
+from request_schema import RequestSchema, SchemaError, format_errors
+from shadow_scorer import ShadowScorer
+from warmup import run_warmup, warm_predictor
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None  # msgpack bodies on /predict_bulk are optional
 
 try:
     from dotenv import load_dotenv
@@ -12,14 +32,55 @@ try:
 except ImportError:
     pass  # dotenv not installed, use system environment variables
 
+logger = logging.getLogger(__name__)
+
 app = Flask(__name__)
 
+# Upper bound on records accepted by /predict_batch in a single request
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "50000"))
+
+# Upper bound on rows accepted by /predict_bulk in a single request
+MAX_BULK_ROWS = int(os.getenv("MAX_BULK_ROWS", "2000000"))
+
+# Upper bound on records accepted by /explain_batch, lower than
+# MAX_BATCH_SIZE since an explanation costs several predictions (see
+# explainer.py for the latency budget)
+MAX_EXPLAIN_BATCH_SIZE = int(os.getenv("MAX_EXPLAIN_BATCH_SIZE", "1000"))
+
+ARROW_STREAM_MIMETYPE = "application/vnd.apache.arrow.stream"
+MSGPACK_MIMETYPE = "application/msgpack"
+
+# Validates and normalizes request records before they reach the model
+request_schema = RequestSchema()
+
+# Synthetic requests sent through the app before a worker reports ready
+# (0 disables warmup); the batch size applies to /predict_batch and
+# /predict_bulk
+WARMUP_REQUESTS = int(os.getenv("WARMUP_REQUESTS", "20"))
+WARMUP_BATCH_SIZE = int(os.getenv("WARMUP_BATCH_SIZE", "256"))
+
+# Reported by /healthz and /readyz; "ready" turns true once warmup succeeds
+service_state = {"ready": False, "started_at": time.time(), "warmup": None}
+
+# With PRELOAD_MODEL=true gunicorn imports this module once in the master
+# (preload_app in gunicorn.conf.py) and forks the workers from it, so the
+# model and the imported libraries are shared copy-on-write instead of loaded
+# once per worker. Threads do not survive fork, so everything that runs a
+# thread or writes per-process state is started by start_worker() in each
+# worker rather than at import.
+preload = os.getenv("PRELOAD_MODEL") == "true"
+
+# Challenger scored alongside the champion in shadow mode (SHADOW_MODE=true)
+challenger = None
+
 # Initialize the XGBoost predictor
 # Allow mocking during testing
 if os.environ.get("TESTING") == "true":
     # Mock predictor for testing
     class MockPredictor:
         def predict(self, df):
+            if not isinstance(df, pd.DataFrame):
+                df = pd.DataFrame([df] if isinstance(df, dict) else df)
             # Check for invalid data in testing
             if "age" in df.columns:
                 try:
@@ -33,12 +94,260 @@ if os.environ.get("TESTING") == "true":
             df["predict_proba"] = [0.3] * len(df)
             return df
 
+        def predict_encoded(self, encoded):
+            return np.full(len(encoded), 0.3, dtype=np.float32)
+
+        def explain_records(self, records):
+            n_records = 1 if isinstance(records, dict) else len(records)
+            return {
+                "feature_names": FEATURE_COLUMNS,
+                "contributions": np.zeros((n_records, len(FEATURE_COLUMNS))),
+                "base_value": np.full(n_records, -0.85),
+                "prediction": np.zeros(n_records, dtype=int),
+                "predict_proba": np.full(n_records, 0.3),
+            }
+
     predictor = MockPredictor()
 else:
-    # Production: Load real MLflow model from environment variable
-    mlflow_uri = os.getenv("MLFLOW_TRACKING_URI", "http://localhost:5000")
-    mlflow.set_tracking_uri(mlflow_uri)
-    predictor = xgb_model(model_name="mlops_project", model_version="champion")
+    # Production: serve the exported bundle in MODEL_BUNDLE_DIR (see
+    # model_bundle.py), which never imports mlflow, or load the champion
+    # from the MLflow registry
+    bundle_dir = os.getenv("MODEL_BUNDLE_DIR")
+    if bundle_dir is None:
+        import mlflow
+
+        mlflow_uri = os.getenv("MLFLOW_TRACKING_URI", "http://localhost:5000")
+        mlflow.set_tracking_uri(mlflow_uri)
+    serving_nthread = int(os.getenv("SERVING_NTHREAD", "1"))
+
+    def load_predictor(nthread=serving_nthread, alias="champion", bundle=bundle_dir):
+        return xgb_model(
+            model_name="mlops_project",
+            model_version=alias,
+            engine=os.getenv("SERVING_ENGINE", "booster"),
+            nthread=nthread,
+            cache_dir=os.getenv("MODEL_CACHE_DIR"),
+            offline=os.getenv("MODEL_CACHE_OFFLINE") == "true",
+            lookup_table=os.getenv("PREDICTION_TABLE") == "true",
+            bundle_dir=bundle,
+        )
+
+    def install_predictor(new_predictor):
+        # Warm the new model on the refresher thread so the first requests
+        # after the swap do not pay for its lazy initialization
+        if WARMUP_REQUESTS > 0:
+            warm_predictor(new_predictor)
+        # A single global assignment; requests already holding the old
+        # predictor finish on it
+        global predictor
+        predictor = new_predictor
+        service_metrics.set_model_version(new_predictor.registry_version)
+
+    # A preloading master stays single-threaded: an OpenMP pool started
+    # before fork would be unusable in the workers
+    predictor = load_predictor(nthread=1 if preload else serving_nthread)
+
+    # Shadow mode: load the challenger alias (or, when serving bundles, the
+    # bundle in SHADOW_BUNDLE_DIR) with one thread, so its background scoring
+    # takes as little CPU from the champion as possible. A challenger that
+    # fails to load disables shadow mode rather than the service.
+    if os.getenv("SHADOW_MODE") == "true":
+        shadow_bundle_dir = os.getenv("SHADOW_BUNDLE_DIR")
+        try:
+            if bundle_dir is not None and shadow_bundle_dir is None:
+                raise ValueError("serving a bundle needs SHADOW_BUNDLE_DIR")
+            challenger = load_predictor(
+                nthread=1,
+                alias=os.getenv("SHADOW_ALIAS", "challenger"),
+                bundle=shadow_bundle_dir,
+            )
+        except Exception as e:
+            logger.error(f"Shadow mode disabled, challenger not loaded: {e}")
+
+micro_batcher = None
+prediction_logger = None
+model_refresher = None
+shadow_scorer = None
+
+
+def start_worker():
+    """
+    Start the per-process parts of the service.
+
+    Called at import, or from gunicorn's post_fork hook in each worker when
+    the app is preloaded.
+    """
+    global micro_batcher, prediction_logger, model_refresher, shadow_scorer
+
+    if os.environ.get("TESTING") != "true":
+        if preload:
+            predictor.set_nthread(serving_nthread)
+        service_metrics.set_model_version(predictor.registry_version)
+
+        # Poll the champion alias and hot-swap new versions (0 disables
+        # polling). Under preload each worker loads the new version itself.
+        # A bundle is fixed at export; redeploy with a new one instead.
+        refresh_interval = float(os.getenv("MODEL_REFRESH_INTERVAL", "0"))
+        if refresh_interval > 0 and bundle_dir is not None:
+            logger.warning("MODEL_REFRESH_INTERVAL is ignored with MODEL_BUNDLE_DIR")
+        elif refresh_interval > 0:
+            model_refresher = ModelRefresher(
+                load_predictor=load_predictor,
+                resolve_version=lambda: resolve_model_version(
+                    "mlops_project", "champion"
+                ),
+                on_swap=install_predictor,
+                current_version=predictor.registry_version,
+                interval=refresh_interval,
+            )
+            model_refresher.start()
+
+    # Optionally coalesce concurrent /predict requests into one model call.
+    # Useful only with concurrent request handling (gunicorn --threads, ASGI).
+    if os.getenv("MICRO_BATCH") == "true":
+        micro_batcher = MicroBatcher(
+            get_predictor=lambda: predictor,
+            max_batch_size=int(os.getenv("MICRO_BATCH_MAX_SIZE", "32")),
+            max_delay=float(os.getenv("MICRO_BATCH_MAX_DELAY_MS", "2")) / 1000,
+            timeout=float(os.getenv("MICRO_BATCH_TIMEOUT_MS", "5000")) / 1000,
+        )
+
+    # Before the prediction logger starts, so synthetic records are not logged
+    warm_up()
+
+    # Optionally log every scored record to rotating Parquet files for
+    # monitoring. Writing happens on a background thread; when it falls
+    # behind, rows are dropped and counted rather than slowing requests down.
+    if os.getenv("PREDICTION_LOG_DIR"):
+        prediction_logger = PredictionLogger(
+            os.getenv("PREDICTION_LOG_DIR"),
+            max_pending_rows=int(os.getenv("PREDICTION_LOG_MAX_PENDING", "100000")),
+            flush_rows=int(os.getenv("PREDICTION_LOG_FLUSH_ROWS", "10000")),
+            flush_interval=float(os.getenv("PREDICTION_LOG_FLUSH_SECONDS", "5")),
+            rotate_bytes=int(os.getenv("PREDICTION_LOG_ROTATE_MB", "64")) * 1024 * 1024,
+            rotate_interval=float(os.getenv("PREDICTION_LOG_ROTATE_SECONDS", "3600")),
+            on_drop=service_metrics.observe_log_dropped,
+        )
+        atexit.register(prediction_logger.stop, timeout=10)
+
+    # Score every request with the challenger too, on a background thread,
+    # and log its output next to the champion's. Registered after the
+    # logger, so at exit its queued rows are scored before the log closes.
+    if challenger is not None:
+        if prediction_logger is None:
+            logger.warning("SHADOW_MODE needs PREDICTION_LOG_DIR; shadow disabled")
+        else:
+            if WARMUP_REQUESTS > 0:
+                warm_predictor(challenger)
+            shadow_scorer = ShadowScorer(
+                challenger,
+                prediction_logger,
+                request_schema,
+                max_pending_rows=int(os.getenv("SHADOW_MAX_PENDING", "10000")),
+                on_outcome=service_metrics.observe_shadow,
+            )
+            atexit.register(shadow_scorer.stop)
+
+
+def warm_up():
+    """Send the warmup requests and mark this worker ready if they succeed."""
+    if WARMUP_REQUESTS <= 0:
+        service_state["ready"] = True
+        return
+    # Keep synthetic traffic out of the request metrics, but create their
+    # series now rather than in the first real request
+    service_metrics.initialize(
+        ("/predict", "/predict_batch", "/predict_bulk", "/explain", "/explain_batch")
+    )
+    metrics_enabled = service_metrics.enabled
+    service_metrics.enabled = False
+    try:
+        service_state["warmup"] = run_warmup(
+            app.test_client(), WARMUP_REQUESTS, WARMUP_BATCH_SIZE
+        )
+        service_state["ready"] = True
+    except Exception as e:
+        # The worker still serves, but /readyz keeps it out of rotation
+        logger.error(f"Warmup failed: {e}")
+        service_state["warmup"] = {"error": str(e)}
+    finally:
+        service_metrics.enabled = metrics_enabled
+
+
+def health_payload():
+    """Model and warmup details reported by /healthz and /readyz."""
+    load_seconds = getattr(predictor, "load_seconds", None)
+    return {
+        "status": "ready" if service_state["ready"] else "not ready",
+        "model_version": getattr(predictor, "registry_version", None),
+        "model_load_seconds": (
+            round(load_seconds, 3) if load_seconds is not None else None
+        ),
+        "warmup": service_state["warmup"],
+        "shadow": shadow_scorer.stats() if shadow_scorer is not None else None,
+        "prediction_table": (
+            predictor.table.stats()
+            if getattr(predictor, "table", None) is not None
+            else None
+        ),
+        "explain_cache": (
+            predictor.explainer.stats()
+            if getattr(predictor, "explainer", None) is not None
+            else None
+        ),
+        "uptime_seconds": round(time.time() - service_state["started_at"], 1),
+        "pid": os.getpid(),
+    }
+
+
+def error_payload(error):
+    """Error response body, with per-field details for invalid records."""
+    payload = {"error": str(error)}
+    if isinstance(error, SchemaError):
+        payload["fields"] = error.errors
+    return payload
+
+
+def log_scored(records, predictions, probabilities, model_version, latency, endpoint):
+    """
+    Log the champion's scores, and hand the records to the challenger in
+    shadow mode under the same request id.
+    """
+    request_id = uuid.uuid4().hex
+    prediction_logger.log(
+        records,
+        predictions,
+        probabilities,
+        model_version,
+        latency,
+        endpoint,
+        request_id=request_id,
+    )
+    if shadow_scorer is not None:
+        shadow_scorer.submit(records, endpoint, request_id)
+
+
+def with_model_version(response, model_version):
+    """Tag a prediction response with the model version that produced it."""
+    if model_version is not None:
+        response.headers["X-Model-Version"] = str(model_version)
+    return response
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_metrics(response):
+    if request.url_rule is not None and "request_started" in g:
+        service_metrics.observe_request(
+            request.url_rule.rule,
+            response.status_code,
+            time.perf_counter() - g.request_started,
+        )
+    return response
 
 
 @app.route("/", methods=["GET"])
@@ -46,33 +355,484 @@ def index():
     return render_template("index.html")
 
 
+@app.route("/healthz", methods=["GET"])
+def healthz_api():
+    # Liveness: answering at all is enough
+    return jsonify(health_payload())
+
+
+@app.route("/readyz", methods=["GET"])
+def readyz_api():
+    # Readiness: only once the model is loaded and warmed up
+    return jsonify(health_payload()), 200 if service_state["ready"] else 503
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics_api():
+    body, content_type = service_metrics.render()
+    return Response(body, headers={"Content-Type": content_type})
+
+
+def score_record(data):
+    """
+    Score one patient record.
+
+    Shared by the Flask app and the ASGI app in asgi_app.py.
+
+    Returns:
+        dict: Response payload with the prediction and model version
+    """
+    # Validate first so bad input gets precise errors instead of failing
+    # inside the model
+    started = time.perf_counter()
+    data = request_schema.decode_record(data)
+    validated = time.perf_counter()
+    service_metrics.observe_stage("/predict", "validate", validated - started)
+
+    # Score the record directly; the predictor encodes it without
+    # building a DataFrame
+    if micro_batcher is not None:
+        predicted = micro_batcher.predict(data)
+    else:
+        predicted = predictor.predict(data)
+    predictions = np.asarray(predicted["prediction"])
+    if prediction_logger is not None:
+        log_scored(
+            [data],
+            predictions,
+            np.asarray(predicted["predict_proba"]),
+            predicted.get("model_version"),
+            time.perf_counter() - validated,
+            "/predict",
+        )
+    service_metrics.observe_timings("/predict", predicted.get("timings"))
+    service_metrics.observe_batch_size("/predict", predicted.get("batch_size", 1))
+
+    # predicted holds 'predict_proba' and 'prediction' columns
+    logger.debug(f"Binary predictions: {predictions}")
+
+    return {
+        "prediction": predictions[0].item(),  # Convert to Python bool/int
+        "model_version": predicted.get("model_version"),
+        "status": "success",
+    }
+
+
+def explanations(explained):
+    """Per-record explanation payloads from an explain_records result."""
+    feature_names = explained["feature_names"]
+    return [
+        {
+            "prediction": int(prediction),
+            "predict_proba": float(proba),
+            "base_value": float(base_value),
+            "contributions": dict(zip(feature_names, row.tolist())),
+        }
+        for prediction, proba, base_value, row in zip(
+            explained["prediction"],
+            explained["predict_proba"],
+            explained["base_value"],
+            explained["contributions"],
+        )
+    ]
+
+
+def explain_record(data):
+    """
+    Explain the prediction for one patient record.
+
+    Shared by the Flask app and the ASGI app in asgi_app.py. Contributions
+    are in log-odds and sum with base_value to the logit of predict_proba.
+
+    Returns:
+        dict: Response payload with the prediction, per-feature
+            contributions and model version
+    """
+    started = time.perf_counter()
+    data = request_schema.decode_record(data)
+    validated = time.perf_counter()
+    service_metrics.observe_stage("/explain", "validate", validated - started)
+
+    explained = predictor.explain_records([data])
+    service_metrics.observe_timings("/explain", explained.get("timings"))
+    return {
+        **explanations(explained)[0],
+        "model_version": explained.get("model_version"),
+        "status": "success",
+    }
+
+
+def explain_batch(records):
+    """
+    Explain the predictions for a batch of patient records.
+
+    Shared by the Flask app and the ASGI app in asgi_app.py. Like
+    score_batch, invalid records get their per-field "errors" instead of an
+    explanation without failing the batch.
+
+    Returns:
+        tuple: (response payload, HTTP status)
+    """
+    if not records:
+        return {"explanations": [], "status": "success"}, 200
+    if len(records) > MAX_EXPLAIN_BATCH_SIZE:
+        return {"error": f"Batch exceeds maximum size of {MAX_EXPLAIN_BATCH_SIZE}"}, 413
+
+    started = time.perf_counter()
+    valid, indices, errors = request_schema.decode_batch(records)
+    validated = time.perf_counter()
+    service_metrics.observe_stage("/explain_batch", "validate", validated - started)
+
+    results = [None] * len(records)
+    for i, row_errors in errors.items():
+        results[i] = {"errors": row_errors}
+
+    model_version = None
+    if valid:
+        # One encoding pass and one contributions call for the uncached rows
+        explained = predictor.explain_records(valid)
+        model_version = explained.get("model_version")
+        service_metrics.observe_timings("/explain_batch", explained.get("timings"))
+        service_metrics.observe_batch_size("/explain_batch", len(valid))
+        for i, explanation in zip(indices, explanations(explained)):
+            results[i] = explanation
+
+    payload = {
+        "explanations": results,
+        "model_version": model_version,
+        "status": "partial" if errors else "success",
+    }
+    if errors:
+        payload["invalid_rows"] = len(errors)
+    return payload, 200
+
+
+def is_json_mimetype(mimetype):
+    """Same rule Flask's request.is_json applies."""
+    return mimetype == "application/json" or (
+        mimetype.startswith("application/") and mimetype.endswith("+json")
+    )
+
+
+def parse_batch_body(body, mimetype):
+    """
+    Read a batch of patient records from a request body.
+
+    Accepts either a JSON array of objects or newline-delimited JSON
+    (application/x-ndjson), one object per line.
+
+    Args:
+        body: Raw request body
+        mimetype: Request content type without parameters
+
+    Returns:
+        list: Patient records in input order
+    """
+    try:
+        if mimetype == "application/x-ndjson":
+            lines = body.decode("utf-8").splitlines()
+            records = [json.loads(line) for line in lines if line.strip()]
+        elif is_json_mimetype(mimetype):
+            records = json.loads(body)
+        else:
+            raise TypeError("Request must be JSON array or NDJSON")
+    except ValueError:
+        raise ValueError("Malformed JSON payload")
+
+    if not isinstance(records, list) or not all(
+        isinstance(record, dict) for record in records
+    ):
+        raise TypeError("Batch payload must be a list of JSON objects")
+    return records
+
+
+def score_batch(records):
+    """
+    Score a batch of patient records.
+
+    Shared by the Flask app and the ASGI app in asgi_app.py. Invalid records
+    do not fail the batch: their entry in "predictions" holds the per-field
+    "errors" instead of a prediction.
+
+    Returns:
+        tuple: (response payload, HTTP status)
+    """
+    if not records:
+        return {"predictions": [], "status": "success"}, 200
+    if len(records) > MAX_BATCH_SIZE:
+        return {"error": f"Batch exceeds maximum size of {MAX_BATCH_SIZE}"}, 413
+
+    started = time.perf_counter()
+    valid, indices, errors = request_schema.decode_batch(records)
+    validated = time.perf_counter()
+    service_metrics.observe_stage("/predict_batch", "validate", validated - started)
+
+    results = [None] * len(records)
+    for i, row_errors in errors.items():
+        results[i] = {"errors": row_errors}
+
+    model_version = None
+    if valid:
+        # Score the valid rows with one encoding pass and one model call
+        predicted = predictor.predict(valid)
+        predictions = np.asarray(predicted["prediction"])
+        probabilities = np.asarray(predicted["predict_proba"])
+        model_version = predicted.get("model_version")
+        if prediction_logger is not None:
+            log_scored(
+                valid,
+                predictions,
+                probabilities,
+                model_version,
+                time.perf_counter() - validated,
+                "/predict_batch",
+            )
+        service_metrics.observe_timings("/predict_batch", predicted.get("timings"))
+        service_metrics.observe_batch_size("/predict_batch", len(valid))
+
+        for i, pred, proba in zip(indices, predictions, probabilities):
+            results[i] = {"prediction": int(pred), "predict_proba": float(proba)}
+
+    payload = {
+        "predictions": results,
+        "model_version": model_version,
+        "status": "partial" if errors else "success",
+    }
+    if errors:
+        payload["invalid_rows"] = len(errors)
+    return payload, 200
+
+
+def read_bulk_body(body, mimetype):
+    """
+    Read a columnar batch from a /predict_bulk request body.
+
+    Accepts an Arrow IPC stream, or a msgpack map of column name to list of
+    values when msgpack is installed.
+
+    Returns:
+        pyarrow.Table: One column per field
+    """
+    if mimetype == ARROW_STREAM_MIMETYPE:
+        # Columns reference the request body; nothing is copied
+        return pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+    if mimetype == MSGPACK_MIMETYPE:
+        if msgpack is None:
+            raise TypeError("msgpack support is not installed")
+        try:
+            columns = msgpack.unpackb(body)
+        except Exception:
+            raise ValueError("Malformed msgpack payload")
+        if not isinstance(columns, dict):
+            raise TypeError("msgpack payload must map column names to values")
+        return pa.table(columns)
+    raise TypeError(f"Request must be {ARROW_STREAM_MIMETYPE} or {MSGPACK_MIMETYPE}")
+
+
+def score_bulk(table):
+    """
+    Score a columnar batch without converting it to rows.
+
+    Shared by the Flask app and the ASGI app in asgi_app.py. Invalid rows
+    get a null prediction and their per-field errors in the "error" column.
+
+    Returns:
+        tuple: (pyarrow.Table with "prediction", "predict_proba" and "error"
+            columns, or an error payload; HTTP status)
+    """
+    n_rows = table.num_rows
+    if n_rows > MAX_BULK_ROWS:
+        return {"error": f"Batch exceeds maximum size of {MAX_BULK_ROWS}"}, 413
+
+    # Read the global once: a hot swap mid-request must not mix one model's
+    # feature order, scores and version with another's
+    current = predictor
+
+    # The xgb_model predictor scores columns in its model's feature order,
+    # and a bundle may carry its own decision threshold
+    feature_names = None
+    threshold = DEFAULT_THRESHOLD
+    if isinstance(current, xgb_model):
+        feature_names = current.encoder.feature_names
+        threshold = current.threshold
+
+    started = time.perf_counter()
+    encoded, errors = request_schema.decode_table(table, feature_names)
+    validated = time.perf_counter()
+    service_metrics.observe_stage("/predict_bulk", "validate", validated - started)
+
+    valid = np.ones(n_rows, dtype=bool)
+    valid[list(errors)] = False
+    probabilities = np.zeros(n_rows, dtype=np.float32)
+    model_version = getattr(current, "registry_version", None)
+    if valid.any():
+        probabilities[valid] = current.predict_encoded(
+            encoded[valid] if errors else encoded
+        )
+        scored = time.perf_counter()
+        service_metrics.observe_stage("/predict_bulk", "predict", scored - validated)
+        service_metrics.observe_batch_size("/predict_bulk", int(valid.sum()))
+    predictions = (probabilities > threshold).astype(np.int8)
+
+    if prediction_logger is not None and valid.any():
+        log_scored(
+            table.filter(pa.array(valid)) if errors else table,
+            predictions[valid],
+            probabilities[valid],
+            model_version,
+            time.perf_counter() - validated,
+            "/predict_bulk",
+        )
+
+    if errors:
+        messages = [None] * n_rows
+        for i, row_errors in errors.items():
+            messages[i] = format_errors(row_errors)
+        error_column = pa.array(messages, type=pa.string())
+    else:
+        error_column = pa.nulls(n_rows, type=pa.string())
+
+    metadata = {}
+    if model_version is not None:
+        metadata["model_version"] = str(model_version)
+    result = pa.table(
+        {
+            "prediction": pa.array(predictions, mask=~valid),
+            "predict_proba": pa.array(probabilities, mask=~valid),
+            "error": error_column,
+        },
+        metadata=metadata,
+    )
+    return result, 200
+
+
+def write_bulk_body(result, mimetype):
+    """Serialize a score_bulk result in the request's format."""
+    if mimetype == MSGPACK_MIMETYPE:
+        return msgpack.packb(result.to_pydict())
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, result.schema) as writer:
+        writer.write_table(result)
+    return sink.getvalue().to_pybytes()
+
+
+def bulk_model_version(result):
+    metadata = result.schema.metadata or {}
+    version = metadata.get(b"model_version")
+    return version.decode() if version is not None else None
+
+
 @app.route("/predict", methods=["POST"])
 def predict_api():
     if request.is_json:
         try:
+            started = time.perf_counter()
             data = request.get_json()
-            # Convert to pandas DataFrame
-            df = pd.DataFrame([data])
-            # Make prediction using the XGBoost predictor
-            # This will modify df in-place and return numpy array
-            predicted_df = predictor.predict(df)
-            predictions = predicted_df["prediction"].values
-
-            # df now contains 'predict_proba' and 'prediction' columns
-            print(f"Binary predictions: {predictions}")
+            parsed = time.perf_counter()
+            service_metrics.observe_stage("/predict", "parse", parsed - started)
+            payload = score_record(data)
 
             # Return JSON response
-            return jsonify(
-                {
-                    "prediction": predictions[0].item(),  # Convert to Python bool/int
-                    "status": "success",
-                }
+            scored = time.perf_counter()
+            response = jsonify(payload)
+            service_metrics.observe_stage(
+                "/predict", "serialize", time.perf_counter() - scored
             )
+            return with_model_version(response, payload["model_version"])
         except (ValueError, TypeError, KeyError) as e:
-            return jsonify({"error": str(e)}), 400
+            return jsonify(error_payload(e)), 400
     else:
         return jsonify({"error": "Request must be JSON"}), 400
 
 
+@app.route("/predict_batch", methods=["POST"])
+def predict_batch_api():
+    try:
+        started = time.perf_counter()
+        records = parse_batch_body(request.get_data(), request.mimetype)
+        parsed = time.perf_counter()
+        service_metrics.observe_stage("/predict_batch", "parse", parsed - started)
+        payload, status = score_batch(records)
+
+        scored = time.perf_counter()
+        response = jsonify(payload)
+        service_metrics.observe_stage(
+            "/predict_batch", "serialize", time.perf_counter() - scored
+        )
+        return with_model_version(response, payload.get("model_version")), status
+    except (ValueError, TypeError, KeyError) as e:
+        return jsonify(error_payload(e)), 400
+
+
+@app.route("/predict_bulk", methods=["POST"])
+def predict_bulk_api():
+    try:
+        started = time.perf_counter()
+        table = read_bulk_body(request.get_data(), request.mimetype)
+        parsed = time.perf_counter()
+        service_metrics.observe_stage("/predict_bulk", "parse", parsed - started)
+        result, status = score_bulk(table)
+        if status != 200:
+            return jsonify(result), status
+
+        scored = time.perf_counter()
+        response = Response(
+            write_bulk_body(result, request.mimetype), mimetype=request.mimetype
+        )
+        service_metrics.observe_stage(
+            "/predict_bulk", "serialize", time.perf_counter() - scored
+        )
+        return with_model_version(response, bulk_model_version(result))
+    except (ValueError, TypeError, KeyError) as e:
+        return jsonify(error_payload(e)), 400
+
+
+@app.route("/explain", methods=["POST"])
+def explain_api():
+    if not request.is_json:
+        return jsonify({"error": "Request must be JSON"}), 400
+    try:
+        started = time.perf_counter()
+        data = request.get_json()
+        service_metrics.observe_stage(
+            "/explain", "parse", time.perf_counter() - started
+        )
+        payload = explain_record(data)
+
+        scored = time.perf_counter()
+        response = jsonify(payload)
+        service_metrics.observe_stage(
+            "/explain", "serialize", time.perf_counter() - scored
+        )
+        return with_model_version(response, payload["model_version"])
+    except (ValueError, TypeError, KeyError) as e:
+        return jsonify(error_payload(e)), 400
+
+
+@app.route("/explain_batch", methods=["POST"])
+def explain_batch_api():
+    try:
+        started = time.perf_counter()
+        records = parse_batch_body(request.get_data(), request.mimetype)
+        service_metrics.observe_stage(
+            "/explain_batch", "parse", time.perf_counter() - started
+        )
+        payload, status = explain_batch(records)
+
+        scored = time.perf_counter()
+        response = jsonify(payload)
+        service_metrics.observe_stage(
+            "/explain_batch", "serialize", time.perf_counter() - scored
+        )
+        return with_model_version(response, payload.get("model_version")), status
+    except (ValueError, TypeError, KeyError) as e:
+        return jsonify(error_payload(e)), 400
+
+
+# Last, so warmup requests reach a fully set up app
+if not preload:
+    start_worker()
+
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=9696, debug=True)
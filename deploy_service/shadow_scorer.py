@@ -0,0 +1,226 @@
+import logging
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+import pyarrow as pa
+
+logger = logging.getLogger(__name__)
+
+# Niceness added to the shadow thread (Linux applies it to the thread
+# alone). At 19 a saturated CPU gives the challenger about 1.5% of the time
+# a request thread gets, so it scores what spare CPU allows and the backlog
+# limit drops the rest, instead of taking its share from the champion.
+SHADOW_NICENESS = 19
+
+
+def _lower_priority() -> None:
+    try:
+        os.setpriority(
+            os.PRIO_PROCESS,
+            threading.get_native_id(),
+            os.getpriority(os.PRIO_PROCESS, 0) + SHADOW_NICENESS,
+        )
+    except (AttributeError, OSError):
+        pass  # Not supported here; the thread runs at normal priority
+
+
+class ShadowScorer:
+    """
+    Score requests with a challenger model off the response path.
+
+    submit() only queues a reference to the records the champion already
+    scored; a background thread scores them with the challenger and writes
+    its output to the prediction log with model_role "challenger" and the
+    champion's request id, so the two can be compared row by row.
+
+    The thread wakes at most once per max_delay and scores everything
+    queued since in one challenger call, instead of competing with the
+    request threads for the CPU and the GIL on every request. It also runs
+    at a lower scheduling priority.
+
+    The challenger never delays a response: the backlog is bounded by
+    max_pending_rows, and records submitted beyond it are dropped and
+    counted rather than queued. A failing challenger is logged and counted,
+    and the requests it shadows are unaffected.
+    """
+
+    def __init__(
+        self,
+        challenger,
+        prediction_logger,
+        request_schema,
+        max_pending_rows=10000,
+        max_batch_rows=2048,
+        max_delay=0.05,
+        on_outcome=None,
+    ):
+        """
+        Args:
+            challenger: xgb_model loaded from the challenger alias
+            prediction_logger: PredictionLogger the challenger's rows go to
+            request_schema: RequestSchema decoding columnar batches
+            max_pending_rows: Rows waiting for the challenger before new
+                rows are dropped
+            max_batch_rows: Most rows scored in one challenger call
+            max_delay: Seconds queued rows wait to be batched with later ones
+            on_outcome: Optional callable receiving ("scored", "dropped" or
+                "failed", number of rows)
+        """
+        self.challenger = challenger
+        self.prediction_logger = prediction_logger
+        self.request_schema = request_schema
+        self.max_pending_rows = max_pending_rows
+        self.max_batch_rows = max_batch_rows
+        self.max_delay = max_delay
+        self.on_outcome = on_outcome
+
+        self.scored_rows = 0
+        self.dropped_rows = 0
+        self.failed_rows = 0
+
+        self._pending_rows = 0
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._run, name="shadow-scorer", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, records, endpoint, request_id) -> bool:
+        """
+        Queue records for the challenger without waiting for it.
+
+        Args:
+            records: Validated request records as dicts, or a pyarrow.Table
+                of valid rows, as the champion scored them
+            endpoint: Route the records arrived on
+            request_id: Identifier the champion's rows were logged with
+
+        Returns:
+            bool: False if the records were dropped because the backlog is
+                full
+        """
+        n_rows = len(records)
+        with self._lock:
+            if self._pending_rows + n_rows > self.max_pending_rows:
+                self.dropped_rows += n_rows
+                dropped = True
+            else:
+                self._pending_rows += n_rows
+                dropped = False
+
+        if dropped:
+            self._report("dropped", n_rows)
+            return False
+        self._queue.put((records, endpoint, request_id))
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = self._pending_rows
+        return {
+            "challenger_version": getattr(self.challenger, "registry_version", None),
+            "scored_rows": self.scored_rows,
+            "dropped_rows": self.dropped_rows,
+            "failed_rows": self.failed_rows,
+            "pending_rows": pending,
+        }
+
+    def stop(self, timeout=None) -> None:
+        """Score everything queued and stop the thread."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        _lower_priority()
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            # Let the requests arriving meanwhile join this batch
+            time.sleep(self.max_delay)
+            batch = [item]
+            n_rows = len(item[0])
+            stopping = False
+            while n_rows < self.max_batch_rows:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+                n_rows += len(item[0])
+
+            self._score_batch(batch)
+            if stopping:
+                return
+
+    def _score_batch(self, batch) -> None:
+        # Record lists are scored together; Arrow tables one by one, in the
+        # challenger's feature order
+        listed = [item for item in batch if not isinstance(item[0], pa.Table)]
+        if listed:
+            self._score(listed, self._score_records)
+        for item in batch:
+            if isinstance(item[0], pa.Table):
+                self._score([item], self._score_table)
+
+    def _score_records(self, items):
+        records = [record for item_records, _, _ in items for record in item_records]
+        predicted = self.challenger.predict_records(records)
+        return predicted["prediction"], predicted["predict_proba"]
+
+    def _score_table(self, items):
+        encoded, errors = self.request_schema.decode_table(
+            items[0][0], self.challenger.encoder.feature_names
+        )
+        if errors:
+            raise ValueError(f"{len(errors)} rows invalid for the challenger")
+        probabilities = self.challenger.predict_encoded(encoded)
+        return (probabilities > self.challenger.threshold).astype(
+            np.int8
+        ), probabilities
+
+    def _score(self, items, score) -> None:
+        n_rows = sum(len(item[0]) for item in items)
+        outcome = "failed"
+        try:
+            started = time.perf_counter()
+            predictions, probabilities = score(items)
+            latency = time.perf_counter() - started
+
+            offset = 0
+            for records, endpoint, request_id in items:
+                end = offset + len(records)
+                self.prediction_logger.log(
+                    records,
+                    predictions[offset:end],
+                    probabilities[offset:end],
+                    self.challenger.registry_version,
+                    latency,
+                    endpoint,
+                    request_id=request_id,
+                    model_role="challenger",
+                )
+                offset = end
+            outcome = "scored"
+        except Exception as e:
+            logger.error(f"Challenger failed to score {n_rows} records: {str(e)}")
+        finally:
+            with self._lock:
+                self._pending_rows -= n_rows
+                if outcome == "scored":
+                    self.scored_rows += n_rows
+                else:
+                    self.failed_rows += n_rows
+        self._report(outcome, n_rows)
+
+    def _report(self, outcome, n_rows) -> None:
+        if self.on_outcome is not None:
+            self.on_outcome(outcome, n_rows)
@@ -0,0 +1,119 @@
+import logging
+import time
+
+import numpy as np
+import pyarrow as pa
+from predict_function import CATEGORICAL_LEVELS, FEATURE_COLUMNS
+from request_schema import NUMERIC_LIMITS
+
+logger = logging.getLogger(__name__)
+
+ARROW_STREAM_MIMETYPE = "application/vnd.apache.arrow.stream"
+
+
+def synthetic_records(n_records, seed=0) -> list:
+    """
+    Valid patient records for exercising the scoring path.
+
+    Category levels are cycled so every level appears once n_records
+    reaches the longest level list; numeric fields are drawn inside
+    NUMERIC_LIMITS.
+    """
+    rng = np.random.default_rng(seed)
+    records = []
+    for i in range(n_records):
+        record = {}
+        for col in FEATURE_COLUMNS:
+            if col in CATEGORICAL_LEVELS:
+                levels = CATEGORICAL_LEVELS[col]
+                record[col] = levels[i % len(levels)]
+            else:
+                low, high = NUMERIC_LIMITS[col]
+                record[col] = int(rng.integers(low, high + 1))
+        records.append(record)
+    return records
+
+
+def _arrow_stream(records) -> bytes:
+    table = pa.Table.from_pylist(records)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def run_warmup(client, n_requests=20, batch_size=64) -> dict:
+    """
+    Send synthetic requests through the app before it takes traffic.
+
+    Lazy initialization in Flask, the JSON and Arrow decoders, the schema
+    and the model (XGBoost's prediction cache and thread pool) then happens
+    here rather than in the first real requests.
+
+    Args:
+        client: Flask test client for the app, so requests go through the
+            full routing, parsing, validation, scoring and serialization
+        n_requests: /predict requests to send
+        batch_size: Records in one /predict_batch and one /predict_bulk
+            request (0 skips both)
+
+    Returns:
+        dict: Requests sent, total seconds, and the first, median and last
+            /predict latencies in milliseconds
+
+    Raises:
+        RuntimeError: If a warmup request does not succeed
+    """
+    records = synthetic_records(max(n_requests, batch_size))
+    started = time.perf_counter()
+
+    latencies = []
+    for record in records[:n_requests]:
+        sent = time.perf_counter()
+        response = client.post("/predict", json=record)
+        latencies.append((time.perf_counter() - sent) * 1000)
+        if response.status_code != 200:
+            raise RuntimeError(
+                f"Warmup /predict returned {response.status_code}: "
+                f"{response.get_data(as_text=True)[:200]}"
+            )
+
+    if batch_size:
+        batch = records[:batch_size]
+        for path, kwargs in (
+            ("/predict_batch", {"json": batch}),
+            (
+                "/predict_bulk",
+                {"data": _arrow_stream(batch), "content_type": ARROW_STREAM_MIMETYPE},
+            ),
+        ):
+            response = client.post(path, **kwargs)
+            if response.status_code != 200:
+                raise RuntimeError(
+                    f"Warmup {path} returned {response.status_code}: "
+                    f"{response.get_data(as_text=True)[:200]}"
+                )
+
+    summary = {
+        "requests": n_requests + (2 if batch_size else 0),
+        "seconds": round(time.perf_counter() - started, 4),
+    }
+    if latencies:
+        summary["first_ms"] = round(latencies[0], 3)
+        summary["p50_ms"] = round(float(np.median(latencies)), 3)
+        summary["last_ms"] = round(latencies[-1], 3)
+    logger.info(f"Warmup finished: {summary}")
+    return summary
+
+
+def warm_predictor(predictor, n_records=64) -> None:
+    """
+    Score synthetic records with a predictor before it serves traffic.
+
+    Used for hot-swapped models, which go live without passing through
+    run_warmup.
+    """
+    records = synthetic_records(n_records)
+    for record in records[:8]:
+        predictor.predict(record)
+    predictor.predict(records)
@@ -1,5 +1,5 @@
 import os
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
 import mlflow
 import numpy as np
@@ -18,6 +18,7 @@ from evidently.presets import ClassificationPreset, DataDriftPreset
 # Import our custom utility functions
 from ml_function import (
     create_dataset,
+    load_prediction_log,
     prepare_data_function,
     preprocess_pd,
     setup_evidently_cloud,
@@ -126,6 +127,31 @@ def ml_monitoring_pipeline():
         my_eval = report.run(eval_X_test, eval_X_ref)
         ws.add_run(project.id, my_eval, include_data=False)
 
+        # Drift of live traffic captured by the service's prediction log
+        prediction_log_dir = os.getenv("PREDICTION_LOG_DIR")
+        if prediction_log_dir:
+            logged = load_prediction_log(
+                prediction_log_dir, since=datetime.now(timezone.utc) - timedelta(days=7)
+            )
+            if logged is not None:
+                columns = list(X_ref.columns) + ["predict_proba", "prediction"]
+                production = preprocess_pd(logged[columns].copy())
+                drift_schema = DataDefinition(
+                    numerical_columns=numerical_cols,
+                    categorical_columns=categorical_cols + ["prediction"],
+                )
+                eval_production = Dataset.from_pandas(
+                    production, data_definition=drift_schema
+                )
+                eval_reference = Dataset.from_pandas(
+                    predicted_X_ref[columns], data_definition=drift_schema
+                )
+                report = Report(
+                    [DataDriftPreset()], include_tests=True, tags=["Production_Drift"]
+                )
+                my_eval = report.run(eval_production, eval_reference)
+                ws.add_run(project.id, my_eval, include_data=False)
+
         return "Monitoring reports uploaded successfully"
 
     # Single task execution
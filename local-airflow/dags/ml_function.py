@@ -3,9 +3,18 @@ ML Pipeline Utility Functions
 Contains reusable functions for data processing and model training
 """
 
+import functools
+import json
 import logging
+import multiprocessing
 import os
 import pickle
+import queue
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
 
 import mlflow
 import mlflow.xgboost
@@ -20,6 +29,7 @@ from evidently.presets import ClassificationPreset, DataDriftPreset, DataSummary
 from evidently.sdk.models import PanelMetric
 from evidently.sdk.panels import DashboardPanelPlot
 from evidently.ui.workspace import CloudWorkspace
+from mlflow.entities import Metric, Param
 from mlflow.models import infer_signature
 from sklearn.metrics import roc_auc_score
 from sklearn.model_selection import train_test_split
@@ -29,6 +39,40 @@ from sklearn.preprocessing import LabelEncoder
 load_dotenv()
 logger = logging.getLogger(__name__)
 
+# Serving bundle layout, kept in step with deploy_service/model_bundle.py
+BUNDLE_FORMAT_VERSION = 2
+BUNDLE_ARTIFACT_PATH = "bundle"
+DECISION_THRESHOLD = 0.5
+
+# Early stopping: rows of the training set held out to evaluate each
+# boosting round, and rounds without improvement before a trial stops
+VALIDATION_FRACTION = 0.2
+EARLY_STOPPING_ROUNDS = 20
+
+# Trial logging: "eager" logs each trial's params, metrics and model as it
+# finishes; "deferred" batches params and metrics on a background thread
+# and logs models only for the TRIAL_LOG_TOP_K best trials at the end
+TRIAL_LOG_MODES = ("eager", "deferred")
+DEFAULT_TOP_K = 3
+
+# Hyperparameters objective_xgboost searches, and the trial user attributes
+# naming the pipeline run a trial belongs to in a resumed study and the
+# attempt (one train_xgboost_with_optuna call) that ran it
+SEARCH_PARAMS = (
+    "n_estimators",
+    "max_depth",
+    "learning_rate",
+    "subsample",
+    "colsample_bytree",
+    "reg_alpha",
+    "reg_lambda",
+)
+RUN_KEY_ATTR = "pipeline_run"
+ATTEMPT_KEY_ATTR = "pipeline_attempt"
+
+# Objective arguments and logging settings in each Optuna worker process
+_worker_args = None
+
 
 def create_dataset(n_samples=1000):
     """Create synthetic dataset for ML pipeline"""
@@ -87,6 +131,473 @@ def prepare_data_function(dat):
     return {"X_train": X_train, "X_test": X_test, "y_train": y_train, "y_test": y_test}
 
 
+def available_cpus():
+    """CPUs this process may run on"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def trial_threads(n_workers):
+    """XGBoost threads per trial so n_workers concurrent trials fill the CPUs once"""
+    return max(1, available_cpus() // n_workers)
+
+
+def open_study_storage(storage):
+    """
+    Optuna storage for a database URL or a journal file path
+
+    A journal file (optuna's JournalFileBackend) is safe for processes on
+    one machine to share without a database server; SQLite URLs also work
+    but serialize writers on the database lock.
+    """
+    if "://" in storage:
+        return storage
+    return optuna.storages.JournalStorage(
+        optuna.storages.journal.JournalFileBackend(storage)
+    )
+
+
+def make_pruner(name):
+    """
+    Optuna pruner by name
+
+    "median" stops a trial whose validation AUC at a round is below the
+    median of earlier trials at that round; "halving" is successive halving
+    over boosting rounds; "none" runs every trial to its stopping point.
+    """
+    if name == "median":
+        # Compare only once a few trials have finished, and past the
+        # noisy first rounds
+        return optuna.pruners.MedianPruner(n_startup_trials=5, n_warmup_steps=10)
+    if name == "halving":
+        return optuna.pruners.SuccessiveHalvingPruner(min_resource=10)
+    if name == "none":
+        return optuna.pruners.NopPruner()
+    raise ValueError(f"Unknown pruner '{name}', expected median, halving or none")
+
+
+def tagged_trials(study, attr, key, states):
+    """The study's trials in the given states whose user attribute attr is key"""
+    return [
+        trial
+        for trial in study.get_trials(deepcopy=False, states=states)
+        if trial.user_attrs.get(attr) == key
+    ]
+
+
+def champion_params(model_name, alias="champion"):
+    """
+    Searched hyperparameters of the run behind a registered model alias
+
+    Params are logged as strings, so each is parsed back to an int or a
+    float for Optuna.
+
+    Returns:
+        dict: SEARCH_PARAMS values, or None if the alias or its run's
+        params can't be read (e.g. before the first model is registered)
+    """
+    try:
+        client = mlflow.MlflowClient()
+        run_id = client.get_model_version_by_alias(model_name, alias).run_id
+        logged = client.get_run(run_id).data.params
+    except Exception as e:
+        logger.warning(f"No {model_name}@{alias} params to warm start: {str(e)}")
+        return None
+
+    params = {}
+    for name in SEARCH_PARAMS:
+        if name not in logged:
+            logger.warning(f"{model_name}@{alias} run has no '{name}' param")
+            return None
+        try:
+            params[name] = int(logged[name])
+        except ValueError:
+            params[name] = float(logged[name])
+    return params
+
+
+class OptunaPruningCallback(xgb.callback.TrainingCallback):
+    """Report each round's validation AUC to Optuna and stop pruned trials"""
+
+    def __init__(self, trial):
+        self.trial = trial
+        self.rounds = 0
+
+    def after_iteration(self, model, epoch, evals_log):
+        self.rounds = epoch + 1
+        self.trial.report(evals_log["validation_0"]["auc"][-1], step=epoch)
+        if self.trial.should_prune():
+            raise optuna.TrialPruned(f"Pruned after {self.rounds} boosting rounds")
+        return False
+
+
+def build_matrices(X_train, y_train, X_valid, y_valid, n_jobs):
+    """
+    Quantized training and validation matrices for every trial to train on
+
+    Fitting XGBClassifier on a frame sketches and bins every feature again
+    in each trial; a QuantileDMatrix does it once and trials only train.
+    The validation matrix is binned with the training matrix's cuts (ref),
+    as the sklearn wrapper does for its eval_set.
+
+    Returns:
+        tuple: (dtrain, dvalid) QuantileDMatrix objects
+    """
+    dtrain = xgb.QuantileDMatrix(
+        X_train, y_train, enable_categorical=True, nthread=n_jobs
+    )
+    dvalid = xgb.QuantileDMatrix(
+        X_valid, y_valid, ref=dtrain, enable_categorical=True, nthread=n_jobs
+    )
+    return dtrain, dvalid
+
+
+def truncate_to_best_iteration(booster):
+    """
+    Drop the rounds trained after the best one under early stopping
+
+    XGBClassifier.predict stops at best_iteration, but the booster the
+    serving engines and bundle use scores every tree, so keep only the
+    trees up to it.
+
+    Returns:
+        xgb.Booster: The booster, cut after its best round
+    """
+    best_iteration = getattr(booster, "best_iteration", None)
+    if best_iteration is None:
+        return booster
+    return booster[: best_iteration + 1]
+
+
+class TrialLogger:
+    """
+    Log Optuna trials to MLflow off the trial's thread
+
+    log() only queues a trial's params, metrics and tags; a background
+    thread creates its run and sends them in one log_batch call, so a
+    trial costs three tracking requests instead of one per value and the
+    next trial starts at once. A failed request is logged and counted
+    without failing the search.
+    """
+
+    def __init__(self, experiment_id):
+        self.experiment_id = experiment_id
+        self.client = mlflow.MlflowClient()
+        self.run_ids = {}
+        self.failed = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._run, name="trial-logger", daemon=True
+        )
+        self._thread.start()
+
+    def log(self, trial_number, params, metrics, tags, status="FINISHED"):
+        """Queue a finished or pruned trial's run"""
+        self._queue.put((trial_number, params, metrics, tags, status))
+
+    def stop(self):
+        """Log everything queued and stop the thread"""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            trial_number, params, metrics, tags, status = item
+            try:
+                run_id = self.client.create_run(
+                    self.experiment_id, tags=tags
+                ).info.run_id
+                timestamp = int(time.time() * 1000)
+                self.client.log_batch(
+                    run_id,
+                    metrics=[
+                        Metric(key, float(value), timestamp, 0)
+                        for key, value in metrics.items()
+                    ],
+                    params=[Param(key, str(value)) for key, value in params.items()],
+                )
+                self.client.set_terminated(run_id, status=status)
+                self.run_ids[trial_number] = run_id
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Failed to log trial {trial_number}: {str(e)}")
+
+
+class TopModels:
+    """The k best models trained in this process, by objective value"""
+
+    def __init__(self, k):
+        self.k = k
+        self._models = []
+
+    def offer(self, value, trial_number, model):
+        self._models.append((value, trial_number, model))
+        self._models.sort(key=lambda item: item[0], reverse=True)
+        del self._models[self.k :]
+
+    def best(self):
+        return list(self._models)
+
+
+def log_trial_model(model, X_train, signature):
+    """Log a trial's model and serving bundle to the active MLflow run"""
+    # Log the XGBoost model using sklearn format
+    mlflow.sklearn.log_model(
+        sk_model=model, artifact_path="xgboost_model", signature=signature
+    )
+    # Booster and feature spec for serving without the pickle
+    log_model_bundle(model, X_train)
+
+
+def log_top_models(study, trial_logger, top_models, X_train, signature, k, attempt_key):
+    """
+    Log the models of this process's trials that are among the attempt's k best
+
+    Only trials of attempt_key compete: models live in the processes that
+    trained them, so trials of a failed earlier attempt at the run, or of
+    earlier runs of a resumed study, have none left to log and must not
+    crowd this attempt's models out. A trial outside the top k now cannot
+    enter it later, so with several workers each logs at most k models and
+    together they cover the attempt's final top k.
+    """
+    finished = tagged_trials(
+        study, ATTEMPT_KEY_ATTR, attempt_key, (optuna.trial.TrialState.COMPLETE,)
+    )
+    finished.sort(key=lambda trial: trial.value, reverse=True)
+    keep = {trial.number for trial in finished[:k]}
+    for _, trial_number, model in top_models.best():
+        run_id = trial_logger.run_ids.get(trial_number)
+        if trial_number not in keep or run_id is None:
+            continue
+        with mlflow.start_run(run_id=run_id):
+            log_trial_model(model, X_train, signature)
+
+
+def objective_xgboost(
+    trial,
+    X_train,
+    dtrain,
+    dvalid,
+    X_test,
+    y_test,
+    experiment_id,
+    n_jobs,
+    early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+    signature=None,
+    run_key=None,
+    attempt_key=None,
+    trial_logger=None,
+    top_models=None,
+):
+    """
+    Objective function for XGBoost hyperparameter tuning
+
+    Trials train with the native API on the matrices from build_matrices
+    (X_train is the frame dtrain was built from, kept for the signature and
+    bundle). The booster is then loaded into an XGBClassifier with the
+    trial's params, so the logged model is the same sklearn model as before.
+
+    n_estimators is the most boosting rounds a trial may train. Each round
+    is evaluated on the validation split: training stops early when the
+    AUC has not improved for early_stopping_rounds, and Optuna's pruner
+    stops trials that trail earlier ones. The test split only scores the
+    finished model.
+
+    Without a trial_logger the trial's run, model and bundle are logged
+    before it returns, inferring the signature unless one is given. With
+    one, the run goes to trial_logger and the model to top_models, to be
+    logged at the end if it is among the best (see TrialLogger).
+
+    The seconds spent fitting, evaluating and logging are recorded in the
+    trial's "timings" user attribute, and run_key and attempt_key in its
+    RUN_KEY_ATTR and ATTEMPT_KEY_ATTR ones.
+    """
+    trial.set_user_attr(RUN_KEY_ATTR, run_key)
+    trial.set_user_attr(ATTEMPT_KEY_ATTR, attempt_key)
+    params = {
+        "n_estimators": trial.suggest_int("n_estimators", 50, 300),
+        "max_depth": trial.suggest_int("max_depth", 3, 10),
+        "learning_rate": trial.suggest_float("learning_rate", 0.01, 0.3),
+        "subsample": trial.suggest_float("subsample", 0.6, 1.0),
+        "colsample_bytree": trial.suggest_float("colsample_bytree", 0.6, 1.0),
+        "reg_alpha": trial.suggest_float("reg_alpha", 0, 10),
+        "reg_lambda": trial.suggest_float("reg_lambda", 0, 10),
+        "random_state": 42,
+    }
+    timings = {}
+
+    # The sklearn params under their native names, with the defaults
+    # XGBClassifier would add
+    booster_params = {
+        key: value
+        for key, value in params.items()
+        if key not in ("n_estimators", "random_state")
+    }
+    booster_params.update(
+        objective="binary:logistic",
+        eval_metric="auc",
+        tree_method="hist",
+        seed=params["random_state"],
+        nthread=n_jobs,
+    )
+    pruning = OptunaPruningCallback(trial)
+    evals_result = {}
+    started = time.perf_counter()
+    try:
+        booster = xgb.train(
+            booster_params,
+            dtrain,
+            num_boost_round=params["n_estimators"],
+            evals=[(dvalid, "validation_0")],
+            early_stopping_rounds=early_stopping_rounds,
+            evals_result=evals_result,
+            verbose_eval=False,
+            callbacks=[pruning],
+        )
+    except optuna.TrialPruned:
+        timings["fit"] = time.perf_counter() - started
+        trial.set_user_attr("n_boosting_rounds", pruning.rounds)
+        started = time.perf_counter()
+        metrics = {"n_boosting_rounds": pruning.rounds}
+        tags = {"model_type": "XGBoost", "optuna_state": "pruned"}
+        if trial_logger is not None:
+            trial_logger.log(trial.number, params, metrics, tags, status="KILLED")
+        else:
+            with mlflow.start_run(experiment_id=experiment_id):
+                log_trial_run(params, metrics, tags)
+                mlflow.end_run(status="KILLED")
+        timings["log"] = time.perf_counter() - started
+        trial.set_user_attr("timings", timings)
+        raise
+    timings["fit"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    validation_auc = evals_result["validation_0"]["auc"]
+    booster = truncate_to_best_iteration(booster)
+    n_boosting_rounds = booster.num_boosted_rounds()
+    trial.set_user_attr("n_boosting_rounds", n_boosting_rounds)
+    xgb_model = xgb.XGBClassifier(
+        **params,
+        enable_categorical=True,
+        n_jobs=n_jobs,
+        eval_metric="auc",
+        early_stopping_rounds=early_stopping_rounds,
+    )
+    xgb_model.load_model(bytearray(booster.save_raw("ubj")))
+    y_predict = xgb_model.predict_proba(X_test)[:, 1]
+
+    roc_auc = roc_auc_score(y_true=y_test, y_score=y_predict)
+    metrics = {
+        "roc_auc": roc_auc,
+        "n_boosting_rounds": n_boosting_rounds,
+        "validation_auc": validation_auc[n_boosting_rounds - 1],
+    }
+    tags = {"model_type": "XGBoost"}
+    timings["evaluate"] = time.perf_counter() - started
+
+    if trial_logger is not None:
+        started = time.perf_counter()
+        trial_logger.log(trial.number, params, metrics, tags)
+        top_models.offer(roc_auc, trial.number, xgb_model)
+        timings["log"] = time.perf_counter() - started
+    else:
+        if signature is None:
+            # Infer model signature
+            started = time.perf_counter()
+            signature = infer_signature(X_train, xgb_model.predict(X_train))
+            timings["signature"] = time.perf_counter() - started
+        started = time.perf_counter()
+        with mlflow.start_run(experiment_id=experiment_id):
+            log_trial_run(params, metrics, tags)
+            log_trial_model(xgb_model, X_train, signature)
+        timings["log"] = time.perf_counter() - started
+    trial.set_user_attr("timings", timings)
+
+    return roc_auc
+
+
+def log_trial_run(params, metrics, tags):
+    """Log a trial's values to the active MLflow run, one request each"""
+    # Manual logging of hyperparameters
+    for param_name, param_value in params.items():
+        mlflow.log_param(param_name, param_value)
+
+    # Log metrics
+    for metric_name, metric_value in metrics.items():
+        mlflow.log_metric(metric_name, metric_value)
+    mlflow.set_tags(tags)
+
+
+def run_trials(study, objective_args, n_trials, log_mode, top_k):
+    """Run trials of a study in this process, logging them as log_mode says"""
+    # Quantize the splits once for all of this process's trials. DMatrix
+    # objects don't pickle, so each worker builds its own from the frames
+    objective_args = dict(objective_args)
+    y_train = objective_args.pop("y_train")
+    X_valid = objective_args.pop("X_valid")
+    y_valid = objective_args.pop("y_valid")
+    started = time.perf_counter()
+    objective_args["dtrain"], objective_args["dvalid"] = build_matrices(
+        objective_args["X_train"], y_train, X_valid, y_valid, objective_args["n_jobs"]
+    )
+    print(f"Built training matrices in {time.perf_counter() - started:.1f}s")
+
+    if log_mode == "eager":
+        study.optimize(
+            functools.partial(objective_xgboost, **objective_args), n_trials=n_trials
+        )
+        return
+
+    trial_logger = TrialLogger(objective_args["experiment_id"])
+    top_models = TopModels(top_k)
+    try:
+        study.optimize(
+            functools.partial(
+                objective_xgboost,
+                **objective_args,
+                trial_logger=trial_logger,
+                top_models=top_models,
+            ),
+            n_trials=n_trials,
+        )
+    finally:
+        trial_logger.stop()
+
+    started = time.perf_counter()
+    log_top_models(
+        study,
+        trial_logger,
+        top_models,
+        objective_args["X_train"],
+        objective_args["signature"],
+        top_k,
+        objective_args["attempt_key"],
+    )
+    print(f"Logged top {top_k} models in {time.perf_counter() - started:.1f}s")
+
+
+def _init_trial_worker(mlflow_uri, objective_args, log_mode, top_k):
+    global _worker_args
+    mlflow.set_tracking_uri(mlflow_uri)
+    _worker_args = (objective_args, log_mode, top_k)
+
+
+def _run_trials(study_name, storage, pruner, n_trials):
+    study = optuna.load_study(
+        study_name=study_name,
+        storage=open_study_storage(storage),
+        pruner=make_pruner(pruner),
+    )
+    objective_args, log_mode, top_k = _worker_args
+    run_trials(study, objective_args, n_trials, log_mode, top_k)
+
+
 def train_xgboost_with_optuna(
     X_train,
     y_train,
@@ -95,10 +606,33 @@ def train_xgboost_with_optuna(
     mlflow_uri=None,
     experiment_name="ml_pipeline_experiment",
     n_trials=50,
+    n_workers=None,
+    storage=None,
+    pruner=None,
+    early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+    log_mode=None,
+    top_k=None,
+    study_name=None,
+    run_key=None,
+    warm_start_model=None,
 ):
     """
     Train XGBoost with Optuna hyperparameter optimization
 
+    The study is kept under study_name and resumed if storage already holds
+    it, so a new pipeline run keeps searching from everything earlier runs
+    tried. Each trial records the run_key it ran for: a retried task with
+    the same key only runs the trials its earlier attempts didn't finish.
+    In "deferred" mode the retry logs the models of its own top k trials;
+    those of a failed attempt died with its processes.
+    The search starts with the hyperparameters of warm_start_model's
+    champion unless the study has already tried them.
+
+    With n_workers > 1 the trials run in that many worker processes sharing
+    the study through storage, and each trial trains with
+    trial_threads(n_workers) XGBoost threads so the workers together use
+    every CPU once instead of oversubscribing them.
+
     Args:
         X_train: Training features
         y_train: Training target
@@ -107,14 +641,54 @@ def train_xgboost_with_optuna(
         mlflow_uri: MLflow tracking server URI
         experiment_name: MLflow experiment name
         n_trials: Number of Optuna trials
+        n_workers: Worker processes running trials (defaults to the
+            OPTUNA_N_WORKERS environment variable, else 1)
+        storage: Optuna database URL or journal file path the study is kept
+            in (defaults to OPTUNA_STORAGE; without it the study is kept in
+            memory, or in a temporary journal file with several workers)
+        pruner: "median", "halving" or "none" (defaults to OPTUNA_PRUNER,
+            else "median"); see make_pruner
+        early_stopping_rounds: Rounds without validation improvement before
+            a trial stops training (None trains all n_estimators rounds)
+        log_mode: "eager" or "deferred" (defaults to TRIAL_LOG_MODE, else
+            "eager"); see objective_xgboost
+        top_k: Trials whose models are logged in "deferred" mode (defaults
+            to TRIAL_LOG_TOP_K, else DEFAULT_TOP_K)
+        study_name: Name the study is kept under in storage (defaults to
+            OPTUNA_STUDY_NAME, else experiment_name)
+        run_key: Identifies the pipeline run, e.g. the Airflow run_id, so
+            retries resume it (defaults to a new key for every call)
+        warm_start_model: Registered model whose "champion" alias's params
+            are enqueued as the first trial (defaults to
+            OPTUNA_WARM_START_MODEL, else "mlops_project"; "" disables it)
 
     Returns:
-        Best ROC AUC score from optimization
+        Best ROC AUC score among this run's trials
     """
 
     # Set MLflow tracking - use environment variable if mlflow_uri not provided
     if mlflow_uri is None:
         mlflow_uri = os.getenv("MLFLOW_TRACKING_URI", "http://localhost:5000")
+    if n_workers is None:
+        n_workers = int(os.getenv("OPTUNA_N_WORKERS", "1"))
+    if storage is None:
+        storage = os.getenv("OPTUNA_STORAGE") or None
+    if pruner is None:
+        pruner = os.getenv("OPTUNA_PRUNER", "median")
+    if log_mode is None:
+        log_mode = os.getenv("TRIAL_LOG_MODE", "eager")
+    if top_k is None:
+        top_k = int(os.getenv("TRIAL_LOG_TOP_K", str(DEFAULT_TOP_K)))
+    if study_name is None:
+        study_name = os.getenv("OPTUNA_STUDY_NAME") or experiment_name
+    if run_key is None:
+        run_key = uuid.uuid4().hex
+    if warm_start_model is None:
+        warm_start_model = os.getenv("OPTUNA_WARM_START_MODEL", "mlops_project")
+    if log_mode not in TRIAL_LOG_MODES:
+        raise ValueError(
+            f"Unknown trial log mode '{log_mode}', expected one of {TRIAL_LOG_MODES}"
+        )
 
     mlflow.set_tracking_uri(mlflow_uri)
     print(f"Using MLflow URI: {mlflow_uri}")
@@ -138,49 +712,131 @@ def train_xgboost_with_optuna(
         else:
             raise Exception("Failed to create or find experiment")
 
-    def objective_xgboost(trial):
-        """Objective function for XGBoost hyperparameter tuning"""
-        params = {
-            "n_estimators": trial.suggest_int("n_estimators", 50, 300),
-            "max_depth": trial.suggest_int("max_depth", 3, 10),
-            "learning_rate": trial.suggest_float("learning_rate", 0.01, 0.3),
-            "subsample": trial.suggest_float("subsample", 0.6, 1.0),
-            "colsample_bytree": trial.suggest_float("colsample_bytree", 0.6, 1.0),
-            "reg_alpha": trial.suggest_float("reg_alpha", 0, 10),
-            "reg_lambda": trial.suggest_float("reg_lambda", 0, 10),
-            "random_state": 42,
-        }
-
-        with mlflow.start_run(experiment_id=experiment_id) as run:
-            xgb_model = xgb.XGBClassifier(**params, enable_categorical=True)
-            xgb_model.fit(X_train, y_train)
-            y_predict = xgb_model.predict_proba(X_test)[:, 1]
+    # Hold out the validation split once, so every trial stops and is
+    # pruned on the same rows
+    X_fit, X_valid, y_fit, y_valid = train_test_split(
+        X_train,
+        y_train,
+        test_size=VALIDATION_FRACTION,
+        random_state=42,
+        stratify=y_train,
+    )
+    objective_args = {
+        "X_train": X_fit,
+        "y_train": y_fit,
+        "X_valid": X_valid,
+        "y_valid": y_valid,
+        "X_test": X_test,
+        "y_test": y_test,
+        "experiment_id": experiment_id,
+        "n_jobs": trial_threads(n_workers),
+        "early_stopping_rounds": early_stopping_rounds,
+        "signature": None,
+        "run_key": run_key,
+        # Tells this call's trials, whose models it holds in deferred mode,
+        # from those of earlier attempts at the same run
+        "attempt_key": uuid.uuid4().hex,
+    }
+    if log_mode == "deferred":
+        # Every trial's model takes the same frame and returns labels, so
+        # one signature serves all of them
+        objective_args["signature"] = infer_signature(
+            X_fit, np.zeros(len(X_fit), dtype=np.int64)
+        )
 
-            roc_auc = roc_auc_score(y_true=y_test, y_score=y_predict)
+    with tempfile.TemporaryDirectory() as study_dir:
+        if storage is None and n_workers > 1:
+            storage = os.path.join(study_dir, "study.journal")
+        study = optuna.create_study(
+            study_name=study_name,
+            direction="maximize",
+            storage=open_study_storage(storage) if storage else None,
+            pruner=make_pruner(pruner),
+            load_if_exists=True,
+        )
+        if warm_start_model:
+            params = champion_params(warm_start_model)
+            if params is not None:
+                study.enqueue_trial(params, skip_if_exists=True)
 
-            # Manual logging of hyperparameters
-            for param_name, param_value in params.items():
-                mlflow.log_param(param_name, param_value)
+        finished = tagged_trials(
+            study,
+            RUN_KEY_ATTR,
+            run_key,
+            (optuna.trial.TrialState.COMPLETE, optuna.trial.TrialState.PRUNED),
+        )
+        n_remaining = n_trials - len(finished)
+        if finished:
+            print(f"Resuming run {run_key}: {len(finished)} of {n_trials} trials done")
 
-            # Log metrics
-            mlflow.log_metric("roc_auc", roc_auc)
-            mlflow.set_tag("model_type", "XGBoost")
+        # Run optimization
+        if n_remaining > 0 and n_workers <= 1:
+            run_trials(study, objective_args, n_remaining, log_mode, top_k)
+        elif n_remaining > 0:
+            # Split the trials evenly; each worker asks the shared study for
+            # its next parameters, so the sampler sees every finished trial
+            shares = [
+                n_remaining // n_workers + (i < n_remaining % n_workers)
+                for i in range(n_workers)
+            ]
+            with ProcessPoolExecutor(
+                max_workers=n_workers,
+                # Fresh interpreters rather than forks, so no OpenMP or MLflow
+                # state is inherited from this process
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_trial_worker,
+                initargs=(mlflow_uri, objective_args, log_mode, top_k),
+            ) as executor:
+                futures = [
+                    executor.submit(
+                        _run_trials, study.study_name, storage, pruner, share
+                    )
+                    for share in shares
+                    if share > 0
+                ]
+                for future in futures:
+                    future.result()
+            print(f"Ran {n_remaining} trials in {n_workers} worker processes")
 
-            # Infer model signature
-            signature = infer_signature(X_train, xgb_model.predict(X_train))
+        completed = tagged_trials(
+            study, RUN_KEY_ATTR, run_key, (optuna.trial.TrialState.COMPLETE,)
+        )
+    if not completed:
+        raise ValueError(f"No trials of run {run_key} completed")
+    return max(trial.value for trial in completed)
 
-            # Log the XGBoost model using sklearn format
-            mlflow.sklearn.log_model(
-                sk_model=xgb_model, artifact_path="xgboost_model", signature=signature
-            )
 
-        return roc_auc
+def log_model_bundle(model, X, threshold=DECISION_THRESHOLD):
+    """
+    Log the serving bundle of a trained model to the active MLflow run
 
-    # Run optimization
-    study = optuna.create_study(direction="maximize")
-    study.optimize(objective_xgboost, n_trials=n_trials)
+    The bundle holds the booster in UBJSON and the column order, category
+    levels and decision threshold it scores with, so the service can load
+    it without unpickling the sklearn wrapper (see deploy_service/model_bundle.py).
 
-    return study.best_value
+    Args:
+        model: Trained XGBClassifier
+        X: Frame the model was trained on, with categoricals as category dtype
+        threshold: Probability above which a record is predicted positive
+    """
+    spec = {
+        "format_version": BUNDLE_FORMAT_VERSION,
+        "model_name": None,
+        "model_version": None,
+        "feature_names": [str(col) for col in X.columns],
+        "categorical_levels": {
+            str(col): [str(level) for level in X[col].cat.categories]
+            for col in X.columns
+            if isinstance(X[col].dtype, pd.CategoricalDtype)
+        },
+        "threshold": float(threshold),
+        "xgboost_version": xgb.__version__,
+    }
+    with tempfile.TemporaryDirectory() as bundle_dir:
+        model.get_booster().save_model(os.path.join(bundle_dir, "booster.ubj"))
+        with open(os.path.join(bundle_dir, "bundle.json"), "w") as f:
+            json.dump(spec, f, indent=2)
+        mlflow.log_artifacts(bundle_dir, artifact_path=BUNDLE_ARTIFACT_PATH)
 
 
 def preprocess_pd(dat):
@@ -212,6 +868,41 @@ def preprocess_pd(dat):
     return dat
 
 
+def load_prediction_log(directory, since=None, model_role="champion"):
+    """
+    Read the service's Parquet prediction log.
+
+    Args:
+        directory: PREDICTION_LOG_DIR of the serving containers
+        since: Optional timezone-aware datetime; older rows are skipped
+        model_role: Keep only the rows of this model, so shadow scores of
+            a challenger do not count as served traffic (None keeps all).
+            Rows logged before roles were recorded are the champion's.
+
+    Returns:
+        pd.DataFrame or None: Logged rows, or None if nothing has been
+            logged yet. Files still being written are dot-files and skipped.
+    """
+    if not os.path.isdir(directory) or not any(
+        name.endswith(".parquet") and not name.startswith(".")
+        for name in os.listdir(directory)
+    ):
+        return None
+
+    filters = [("timestamp", ">=", since)] if since is not None else None
+    logged = pd.read_parquet(directory, filters=filters)
+    if model_role is not None:
+        roles = (
+            logged["model_role"].fillna("champion")
+            if "model_role" in logged.columns
+            else pd.Series("champion", index=logged.index)
+        )
+        logged = logged[roles == model_role]
+    if logged.empty:
+        return None
+    return logged
+
+
 class xgb_model:
     """
     A class to load XGBoost models from MLflow and make predictions.
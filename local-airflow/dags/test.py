@@ -51,7 +51,7 @@ def ml_pipeline():
         }
 
     @task
-    def train_xgboost(data_and_splits):
+    def train_xgboost(data_and_splits, run_id=None):
         """Train XGBoost model using the imported function"""
         # Extract data from the data_and_splits
         X_train = pd.DataFrame(data_and_splits["X_train"])
@@ -87,6 +87,9 @@ def ml_pipeline():
             mlflow_uri=None,  # Will use environment variable MLFLOW_TRACKING_URI
             experiment_name="ml_pipeline_experiment",
             n_trials=10,
+            # Trials carry the DAG run's id, so a retry resumes this run's
+            # trials in the persisted study instead of starting over
+            run_key=run_id,
         )
 
         return best_score
@@ -212,6 +212,22 @@ resource "google_cloud_run_service" "prediction_service" {
           value = "https://mlflow-server-${data.google_project.current.number}.us-central1.run.app"
         }
 
+        # Route traffic only once the model is loaded and warmed up
+        startup_probe {
+          http_get {
+            path = "/readyz"
+          }
+          period_seconds    = 2
+          failure_threshold = 60
+        }
+
+        liveness_probe {
+          http_get {
+            path = "/healthz"
+          }
+          period_seconds = 30
+        }
+
         resources {
           limits = {
             cpu    = "1000m"
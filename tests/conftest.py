@@ -4,8 +4,9 @@ Shared pytest configuration and fixtures
 
 import os
 import sys
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 
+import numpy as np
 import pandas as pd
 import pytest
 
@@ -73,3 +74,88 @@ def mock_mlflow_model():
     mock_model.predict_proba.return_value = [[0.3, 0.7], [0.8, 0.2]]
     mock_model.predict.return_value = [1, 0]
     return mock_model
+
+
+@pytest.fixture(scope="session")
+def synthetic_features():
+    """Reproducible raw patient records covering every category level"""
+    from predict_function import CATEGORICAL_LEVELS, FEATURE_COLUMNS
+
+    rng = np.random.default_rng(42)
+    n_samples = 400
+    columns = {}
+    for col in FEATURE_COLUMNS:
+        if col in CATEGORICAL_LEVELS:
+            columns[col] = rng.choice(CATEGORICAL_LEVELS[col], n_samples)
+        else:
+            lam = 30 if col == "age" else 12
+            columns[col] = rng.poisson(lam, n_samples).astype("float64")
+    return pd.DataFrame(columns)
+
+
+@pytest.fixture(scope="session")
+def trained_classifier(synthetic_features):
+    """Small real XGBoost classifier trained like train_xgboost_with_optuna"""
+    import xgboost as xgb
+    from predict_function import preprocess_pd
+
+    X = preprocess_pd(synthetic_features.copy())
+    rng = np.random.default_rng(0)
+    y = (
+        (X["night_bottle_feeding"] == "Yes").to_numpy() ^ (rng.random(len(X)) < 0.3)
+    ).astype(int)
+    model = xgb.XGBClassifier(
+        n_estimators=20, max_depth=4, enable_categorical=True, random_state=42
+    )
+    model.fit(X, y)
+    return model
+
+
+@pytest.fixture
+def predictor_factory(trained_classifier):
+    """Build xgb_model around the trained classifier instead of an MLflow download"""
+    # mlflow.sklearn starts out as a lazy proxy that the first real import
+    # replaces; import it now so the patch below lands on the real module
+    import mlflow.sklearn  # noqa: F401
+    from predict_function import xgb_model
+
+    def build(version="1", **kwargs):
+        with patch(
+            "mlflow.sklearn.load_model",
+            return_value=trained_classifier,
+        ), patch("predict_function.resolve_model_version", return_value=version):
+            return xgb_model(
+                model_name="mlops_project", model_version="champion", **kwargs
+            )
+
+    return build
+
+
+@pytest.fixture
+def real_predictor(predictor_factory):
+    """xgb_model with the default engine and a real model"""
+    return predictor_factory()
+
+
+@pytest.fixture(scope="module")
+def file_registry(tmp_path_factory, trained_classifier):
+    """File-based MLflow registry with version 1 aliased as champion"""
+    import mlflow
+    import mlflow.sklearn
+
+    previous_uri = mlflow.get_tracking_uri()
+    # FileStore creates the default experiment only for a new root directory
+    registry_dir = tmp_path_factory.mktemp("registry") / "mlruns"
+    mlflow.set_tracking_uri(f"file://{registry_dir}")
+
+    with mlflow.start_run():
+        mlflow.sklearn.log_model(
+            sk_model=trained_classifier,
+            artifact_path="xgboost_model",
+            registered_model_name="mlops_project",
+        )
+    mlflow.MlflowClient().set_registered_model_alias("mlops_project", "champion", "1")
+
+    yield registry_dir
+
+    mlflow.set_tracking_uri(previous_uri)
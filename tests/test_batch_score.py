@@ -0,0 +1,169 @@
+"""
+Pytest tests for the offline batch-scoring CLI
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "deploy_service"))
+
+from batch_score import read_chunks, score_file
+
+
+class AgePredictor:
+    """Stand-in predictor scoring age / 100; importable by spawned workers"""
+
+    def predict_encoded(self, encoded):
+        return encoded[:, 1] / 100
+
+
+class TunedAgePredictor(AgePredictor):
+    """AgePredictor with a non-default decision threshold, as from a bundle"""
+
+    threshold = 0.3
+
+
+@pytest.fixture
+def extract(sample_patient_data):
+    """Registry extract with an id column and ages 0..49"""
+    df = pd.DataFrame([sample_patient_data] * 50)
+    df["age"] = np.arange(50, dtype=float)
+    df.insert(0, "patient_id", np.arange(1000, 1050))
+    return df
+
+
+def write_parquet(df, path, row_group_size=7):
+    pq.write_table(
+        pa.Table.from_pandas(df, preserve_index=False),
+        path,
+        row_group_size=row_group_size,
+    )
+    return str(path)
+
+
+class TestReadChunks:
+    """Test streaming input in fixed-size chunks"""
+
+    def test_parquet_chunks_span_row_groups(self, tmp_path, extract):
+        """Test chunks have exactly chunk_size rows across row groups"""
+        path = write_parquet(extract, tmp_path / "extract.parquet")
+
+        chunks = list(read_chunks(path, 12))
+
+        assert [chunk.num_rows for chunk in chunks] == [12, 12, 12, 12, 2]
+        ids = np.concatenate(
+            [chunk.column("patient_id").to_numpy() for chunk in chunks]
+        )
+        np.testing.assert_array_equal(ids, extract["patient_id"])
+
+    def test_csv_types_fixed(self, tmp_path, extract):
+        """Test CSV features are typed as the schema expects"""
+        extract.loc[3, "race"] = None
+        path = tmp_path / "extract.csv"
+        extract.to_csv(path, index=False)
+
+        (chunk,) = list(read_chunks(str(path), 100))
+
+        assert chunk.schema.field("race").type == pa.string()
+        assert chunk.schema.field("age").type == pa.float64()
+        assert chunk.column("race")[3].as_py() is None
+
+
+class TestScoreFile:
+    """Test scoring files into ordered Parquet output"""
+
+    def test_in_process(self, tmp_path, extract):
+        """Test predictions are written in input order with kept columns"""
+        path = write_parquet(extract, tmp_path / "extract.parquet")
+        output = str(tmp_path / "scored.parquet")
+
+        summary = score_file(
+            path, output, AgePredictor, chunk_size=8, keep_columns=["patient_id"]
+        )
+
+        scored = pd.read_parquet(output)
+        assert list(scored.columns) == [
+            "patient_id",
+            "prediction",
+            "predict_proba",
+            "error",
+        ]
+        assert scored["patient_id"].tolist() == extract["patient_id"].tolist()
+        np.testing.assert_allclose(scored["predict_proba"], extract["age"] / 100)
+        assert summary["rows"] == 50
+        assert summary["invalid_rows"] == 0
+
+    @pytest.mark.parametrize("workers", [0, 2])
+    def test_predictor_threshold(self, tmp_path, extract, workers):
+        """Test labels use the predictor's threshold, as online serving does"""
+        path = write_parquet(extract, tmp_path / "extract.parquet")
+        output = str(tmp_path / "scored.parquet")
+
+        score_file(path, output, TunedAgePredictor, chunk_size=16, workers=workers)
+
+        scored = pd.read_parquet(output)
+        expected = (extract["age"] / 100 > TunedAgePredictor.threshold).astype(int)
+        assert scored["prediction"].tolist() == expected.tolist()
+
+    def test_invalid_rows(self, tmp_path, extract):
+        """Test invalid rows are written with an error instead of failing"""
+        extract.loc[5, "age"] = 400
+        extract.loc[9, "gender"] = "unknown"
+        path = tmp_path / "extract.csv"
+        extract.to_csv(path, index=False)
+        output = str(tmp_path / "scored.parquet")
+
+        summary = score_file(str(path), output, AgePredictor, chunk_size=16)
+
+        scored = pd.read_parquet(output)
+        assert summary["invalid_rows"] == 2
+        assert scored["prediction"].isna().tolist() == [i in (5, 9) for i in range(50)]
+        assert scored.loc[5, "error"] == "age: must be between 0 and 120"
+        assert scored.loc[9, "error"].startswith("gender: must be one of")
+        # All input columns are kept by default
+        assert scored["patient_id"].tolist() == extract["patient_id"].tolist()
+
+    def test_worker_processes_keep_order(self, tmp_path, extract):
+        """Test chunks scored in worker processes are written in order"""
+        path = write_parquet(extract, tmp_path / "extract.parquet")
+        output = str(tmp_path / "scored.parquet")
+
+        summary = score_file(
+            path,
+            output,
+            AgePredictor,
+            chunk_size=5,
+            workers=2,
+            keep_columns=["patient_id"],
+        )
+
+        scored = pd.read_parquet(output)
+        assert summary["rows"] == 50
+        assert scored["patient_id"].tolist() == extract["patient_id"].tolist()
+        np.testing.assert_allclose(scored["predict_proba"], extract["age"] / 100)
+
+    def test_matches_service_predictions(self, tmp_path, extract, real_predictor):
+        """Test a real model scores the same as the record path"""
+        path = write_parquet(extract, tmp_path / "extract.parquet")
+        output = str(tmp_path / "scored.parquet")
+
+        score_file(path, output, lambda: real_predictor, chunk_size=16)
+
+        expected = real_predictor.predict(
+            extract.drop(columns="patient_id").to_dict("records")
+        )
+        scored = pd.read_parquet(output)
+        np.testing.assert_array_equal(
+            scored["predict_proba"], expected["predict_proba"]
+        )
+        np.testing.assert_array_equal(scored["prediction"], expected["prediction"])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
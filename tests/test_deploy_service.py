@@ -7,19 +7,52 @@ import os
 import sys
 from unittest.mock import Mock, patch
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 import pytest
 
 # Add the deploy_service directory to the path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "deploy_service"))
 
-from predict_function import preprocess_pd
+from predict_function import FEATURE_COLUMNS, FeatureEncoder, preprocess_pd
 from service_test import app
 
 
-@pytest.fixture
-def client():
-    """Create a test client for the Flask app"""
+class AsgiTestClient:
+    """Flask test client interface over the ASGI app"""
+
+    def __init__(self, asgi_app):
+        from starlette.testclient import TestClient
+
+        self.client = TestClient(asgi_app)
+
+    def get(self, path):
+        return self._wrap(self.client.get(path))
+
+    def post(self, path, data=None, json=None, content_type=None):
+        headers = {"content-type": content_type} if content_type else {}
+        if isinstance(data, dict):
+            response = self.client.post(path, data=data, headers=headers)
+        else:
+            response = self.client.post(path, content=data, json=json, headers=headers)
+        return self._wrap(response)
+
+    @staticmethod
+    def _wrap(response):
+        response.data = response.content
+        return response
+
+
+@pytest.fixture(params=["flask", "asgi"])
+def client(request):
+    """Create a test client for the Flask app and for the ASGI app"""
+    if request.param == "asgi":
+        from asgi_app import app as asgi_app
+
+        yield AsgiTestClient(asgi_app)
+        return
+
     app.config["TESTING"] = True
     with app.test_client() as client:
         yield client
@@ -89,17 +122,779 @@ def test_predict_endpoint_missing_fields(client):
     }
 
     with patch("service_test.predictor") as mock_predictor:
-        # Mock successful prediction instead of testing error handling
-        mock_predictor.predict.return_value = pd.DataFrame({"prediction": [0]})
-
         response = client.post(
             "/predict",
             data=json.dumps(incomplete_data),
             content_type="application/json",
         )
 
-        # Should work with mock prediction
+        # Rejected by schema validation before reaching the model
+        assert response.status_code == 400
+        data = json.loads(response.data)
+        assert data["fields"]["gender"] == "is required"
+        assert "race" not in data["fields"]
+        mock_predictor.predict.assert_not_called()
+
+
+def test_predict_endpoint_field_errors(client, sample_prediction_data):
+    """Test invalid values are reported per field"""
+    data = dict(sample_prediction_data, age="invalid_age", race="martian")
+
+    response = client.post(
+        "/predict", data=json.dumps(data), content_type="application/json"
+    )
+
+    assert response.status_code == 400
+    fields = json.loads(response.data)["fields"]
+    assert fields == {
+        "age": "must be a number",
+        "race": "must be one of ['chinese', 'malay', 'indian']",
+    }
+
+
+class TestPredictBatchEndpoint:
+    """Test the batch prediction endpoint"""
+
+    @pytest.fixture
+    def batch_records(self, sample_prediction_data):
+        second = dict(sample_prediction_data, race="malay", age=25)
+        third = dict(sample_prediction_data, race="indian", age=35)
+        return [sample_prediction_data, second, third]
+
+    def test_predict_batch_json_array(self, client, batch_records):
+        """Test a JSON array is scored in one model call, in input order"""
+        with patch("service_test.predictor") as mock_predictor:
+            mock_result_df = pd.DataFrame(batch_records)
+            mock_result_df["prediction"] = [0, 1, 0]
+            mock_result_df["predict_proba"] = [0.2, 0.8, 0.4]
+            mock_predictor.predict.return_value = mock_result_df
+
+            response = client.post(
+                "/predict_batch",
+                data=json.dumps(batch_records),
+                content_type="application/json",
+            )
+
+            assert response.status_code == 200
+            assert mock_predictor.predict.call_count == 1
+            scored_records = mock_predictor.predict.call_args[0][0]
+            assert [record["age"] for record in scored_records] == [30, 25, 35]
+
+            data = json.loads(response.data)
+            assert data["status"] == "success"
+            assert [row["prediction"] for row in data["predictions"]] == [0, 1, 0]
+            assert [row["predict_proba"] for row in data["predictions"]] == [
+                0.2,
+                0.8,
+                0.4,
+            ]
+
+    def test_predict_batch_ndjson(self, client, batch_records):
+        """Test newline-delimited JSON payloads are accepted"""
+        payload = "\n".join(json.dumps(record) for record in batch_records) + "\n"
+
+        response = client.post(
+            "/predict_batch", data=payload, content_type="application/x-ndjson"
+        )
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert len(data["predictions"]) == len(batch_records)
+
+    def test_predict_batch_empty(self, client):
+        """Test an empty batch returns no predictions"""
+        response = client.post(
+            "/predict_batch", data="[]", content_type="application/json"
+        )
+
+        assert response.status_code == 200
+        assert json.loads(response.data)["predictions"] == []
+
+    def test_predict_batch_rejects_object(self, client, sample_prediction_data):
+        """Test a single JSON object is rejected by the batch endpoint"""
+        response = client.post(
+            "/predict_batch",
+            data=json.dumps(sample_prediction_data),
+            content_type="application/json",
+        )
+
+        assert response.status_code == 400
+
+    def test_predict_batch_malformed_json(self, client):
+        """Test malformed JSON returns a client error"""
+        response = client.post(
+            "/predict_batch", data="[{", content_type="application/json"
+        )
+
+        assert response.status_code == 400
+        assert json.loads(response.data)["error"] == "Malformed JSON payload"
+
+    def test_predict_batch_invalid_rows(self, client, batch_records):
+        """Test invalid rows get per-field errors and the rest are scored"""
+        batch_records[1] = dict(batch_records[1], age=-4, gender="unknown")
+        with patch("service_test.predictor") as mock_predictor:
+            mock_predictor.predict.return_value = {
+                "prediction": np.array([0, 1]),
+                "predict_proba": np.array([0.2, 0.6]),
+                "model_version": "4",
+            }
+
+            response = client.post(
+                "/predict_batch",
+                data=json.dumps(batch_records),
+                content_type="application/json",
+            )
+
+            scored_records = mock_predictor.predict.call_args[0][0]
+            assert [record["age"] for record in scored_records] == [30, 35]
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data["status"] == "partial"
+        assert data["invalid_rows"] == 1
+        assert data["predictions"][0] == {"prediction": 0, "predict_proba": 0.2}
+        assert set(data["predictions"][1]["errors"]) == {"age", "gender"}
+        assert data["predictions"][2] == {"prediction": 1, "predict_proba": 0.6}
+
+    def test_predict_batch_too_large(self, client, batch_records):
+        """Test batches above the configured limit are rejected"""
+        with patch("service_test.MAX_BATCH_SIZE", 2):
+            response = client.post(
+                "/predict_batch",
+                data=json.dumps(batch_records),
+                content_type="application/json",
+            )
+
+        assert response.status_code == 413
+
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+
+def to_arrow_stream(df):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def read_arrow_stream(body):
+    return pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+
+
+class TestPredictBulkEndpoint:
+    """Test the columnar /predict_bulk endpoint"""
+
+    @pytest.fixture
+    def bulk_frame(self, sample_prediction_data):
+        records = [
+            dict(sample_prediction_data, age=age, race=race)
+            for age, race in zip([20, 30, 40, 50], ["chinese", "malay", "indian"] * 2)
+        ]
+        return pd.DataFrame(records)
+
+    def test_arrow_round_trip(self, client, bulk_frame):
+        """Test an Arrow stream is scored and answered with a record batch"""
+        response = client.post(
+            "/predict_bulk", data=to_arrow_stream(bulk_frame), content_type=ARROW_STREAM
+        )
+
+        assert response.status_code == 200
+        assert response.headers["Content-Type"].startswith(ARROW_STREAM)
+        result = read_arrow_stream(response.data)
+        assert result.column_names == ["prediction", "predict_proba", "error"]
+        assert result.column("prediction").to_pylist() == [0] * 4
+        assert result.column("predict_proba").to_pylist() == pytest.approx([0.3] * 4)
+        assert result.column("error").null_count == 4
+
+    def test_matches_record_path(self, client, bulk_frame, real_predictor):
+        """Test columnar scoring gives the same probabilities as /predict_batch"""
+        with patch("service_test.predictor", real_predictor):
+            response = client.post(
+                "/predict_bulk",
+                data=to_arrow_stream(preprocess_pd(bulk_frame.copy())),
+                content_type=ARROW_STREAM,
+            )
+
+        assert response.status_code == 200
+        assert response.headers["X-Model-Version"] == "1"
+        expected = real_predictor.predict(bulk_frame.to_dict("records"))
+        np.testing.assert_array_equal(
+            read_arrow_stream(response.data).column("predict_proba").to_numpy(),
+            expected["predict_proba"],
+        )
+
+    def test_invalid_rows(self, client, bulk_frame):
+        """Test invalid rows get a null prediction and an error message"""
+        bulk_frame.loc[1, "age"] = 500
+        bulk_frame.loc[2, "gender"] = "unknown"
+
+        response = client.post(
+            "/predict_bulk", data=to_arrow_stream(bulk_frame), content_type=ARROW_STREAM
+        )
+
+        assert response.status_code == 200
+        result = read_arrow_stream(response.data)
+        assert result.column("prediction").to_pylist() == [0, None, None, 0]
+        errors = result.column("error").to_pylist()
+        assert errors[0] is None and errors[3] is None
+        assert errors[1] == "age: must be between 0 and 120"
+        assert errors[2].startswith("gender: must be one of")
+
+    def test_missing_column(self, client, bulk_frame):
+        """Test a missing column rejects the request"""
+        response = client.post(
+            "/predict_bulk",
+            data=to_arrow_stream(bulk_frame.drop(columns="age")),
+            content_type=ARROW_STREAM,
+        )
+
+        assert response.status_code == 400
+        assert json.loads(response.data)["error"] == "Missing required column 'age'"
+
+    def test_unsupported_content_type(self, client, bulk_frame):
+        """Test JSON bodies are pointed to the other batch endpoints"""
+        response = client.post(
+            "/predict_bulk",
+            data=bulk_frame.to_json(orient="records"),
+            content_type="application/json",
+        )
+
+        assert response.status_code == 400
+
+    def test_too_large(self, client, bulk_frame):
+        """Test batches above the configured limit are rejected"""
+        with patch("service_test.MAX_BULK_ROWS", 3):
+            response = client.post(
+                "/predict_bulk",
+                data=to_arrow_stream(bulk_frame),
+                content_type=ARROW_STREAM,
+            )
+
+        assert response.status_code == 413
+
+    def test_msgpack(self, client, bulk_frame):
+        """Test msgpack column maps are accepted when msgpack is installed"""
+        msgpack = pytest.importorskip("msgpack")
+
+        response = client.post(
+            "/predict_bulk",
+            data=msgpack.packb(bulk_frame.to_dict("list")),
+            content_type="application/msgpack",
+        )
+
+        assert response.status_code == 200
+        result = msgpack.unpackb(response.data)
+        assert result["prediction"] == [0] * 4
+
+
+class TestExplainEndpoints:
+    """Test /explain and /explain_batch"""
+
+    def test_explain(self, client, real_predictor, sample_prediction_data):
+        """Test /explain returns contributions for every feature"""
+        with patch("service_test.predictor", real_predictor):
+            response = client.post(
+                "/explain",
+                data=json.dumps(sample_prediction_data),
+                content_type="application/json",
+            )
+
+        assert response.status_code == 200
+        body = json.loads(response.data)
+        assert body["status"] == "success"
+        assert body["model_version"] == "1"
+        assert set(body["contributions"]) == set(FEATURE_COLUMNS)
+        predicted = real_predictor.predict(sample_prediction_data)
+        assert body["prediction"] == predicted["prediction"][0]
+        assert body["predict_proba"] == pytest.approx(
+            float(predicted["predict_proba"][0]), abs=1e-5
+        )
+        logit = np.log(body["predict_proba"] / (1 - body["predict_proba"]))
+        assert body["base_value"] + sum(body["contributions"].values()) == (
+            pytest.approx(logit, abs=1e-4)
+        )
+
+    def test_explain_invalid_record(
+        self, client, real_predictor, sample_prediction_data
+    ):
+        """Test an invalid record gets the same 400 as /predict"""
+        with patch("service_test.predictor", real_predictor):
+            response = client.post(
+                "/explain",
+                data=json.dumps(dict(sample_prediction_data, age=-5)),
+                content_type="application/json",
+            )
+
+        assert response.status_code == 400
+        assert "age" in json.loads(response.data)["fields"]
+
+    def test_explain_batch_partial(
+        self, client, real_predictor, sample_prediction_data
+    ):
+        """Test invalid records get errors and the rest are explained"""
+        records = [sample_prediction_data, {"age": "x"}, sample_prediction_data]
+        with patch("service_test.predictor", real_predictor):
+            response = client.post(
+                "/explain_batch",
+                data=json.dumps(records),
+                content_type="application/json",
+            )
+
         assert response.status_code == 200
+        body = json.loads(response.data)
+        assert body["status"] == "partial"
+        assert body["invalid_rows"] == 1
+        explanations = body["explanations"]
+        assert "errors" in explanations[1]
+        assert explanations[0] == explanations[2]
+        assert set(explanations[0]["contributions"]) == set(FEATURE_COLUMNS)
+
+    def test_explain_batch_size_limit(self, client, sample_prediction_data):
+        """Test batches over MAX_EXPLAIN_BATCH_SIZE are rejected"""
+        with patch("service_test.MAX_EXPLAIN_BATCH_SIZE", 2):
+            response = client.post(
+                "/explain_batch",
+                data=json.dumps([sample_prediction_data] * 3),
+                content_type="application/json",
+            )
+
+        assert response.status_code == 413
+
+
+class TestAsgiApp:
+    """Test behaviour specific to the ASGI entry point"""
+
+    def test_backpressure_rejects_when_saturated(self, sample_prediction_data):
+        """Test requests beyond the in-flight limit get 503 with Retry-After"""
+        import asgi_app
+
+        client = AsgiTestClient(asgi_app.app)
+        with patch("asgi_app.ASGI_MAX_IN_FLIGHT", 0):
+            response = client.post("/predict", json=sample_prediction_data)
+
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+
+    @pytest.mark.parametrize(
+        "path", ["/predict", "/predict_batch", "/predict_bulk", "/explain_batch"]
+    )
+    def test_rejected_request_body_is_not_read(self, path, sample_prediction_data):
+        """Test requests shed for load never have their bodies buffered"""
+        import asgi_app
+        from starlette.requests import Request
+
+        client = AsgiTestClient(asgi_app.app)
+        with patch("asgi_app.ASGI_MAX_IN_FLIGHT", 0), patch.object(
+            Request, "body", side_effect=AssertionError("body was read")
+        ) as body:
+            response = client.post(path, json=[sample_prediction_data])
+
+        assert response.status_code == 503
+        body.assert_not_called()
+
+    def test_scoring_runs_in_executor(self, sample_prediction_data):
+        """Test scoring happens on the bounded executor, not the event loop"""
+        import threading
+
+        import asgi_app
+
+        threads = []
+
+        def record_thread(data):
+            threads.append(threading.current_thread().name)
+            return {"prediction": 0, "model_version": None, "status": "success"}
+
+        client = AsgiTestClient(asgi_app.app)
+        with patch("service_test.score_record", side_effect=record_thread):
+            response = client.post("/predict", json=sample_prediction_data)
+
+        assert response.status_code == 200
+        assert threads[0].startswith("scoring")
+
+
+class TestHealthEndpoints:
+    """Test warmup and the /healthz and /readyz endpoints"""
+
+    def test_healthz_reports_model(self, client, real_predictor):
+        """Test liveness reports the model version, load time and warmup"""
+        with patch("service_test.predictor", real_predictor):
+            response = client.get("/healthz")
+
+        assert response.status_code == 200
+        health = json.loads(response.data)
+        assert health["model_version"] == "1"
+        assert health["model_load_seconds"] >= 0
+        assert health["warmup"]["requests"] == 22
+        assert health["warmup"]["p50_ms"] > 0
+
+    def test_healthz_reports_prediction_table(
+        self, client, predictor_factory, sample_prediction_data
+    ):
+        """Test liveness reports the lookup table's hit rate"""
+        table_predictor = predictor_factory(
+            engine="booster",
+            lookup_table=True,
+            table_ranges={"age": (20, 40), "breast_feeding_month": (5, 20)},
+        )
+        with patch("service_test.predictor", table_predictor):
+            client.post(
+                "/predict_batch",
+                json=[
+                    dict(sample_prediction_data, age=30),
+                    dict(sample_prediction_data, age=95),
+                ],
+            )
+            response = client.get("/healthz")
+
+        table = json.loads(response.data)["prediction_table"]
+        assert table["hits"] == 1
+        assert table["misses"] == 1
+        assert table["hit_rate"] == 0.5
+
+    def test_readyz_follows_warmup(self, client):
+        """Test readiness is 503 until warmup has succeeded"""
+        import service_test
+
+        with patch.dict(service_test.service_state, {"ready": False}):
+            response = client.get("/readyz")
+            assert response.status_code == 503
+            assert json.loads(response.data)["status"] == "not ready"
+
+        response = client.get("/readyz")
+        assert response.status_code == 200
+        assert json.loads(response.data)["status"] == "ready"
+
+    def test_warmup_not_counted_in_metrics(self):
+        """Test synthetic requests stay out of the request metrics"""
+        import service_metrics
+        import service_test
+
+        client = app.test_client()
+        before = metric_value(
+            client, "prediction_requests_total", endpoint="/predict", status="200"
+        )
+
+        with patch.dict(service_test.service_state):
+            service_test.warm_up()
+
+        assert service_metrics.enabled
+        assert (
+            metric_value(
+                client, "prediction_requests_total", endpoint="/predict", status="200"
+            )
+            == before
+        )
+
+    def test_failed_warmup_stays_not_ready(self):
+        """Test a model that cannot score keeps the worker out of rotation"""
+        import service_test
+
+        broken = Mock(spec=["predict"])
+        broken.predict.side_effect = ValueError("Not able to predict outcome")
+        with patch.dict(service_test.service_state, {"ready": False}), patch(
+            "service_test.predictor", broken
+        ):
+            service_test.warm_up()
+
+            assert not service_test.service_state["ready"]
+            assert (
+                "/predict returned 400" in service_test.service_state["warmup"]["error"]
+            )
+            assert app.test_client().get("/readyz").status_code == 503
+
+
+def metric_value(client, name, **labels):
+    """Read one sample from the /metrics endpoint"""
+    from prometheus_client.parser import text_string_to_metric_families
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    for family in text_string_to_metric_families(response.data.decode()):
+        for sample in family.samples:
+            if sample.name == name and all(
+                sample.labels.get(key) == value for key, value in labels.items()
+            ):
+                return sample.value
+    return 0.0
+
+
+class TestMetricsEndpoint:
+    """Test the Prometheus /metrics endpoint and hot-path instrumentation"""
+
+    def test_stage_histograms_recorded(
+        self, client, real_predictor, sample_prediction_data
+    ):
+        """Test every stage of /predict lands in its histogram"""
+        before = {
+            stage: metric_value(
+                client,
+                "prediction_stage_seconds_count",
+                endpoint="/predict",
+                stage=stage,
+            )
+            for stage in ("parse", "encode", "predict", "serialize", "total")
+        }
+
+        with patch("service_test.predictor", real_predictor):
+            response = client.post("/predict", json=sample_prediction_data)
+        assert response.status_code == 200
+
+        for stage, count in before.items():
+            assert (
+                metric_value(
+                    client,
+                    "prediction_stage_seconds_count",
+                    endpoint="/predict",
+                    stage=stage,
+                )
+                == count + 1
+            )
+
+    def test_request_and_error_counters(self, client, sample_prediction_data):
+        """Test successful and failed requests are counted by status"""
+        ok_before = metric_value(
+            client, "prediction_requests_total", endpoint="/predict", status="200"
+        )
+        errors_before = metric_value(
+            client, "prediction_errors_total", endpoint="/predict"
+        )
+
+        client.post("/predict", json=sample_prediction_data)
+        client.post("/predict", data=sample_prediction_data)  # Not JSON
+
+        assert (
+            metric_value(
+                client, "prediction_requests_total", endpoint="/predict", status="200"
+            )
+            == ok_before + 1
+        )
+        assert (
+            metric_value(client, "prediction_errors_total", endpoint="/predict")
+            == errors_before + 1
+        )
+
+    def test_batch_size_histogram(self, client, sample_prediction_data):
+        """Test batch sizes are recorded for /predict_batch"""
+        before = metric_value(
+            client, "prediction_batch_size_sum", endpoint="/predict_batch"
+        )
+
+        client.post("/predict_batch", json=[sample_prediction_data] * 5)
+
+        assert (
+            metric_value(client, "prediction_batch_size_sum", endpoint="/predict_batch")
+            == before + 5
+        )
+
+    def test_active_model_version(self, client):
+        """Test the active model version gauge follows swaps"""
+        import service_metrics
+
+        service_metrics.set_model_version("3")
+        service_metrics.set_model_version("4")
+
+        assert metric_value(client, "prediction_model_info", version="3") == 0.0
+        assert metric_value(client, "prediction_model_info", version="4") == 1.0
+
+
+def test_metrics_aggregate_across_workers(tmp_path):
+    """Test /metrics sums counters written by separate worker processes"""
+    import subprocess
+
+    deploy_service_dir = os.path.join(os.path.dirname(__file__), "..", "deploy_service")
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path))
+    record = (
+        "import service_metrics\n"
+        "for _ in range(3):\n"
+        "    service_metrics.observe_request('/predict', 200, 0.001)\n"
+    )
+    for _ in range(2):
+        subprocess.run(
+            [sys.executable, "-c", record], cwd=deploy_service_dir, env=env, check=True
+        )
+
+    rendered = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import service_metrics; " "print(service_metrics.render()[0].decode())",
+        ],
+        cwd=deploy_service_dir,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+
+    assert 'prediction_requests_total{endpoint="/predict",status="200"} 6.0' in rendered
+
+
+def test_metrics_create_missing_multiprocess_dir(tmp_path):
+    """Test importing the metrics creates PROMETHEUS_MULTIPROC_DIR (uvicorn)"""
+    import subprocess
+
+    deploy_service_dir = os.path.join(os.path.dirname(__file__), "..", "deploy_service")
+    metrics_dir = tmp_path / "prometheus-metrics"
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(metrics_dir))
+
+    subprocess.run(
+        [sys.executable, "-c", "import service_metrics"],
+        cwd=deploy_service_dir,
+        env=env,
+        check=True,
+    )
+
+    assert metrics_dir.is_dir()
+
+
+class TestFeatureEncoder:
+    """Test the pandas-free feature encoder against preprocess_pd"""
+
+    @staticmethod
+    def encode_with_pandas(df):
+        """Reference encoding: preprocess_pd category codes, missing as NaN"""
+        processed = preprocess_pd(df.copy())[FEATURE_COLUMNS]
+        columns = []
+        for col in FEATURE_COLUMNS:
+            if processed[col].dtype.name == "category":
+                codes = processed[col].cat.codes.to_numpy().astype("float32")
+                codes[codes < 0] = np.nan
+                columns.append(codes)
+            else:
+                columns.append(processed[col].to_numpy().astype("float32"))
+        return np.column_stack(columns)
+
+    def test_encode_matches_preprocess_pd(self, synthetic_features):
+        """Test encoded rows match preprocess_pd category codes and numerics"""
+        encoder = FeatureEncoder()
+        records = synthetic_features.to_dict("records")
+
+        encoded = encoder.encode(records)
+
+        np.testing.assert_array_equal(
+            encoded, self.encode_with_pandas(synthetic_features)
+        )
+
+    def test_encode_layout(self, sample_prediction_data):
+        """Test a single record becomes one contiguous float32 row"""
+        encoded = FeatureEncoder().encode(sample_prediction_data)
+
+        assert encoded.shape == (1, len(FEATURE_COLUMNS))
+        assert encoded.dtype == np.float32
+        assert encoded.flags["C_CONTIGUOUS"]
+
+    def test_encode_follows_feature_order(self, sample_prediction_data):
+        """Test columns follow the order given by the model"""
+        reordered = list(reversed(FEATURE_COLUMNS))
+
+        encoded = FeatureEncoder(reordered).encode(sample_prediction_data)
+
+        expected = FeatureEncoder().encode(sample_prediction_data)[0][::-1]
+        np.testing.assert_array_equal(encoded[0], expected)
+
+    def test_encode_unknown_category(self, sample_prediction_data):
+        """Test unknown categories are missing, like preprocess_pd"""
+        data = dict(sample_prediction_data, race="unknown_race")
+
+        encoded = FeatureEncoder().encode(data)
+
+        np.testing.assert_array_equal(
+            encoded, self.encode_with_pandas(pd.DataFrame([data]))
+        )
+        assert np.isnan(encoded[0, FEATURE_COLUMNS.index("race")])
+
+    def test_encode_missing_field(self, sample_prediction_data):
+        """Test a missing field reports the field name"""
+        data = dict(sample_prediction_data)
+        del data["gender"]
+
+        with pytest.raises(ValueError, match="gender"):
+            FeatureEncoder().encode(data)
+
+    def test_encode_invalid_numeric(self, sample_prediction_data):
+        """Test a non-numeric age reports the field name"""
+        data = dict(sample_prediction_data, age="invalid_age")
+
+        with pytest.raises(ValueError, match="age"):
+            FeatureEncoder().encode(data)
+
+    def test_predict_records_matches_dataframe_path(
+        self, real_predictor, synthetic_features
+    ):
+        """Test the encoded predict path matches the DataFrame path"""
+        expected = real_predictor.predict(synthetic_features.copy())
+
+        result = real_predictor.predict(synthetic_features.to_dict("records"))
+
+        np.testing.assert_allclose(
+            result["predict_proba"], expected["predict_proba"], rtol=1e-6
+        )
+        np.testing.assert_array_equal(result["prediction"], expected["prediction"])
+
+    def test_predict_endpoint_real_model(
+        self, client, real_predictor, sample_prediction_data
+    ):
+        """Test /predict end to end with a real model behind the encoder"""
+        expected = real_predictor.predict(pd.DataFrame([sample_prediction_data]))
+
+        with patch("service_test.predictor", real_predictor):
+            response = client.post(
+                "/predict",
+                data=json.dumps(sample_prediction_data),
+                content_type="application/json",
+            )
+
+        assert response.status_code == 200
+        assert json.loads(response.data)["prediction"] == int(
+            expected["prediction"].iloc[0]
+        )
+
+
+class TestServingEngines:
+    """Test the sklearn and native Booster serving engines"""
+
+    def test_unknown_engine_rejected(self, predictor_factory):
+        """Test an unknown engine name fails fast"""
+        with pytest.raises(ValueError, match="engine"):
+            predictor_factory(engine="onnx")
+
+    def test_booster_engine_matches_sklearn(
+        self, predictor_factory, synthetic_features
+    ):
+        """Test inplace_predict scores match XGBClassifier.predict_proba"""
+        records = synthetic_features.to_dict("records")
+        sklearn_result = predictor_factory(engine="sklearn").predict(records)
+
+        booster_result = predictor_factory(engine="booster").predict(records)
+
+        np.testing.assert_allclose(
+            booster_result["predict_proba"], sklearn_result["predict_proba"], rtol=1e-6
+        )
+        np.testing.assert_array_equal(
+            booster_result["prediction"], sklearn_result["prediction"]
+        )
+
+    def test_booster_engine_dataframe_path(self, predictor_factory, synthetic_features):
+        """Test the DataFrame predict interface is unchanged under the Booster engine"""
+        expected = predictor_factory(engine="sklearn").predict(
+            synthetic_features.copy()
+        )
+
+        result = predictor_factory(engine="booster").predict(synthetic_features.copy())
+
+        np.testing.assert_allclose(
+            result["predict_proba"], expected["predict_proba"], rtol=1e-6
+        )
+        assert list(result.columns) == list(expected.columns)
+
+    def test_booster_engine_thread_count(self, predictor_factory):
+        """Test the Booster engine pins the configured thread count"""
+        predictor = predictor_factory(engine="booster", nthread=2)
+
+        config = json.loads(predictor.booster.save_config())
+        assert config["learner"]["generic_param"]["nthread"] == "2"
 
 
 class TestPreprocessFunction:
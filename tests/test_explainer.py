@@ -0,0 +1,137 @@
+"""
+Pytest tests for per-feature explanations
+"""
+
+import os
+import pickle
+import sys
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "deploy_service"))
+
+os.environ["TESTING"] = "true"
+
+from explainer import ContributionExplainer
+from predict_function import FEATURE_COLUMNS, preprocess_pd, xgb_model
+
+
+@pytest.fixture
+def booster_predictor(predictor_factory):
+    return predictor_factory(engine="booster")
+
+
+@pytest.fixture
+def encoded_rows(booster_predictor, synthetic_features):
+    records = synthetic_features.head(20).to_dict("records")
+    return booster_predictor.encoder.encode(records)
+
+
+class TestContributionExplainer:
+    """Test contributions and their cache"""
+
+    def test_contributions_sum_to_margin(self, booster_predictor, encoded_rows):
+        """Test each row's contributions plus bias equal the model's margin"""
+        explainer = ContributionExplainer(booster_predictor.booster)
+        contributions = explainer.explain(encoded_rows)
+
+        assert contributions.shape == (len(encoded_rows), len(FEATURE_COLUMNS) + 1)
+        margin = booster_predictor.booster.inplace_predict(
+            encoded_rows, predict_type="margin"
+        )
+        np.testing.assert_allclose(contributions.sum(axis=1), margin, atol=1e-5)
+
+    def test_cache_hits_and_duplicates(self, booster_predictor, encoded_rows):
+        """Test repeated rows are computed once and answered from the cache"""
+        explainer = ContributionExplainer(booster_predictor.booster)
+        doubled = np.concatenate([encoded_rows[:5], encoded_rows[:5]])
+
+        with patch.object(explainer, "_compute", wraps=explainer._compute) as compute:
+            first = explainer.explain(doubled)
+            second = explainer.explain(encoded_rows[:5])
+
+        assert compute.call_count == 1
+        assert len(compute.call_args.args[0]) == 5
+        np.testing.assert_array_equal(first[:5], first[5:])
+        np.testing.assert_array_equal(first[:5], second)
+        assert explainer.stats() == {"hits": 5, "misses": 10, "cached_rows": 5}
+
+    def test_cache_evicts_least_recently_used(self, booster_predictor, encoded_rows):
+        """Test the cache keeps at most cache_size rows, dropping the oldest"""
+        explainer = ContributionExplainer(booster_predictor.booster, cache_size=3)
+        explainer.explain(encoded_rows[:3])
+        explainer.explain(encoded_rows[:1])  # Row 0 is now the most recent
+        explainer.explain(encoded_rows[3:4])
+
+        explainer.explain(encoded_rows[[0, 1]])
+        assert explainer.stats() == {"hits": 2, "misses": 5, "cached_rows": 3}
+
+    def test_cache_disabled(self, booster_predictor, encoded_rows):
+        """Test cache_size=0 computes every request"""
+        explainer = ContributionExplainer(booster_predictor.booster, cache_size=0)
+        explainer.explain(encoded_rows[:2])
+        explainer.explain(encoded_rows[:2])
+
+        assert explainer.stats() == {"hits": 0, "misses": 4, "cached_rows": 0}
+
+
+class TestExplainRecords:
+    """Test xgb_model.explain_records"""
+
+    @pytest.mark.parametrize("engine", ["booster", "sklearn"])
+    def test_matches_predict(self, predictor_factory, synthetic_features, engine):
+        """Test the explained probabilities are the ones predict returns"""
+        predictor = predictor_factory(engine=engine)
+        records = synthetic_features.head(10).to_dict("records")
+
+        explained = predictor.explain_records(records)
+        predicted = predictor.predict_records(records)
+
+        assert explained["feature_names"] == predictor.encoder.feature_names
+        np.testing.assert_allclose(
+            explained["predict_proba"], predicted["predict_proba"], atol=1e-5
+        )
+        np.testing.assert_array_equal(explained["prediction"], predicted["prediction"])
+        assert explained["model_version"] == "1"
+
+    def test_explainer_built_with_model(self, predictor_factory, synthetic_features):
+        """Test every request shares the explainer built when the model loaded"""
+        predictor = predictor_factory(engine="booster")
+        explainer = predictor.explainer
+
+        predictor.explain_records(synthetic_features.head(3).to_dict("records"))
+
+        assert explainer is not None
+        assert predictor.explainer is explainer
+        assert explainer.stats()["misses"] == 3
+
+    @pytest.mark.parametrize("engine", ["booster", "sklearn"])
+    def test_stops_at_best_iteration(
+        self, trained_classifier, synthetic_features, engine
+    ):
+        """Test an early-stopped model that kept its later rounds is scored and
+        explained at its best round, as XGBClassifier.predict_proba does"""
+        import mlflow.sklearn  # noqa: F401  (see predictor_factory)
+
+        model = pickle.loads(pickle.dumps(trained_classifier))
+        model.get_booster().set_attr(best_iteration="4")
+        with patch("mlflow.sklearn.load_model", return_value=model), patch(
+            "predict_function.resolve_model_version", return_value="1"
+        ):
+            predictor = xgb_model("mlops_project", "champion", engine=engine)
+        records = synthetic_features.head(10).to_dict("records")
+
+        explained = predictor.explain_records(records)
+        predicted = predictor.predict_records(records)
+
+        expected = model.predict_proba(preprocess_pd(synthetic_features.head(10)))
+        np.testing.assert_allclose(predicted["predict_proba"], expected[:, 1])
+        np.testing.assert_allclose(
+            explained["predict_proba"], predicted["predict_proba"], atol=1e-5
+        )
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
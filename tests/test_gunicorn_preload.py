@@ -0,0 +1,150 @@
+"""
+Pytest tests for serving from a preloading gunicorn master (PRELOAD_MODEL)
+Starts real gunicorn servers against a file-based MLflow registry
+"""
+
+import glob
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import pandas as pd
+import pytest
+import requests
+
+DEPLOY_SERVICE_DIR = os.path.join(os.path.dirname(__file__), "..", "deploy_service")
+PORT = 9798
+
+pytestmark = pytest.mark.integration
+
+
+def child_pids(pid):
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(child) for child in f.read().split()]
+
+
+def memory_mb(pid):
+    """RSS and private (unshared) memory of a process in MB"""
+    usage = {"rss": 0.0, "private": 0.0}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            name, _, rest = line.partition(":")
+            if name == "Rss":
+                usage["rss"] += int(rest.split()[0]) / 1024
+            elif name in ("Private_Clean", "Private_Dirty"):
+                usage["private"] += int(rest.split()[0]) / 1024
+    return usage
+
+
+@pytest.fixture
+def start_gunicorn(file_registry, tmp_path):
+    """Start gunicorn on PORT and wait until every worker has booted"""
+    processes = []
+
+    def start(workers=2, **env_vars):
+        env = dict(os.environ, MLFLOW_TRACKING_URI=f"file://{file_registry}")
+        env.pop("TESTING", None)
+        env["PROMETHEUS_MULTIPROC_DIR"] = str(tmp_path / f"metrics-{len(processes)}")
+        env.update(env_vars)
+        process = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "gunicorn",
+                "-c",
+                "gunicorn.conf.py",
+                f"--bind=127.0.0.1:{PORT}",
+                f"--workers={workers}",
+                "service_test:app",
+            ],
+            cwd=DEPLOY_SERVICE_DIR,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        processes.append(process)
+
+        # Workers are booted once they all exist and their memory is stable
+        deadline = time.monotonic() + 120
+        previous = None
+        while time.monotonic() < deadline:
+            assert process.poll() is None, "gunicorn exited during startup"
+            pids = child_pids(process.pid)
+            if len(pids) == workers:
+                current = [memory_mb(pid)["rss"] for pid in pids]
+                if current == previous:
+                    requests.get(f"http://127.0.0.1:{PORT}/", timeout=5)
+                    return process
+                previous = current
+            time.sleep(1)
+        pytest.fail("gunicorn workers did not boot in time")
+
+    yield start
+
+    for process in processes:
+        if process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+def stop(process):
+    process.send_signal(signal.SIGTERM)
+    process.wait(timeout=30)
+
+
+class TestPreload:
+    """Test workers forked from a master that loaded the model"""
+
+    def test_workers_serve_and_run_background_threads(
+        self, start_gunicorn, tmp_path, sample_patient_data
+    ):
+        """Test workers predict, report the version and log after fork"""
+        log_dir = tmp_path / "prediction-log"
+        process = start_gunicorn(
+            PRELOAD_MODEL="true",
+            SERVING_NTHREAD="2",
+            PREDICTION_LOG_DIR=str(log_dir),
+        )
+
+        for _ in range(20):
+            response = requests.post(
+                f"http://127.0.0.1:{PORT}/predict", json=sample_patient_data
+            )
+            assert response.status_code == 200
+            assert response.json()["model_version"] == "1"
+        # The version is reported by each worker, not by the master
+        metrics = requests.get(f"http://127.0.0.1:{PORT}/metrics").text
+        for pid in child_pids(process.pid):
+            assert f'prediction_model_info{{pid="{pid}",version="1"}} 1.0' in metrics
+        assert f'pid="{process.pid}"' not in metrics
+
+        # Each worker's logger thread flushes its rows on shutdown
+        stop(process)
+        files = glob.glob(str(log_dir / "*.parquet"))
+        assert sum(len(pd.read_parquet(path)) for path in files) == 20
+
+    def test_workers_share_model_memory(self, start_gunicorn):
+        """Test preloaded workers hold far less private memory"""
+        process = start_gunicorn(workers=2)
+        default = [memory_mb(pid) for pid in child_pids(process.pid)]
+        stop(process)
+
+        process = start_gunicorn(workers=2, PRELOAD_MODEL="true")
+        preloaded = [memory_mb(pid) for pid in child_pids(process.pid)]
+
+        # Without preload each worker imports and loads everything itself;
+        # preloaded workers only own what they wrote after the fork
+        for worker in preloaded:
+            assert worker["private"] < 0.25 * worker["rss"]
+        assert max(w["private"] for w in preloaded) < 0.25 * min(
+            w["private"] for w in default
+        )
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
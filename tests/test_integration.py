@@ -140,6 +140,22 @@ class TestPredictionServiceIntegration:
             assert data["status"] == "success"
             assert "prediction" in data
 
+    def test_prediction_batch_endpoint_integration(
+        self, flask_service, sample_patient_data
+    ):
+        """Test the batch endpoint scores every record in input order"""
+        records = [sample_patient_data, dict(sample_patient_data, age=25)]
+
+        response = requests.post(f"{flask_service}/predict_batch", json=records)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "success"
+        assert len(data["predictions"]) == len(records)
+        for row in data["predictions"]:
+            assert row["prediction"] in [0, 1]
+            assert 0.0 <= row["predict_proba"] <= 1.0
+
     def test_prediction_different_patient_data(self, flask_service):
         """Test prediction with different patient scenarios"""
         test_cases = [
@@ -0,0 +1,189 @@
+"""
+Pytest tests for the /predict micro-batcher
+"""
+
+import concurrent.futures
+import json
+import os
+import sys
+import threading
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "deploy_service"))
+
+from micro_batcher import MicroBatcher
+from service_test import app
+
+
+class AgePredictor:
+    """Stand-in predictor scoring age / 100 and recording batch sizes"""
+
+    def __init__(self):
+        self.batch_sizes = []
+        self.lock = threading.Lock()
+
+    def predict(self, records):
+        if isinstance(records, dict):
+            records = [records]
+        with self.lock:
+            self.batch_sizes.append(len(records))
+        proba = np.array([float(record["age"]) / 100 for record in records])
+        return {
+            "prediction": (proba > 0.5).astype(int),
+            "predict_proba": proba,
+            "model_version": "7",
+        }
+
+
+def run_concurrently(fn, args_list):
+    results = [None] * len(args_list)
+    errors = [None] * len(args_list)
+    start = threading.Barrier(len(args_list))
+
+    def worker(i):
+        start.wait()
+        try:
+            results[i] = fn(args_list[i])
+        except Exception as e:
+            errors[i] = e
+
+    threads = [
+        threading.Thread(target=worker, args=(i,)) for i in range(len(args_list))
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+@pytest.fixture
+def age_predictor():
+    return AgePredictor()
+
+
+class TestMicroBatcher:
+    """Test batching, result routing and error isolation"""
+
+    def test_concurrent_requests_share_batches(
+        self, age_predictor, sample_patient_data
+    ):
+        """Test concurrent records are scored in fewer model calls"""
+        batcher = MicroBatcher(lambda: age_predictor, max_batch_size=64, max_delay=0.05)
+        records = [dict(sample_patient_data, age=age) for age in range(32)]
+
+        try:
+            results, errors = run_concurrently(batcher.predict, records)
+        finally:
+            batcher.stop(timeout=5)
+
+        assert errors == [None] * len(records)
+        assert sum(age_predictor.batch_sizes) == len(records)
+        assert len(age_predictor.batch_sizes) < len(records)
+        for record, result in zip(records, results):
+            assert result["predict_proba"][0] == pytest.approx(record["age"] / 100)
+            assert result["model_version"] == "7"
+
+    def test_max_batch_size(self, age_predictor, sample_patient_data):
+        """Test no batch exceeds the configured size"""
+        batcher = MicroBatcher(lambda: age_predictor, max_batch_size=4, max_delay=0.05)
+
+        try:
+            run_concurrently(batcher.predict, [sample_patient_data] * 20)
+        finally:
+            batcher.stop(timeout=5)
+
+        assert max(age_predictor.batch_sizes) <= 4
+        assert sum(age_predictor.batch_sizes) == 20
+
+    def test_bad_record_fails_alone(self, age_predictor, sample_patient_data):
+        """Test one invalid record does not fail the rest of its batch"""
+        batcher = MicroBatcher(lambda: age_predictor, max_batch_size=8, max_delay=0.05)
+        records = [dict(sample_patient_data, age=age) for age in range(7)]
+        records.append(dict(sample_patient_data, age="invalid_age"))
+
+        try:
+            results, errors = run_concurrently(batcher.predict, records)
+        finally:
+            batcher.stop(timeout=5)
+
+        assert isinstance(errors[-1], ValueError)
+        assert errors[:-1] == [None] * 7
+        assert [r["predict_proba"][0] for r in results[:-1]] == pytest.approx(
+            [age / 100 for age in range(7)]
+        )
+
+    def test_failed_batch_keeps_worker_running(
+        self, age_predictor, sample_patient_data
+    ):
+        """Test an error outside the model call fails its batch, not the worker"""
+        # The first batch's result lacks "prediction", failing the split
+        answers = [lambda records: {"predict_proba": []}, age_predictor.predict]
+
+        class MalformedOnce:
+            def predict(self, records):
+                return answers.pop(0)(records)
+
+        batcher = MicroBatcher(MalformedOnce, max_delay=0.001, timeout=5)
+
+        try:
+            with pytest.raises(KeyError):
+                batcher.predict(sample_patient_data)
+            result = batcher.predict(dict(sample_patient_data, age=80))
+        finally:
+            batcher.stop(timeout=5)
+
+        assert result["predict_proba"][0] == pytest.approx(0.8)
+
+    def test_wait_is_bounded(self, age_predictor, sample_patient_data):
+        """Test callers time out, and records given up on are not scored"""
+        release = threading.Event()
+
+        class Blocking:
+            def predict(self, records):
+                release.wait(5)
+                return age_predictor.predict(records)
+
+        batcher = MicroBatcher(Blocking, max_batch_size=1, max_delay=0.001, timeout=0.1)
+
+        try:
+            results, errors = run_concurrently(
+                batcher.predict, [sample_patient_data] * 2
+            )
+            release.set()
+        finally:
+            batcher.stop(timeout=5)
+
+        assert results == [None, None]
+        assert all(
+            isinstance(error, concurrent.futures.TimeoutError) for error in errors
+        )
+        # One record was being scored when its caller gave up; the other was
+        # still queued and is skipped
+        assert age_predictor.batch_sizes == [1]
+
+    def test_predict_endpoint_uses_batcher(self, age_predictor, sample_patient_data):
+        """Test /predict routes through the batcher when enabled"""
+        batcher = MicroBatcher(lambda: age_predictor, max_delay=0.001)
+        client = app.test_client()
+
+        try:
+            with patch("service_test.micro_batcher", batcher):
+                response = client.post(
+                    "/predict", json=dict(sample_patient_data, age=80)
+                )
+        finally:
+            batcher.stop(timeout=5)
+
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data["prediction"] == 1
+        assert response.headers["X-Model-Version"] == "7"
+        assert age_predictor.batch_sizes == [1]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -15,7 +15,18 @@ sys.path.insert(
     0, os.path.join(os.path.dirname(__file__), "..", "local-airflow", "dags")
 )
 
-from ml_function import create_dataset, prepare_data_function, preprocess_pd
+from ml_function import (
+    OptunaPruningCallback,
+    TopModels,
+    champion_params,
+    create_dataset,
+    make_pruner,
+    prepare_data_function,
+    preprocess_pd,
+    run_trials,
+    train_xgboost_with_optuna,
+    trial_threads,
+)
 
 
 class TestCreateDataset:
@@ -199,5 +210,362 @@ class TestPreprocessPd:
         assert len(result) == 1
 
 
+class TestTrainXgboostWithOptuna:
+    """Test the Optuna search against a file-based MLflow store"""
+
+    @pytest.fixture
+    def splits(self):
+        data = prepare_data_function(create_dataset(300))
+        return (
+            preprocess_pd(data["X_train"].copy()),
+            data["y_train"],
+            preprocess_pd(data["X_test"].copy()),
+            data["y_test"],
+        )
+
+    @pytest.fixture
+    def mlflow_env(self, tmp_path, monkeypatch):
+        import mlflow
+        import mlflow.tracking.fluent
+
+        monkeypatch.setenv("MLFLOW_GCS_ARTIFACT_ROOT", str(tmp_path / "artifacts"))
+        # Training sets the tracking URI and active experiment globally;
+        # restore both so later tests use their own stores
+        previous_uri = mlflow.get_tracking_uri()
+        monkeypatch.setattr(mlflow.tracking.fluent, "_active_experiment_id", None)
+        yield f"file://{tmp_path / 'mlruns'}"
+        mlflow.set_tracking_uri(previous_uri)
+        os.environ.pop("MLFLOW_EXPERIMENT_ID", None)
+
+    def load_trials(self, storage):
+        import optuna
+        from ml_function import open_study_storage
+
+        (summary,) = optuna.get_all_study_summaries(open_study_storage(storage))
+        study = optuna.load_study(
+            study_name=summary.study_name, storage=open_study_storage(storage)
+        )
+        return study.get_trials(states=(optuna.trial.TrialState.COMPLETE,))
+
+    @pytest.mark.slow
+    def test_parallel_workers_share_study(self, tmp_path, splits, mlflow_env):
+        """Test trials split across worker processes land in one study"""
+        import mlflow
+
+        storage = str(tmp_path / "study.journal")
+        best = train_xgboost_with_optuna(
+            *splits,
+            mlflow_uri=mlflow_env,
+            n_trials=3,
+            n_workers=2,
+            storage=storage,
+            log_mode="deferred",
+            top_k=1,
+        )
+
+        trials = self.load_trials(storage)
+        assert len(trials) == 3
+        assert best == max(trial.value for trial in trials)
+        runs = mlflow.search_runs(
+            experiment_names=["ml_pipeline_experiment"], output_format="list"
+        )
+        assert len(runs) == 3
+        # Each worker logs at most its own best model, including the winner's
+        client = mlflow.MlflowClient()
+        with_model = [
+            run
+            for run in runs
+            if client.list_artifacts(run.info.run_id, "xgboost_model")
+        ]
+        assert 1 <= len(with_model) <= 2
+        assert max(run.data.metrics["roc_auc"] for run in with_model) == best
+
+    def test_serial_with_storage(self, tmp_path, splits, mlflow_env):
+        """Test the serial path keeps its study in the given storage"""
+        storage = f"sqlite:///{tmp_path / 'study.db'}"
+        best = train_xgboost_with_optuna(
+            *splits, mlflow_uri=mlflow_env, n_trials=1, storage=storage
+        )
+
+        trials = self.load_trials(storage)
+        assert len(trials) == 1
+        assert best == max(trial.value for trial in trials)
+
+    def test_logged_model_keeps_best_rounds(self, splits, mlflow_env):
+        """Test early stopping records the rounds the logged model keeps"""
+        import mlflow
+        import mlflow.sklearn
+
+        train_xgboost_with_optuna(
+            *splits, mlflow_uri=mlflow_env, n_trials=1, pruner="none"
+        )
+
+        (run,) = mlflow.search_runs(
+            experiment_names=["ml_pipeline_experiment"], output_format="list"
+        )
+        n_boosting_rounds = run.data.metrics["n_boosting_rounds"]
+        assert n_boosting_rounds <= int(run.data.params["n_estimators"])
+        model = mlflow.sklearn.load_model(f"runs:/{run.info.run_id}/xgboost_model")
+        assert model.get_booster().num_boosted_rounds() == n_boosting_rounds
+        assert model.get_params()["callbacks"] is None
+
+    def test_trials_share_prebuilt_matrices(self, splits, mlflow_env):
+        """Test the matrices are built once and models match an sklearn fit"""
+        import ml_function
+        import mlflow
+        import mlflow.sklearn
+        import xgboost as xgb
+        from sklearn.model_selection import train_test_split
+
+        with patch.object(
+            ml_function, "build_matrices", wraps=ml_function.build_matrices
+        ) as build_matrices:
+            train_xgboost_with_optuna(
+                *splits,
+                mlflow_uri=mlflow_env,
+                n_trials=3,
+                pruner="none",
+                early_stopping_rounds=None,
+            )
+
+        assert build_matrices.call_count == 1
+        X_train, y_train, X_test, _ = splits
+        X_fit, _, y_fit, _ = train_test_split(
+            X_train,
+            y_train,
+            test_size=ml_function.VALIDATION_FRACTION,
+            random_state=42,
+            stratify=y_train,
+        )
+        runs = mlflow.search_runs(
+            experiment_names=["ml_pipeline_experiment"], output_format="list"
+        )
+        assert len(runs) == 3
+        for run in runs:
+            model = mlflow.sklearn.load_model(f"runs:/{run.info.run_id}/xgboost_model")
+            params = model.get_params()
+            # The trial's params as the sklearn wrapper would fit them
+            fitted = xgb.XGBClassifier(
+                **{name: params[name] for name in run.data.params},
+                enable_categorical=True,
+                n_jobs=params["n_jobs"],
+            ).fit(X_fit, y_fit)
+            np.testing.assert_allclose(
+                model.predict_proba(X_test), fitted.predict_proba(X_test), atol=1e-6
+            )
+
+    def test_deferred_logs_top_k_models(self, tmp_path, splits, mlflow_env):
+        """Test deferred logging records every run but only the best models"""
+        import mlflow
+
+        storage = str(tmp_path / "study.journal")
+        train_xgboost_with_optuna(
+            *splits,
+            mlflow_uri=mlflow_env,
+            n_trials=4,
+            storage=storage,
+            pruner="none",
+            log_mode="deferred",
+            top_k=2,
+        )
+
+        runs = mlflow.search_runs(
+            experiment_names=["ml_pipeline_experiment"], output_format="list"
+        )
+        assert len(runs) == 4
+        assert all(run.info.status == "FINISHED" for run in runs)
+        assert all("n_estimators" in run.data.params for run in runs)
+        client = mlflow.MlflowClient()
+        with_model = {
+            run.info.run_id
+            for run in runs
+            if client.list_artifacts(run.info.run_id, "xgboost_model")
+        }
+        runs.sort(key=lambda run: run.data.metrics["roc_auc"], reverse=True)
+        assert with_model == {run.info.run_id for run in runs[:2]}
+        for trial in self.load_trials(storage):
+            assert set(trial.user_attrs["timings"]) == {"fit", "evaluate", "log"}
+
+    def test_top_models_keeps_best(self):
+        """Test only the k highest-scoring models are kept"""
+        top_models = TopModels(2)
+        for value, number in [(0.6, 0), (0.8, 1), (0.7, 2), (0.5, 3)]:
+            top_models.offer(value, number, f"model-{number}")
+
+        assert top_models.best() == [(0.8, 1, "model-1"), (0.7, 2, "model-2")]
+
+    def test_unknown_log_mode(self, splits, mlflow_env):
+        """Test an unknown trial log mode is rejected before any trial runs"""
+        with pytest.raises(ValueError, match="Unknown trial log mode"):
+            train_xgboost_with_optuna(
+                *splits, mlflow_uri=mlflow_env, n_trials=1, log_mode="lazy"
+            )
+
+    def test_retried_run_resumes_study(self, tmp_path, splits, mlflow_env):
+        """Test a retry finishes its run's trials and a new run adds its own"""
+        storage = str(tmp_path / "study.journal")
+        options = {
+            "mlflow_uri": mlflow_env,
+            "storage": storage,
+            "study_name": "caries",
+            "pruner": "none",
+            "log_mode": "deferred",
+            "warm_start_model": "",
+        }
+        train_xgboost_with_optuna(*splits, n_trials=2, run_key="run-1", **options)
+        with patch("ml_function.run_trials", wraps=run_trials) as retried:
+            train_xgboost_with_optuna(*splits, n_trials=3, run_key="run-1", **options)
+        assert retried.call_args.args[2] == 1
+
+        best = train_xgboost_with_optuna(
+            *splits, n_trials=2, run_key="run-2", **options
+        )
+
+        trials = self.load_trials(storage)
+        assert len(trials) == 5
+        runs = [trial.user_attrs["pipeline_run"] for trial in trials]
+        assert runs.count("run-1") == 3 and runs.count("run-2") == 2
+        assert best == max(
+            trial.value
+            for trial in trials
+            if trial.user_attrs["pipeline_run"] == "run-2"
+        )
+
+    def test_retry_logs_models_when_best_trial_is_earlier(
+        self, tmp_path, splits, mlflow_env
+    ):
+        """Test a deferred retry logs its own best model, not a lost earlier one"""
+        import mlflow
+
+        options = {
+            "mlflow_uri": mlflow_env,
+            "storage": str(tmp_path / "study.journal"),
+            "study_name": "caries",
+            "run_key": "run-1",
+            "pruner": "none",
+            "log_mode": "deferred",
+            "top_k": 1,
+            "warm_start_model": "",
+        }
+        # The first attempt dies before uploading its models
+        with patch(
+            "ml_function.log_top_models", side_effect=RuntimeError("worker killed")
+        ), pytest.raises(RuntimeError):
+            train_xgboost_with_optuna(*splits, n_trials=2, **options)
+        # The retry's trial scores worst, so the run's best is from attempt one
+        with patch("ml_function.roc_auc_score", return_value=0.0):
+            best = train_xgboost_with_optuna(*splits, n_trials=3, **options)
+
+        runs = mlflow.search_runs(
+            experiment_names=["ml_pipeline_experiment"], output_format="list"
+        )
+        assert len(runs) == 3
+        assert best == max(run.data.metrics["roc_auc"] for run in runs) > 0.0
+        client = mlflow.MlflowClient()
+        with_model = [
+            run
+            for run in runs
+            if client.list_artifacts(run.info.run_id, "xgboost_model")
+        ]
+        assert len(with_model) == 1
+        assert with_model[0].data.metrics["roc_auc"] == 0.0
+
+    def test_warm_start_enqueues_champion(self, tmp_path, splits, mlflow_env):
+        """Test the champion's params are tried first, once per study"""
+        champion = {
+            "n_estimators": 60,
+            "max_depth": 4,
+            "learning_rate": 0.1,
+            "subsample": 0.8,
+            "colsample_bytree": 0.9,
+            "reg_alpha": 0.5,
+            "reg_lambda": 1.0,
+        }
+        storage = str(tmp_path / "study.journal")
+        with patch("ml_function.champion_params", return_value=champion):
+            for run_key in ("run-1", "run-2"):
+                train_xgboost_with_optuna(
+                    *splits,
+                    mlflow_uri=mlflow_env,
+                    n_trials=2,
+                    storage=storage,
+                    pruner="none",
+                    log_mode="deferred",
+                    run_key=run_key,
+                )
+
+        trials = sorted(self.load_trials(storage), key=lambda trial: trial.number)
+        assert trials[0].params == champion
+        assert [trial.params for trial in trials].count(champion) == 1
+
+    def test_champion_params_from_registry(self, mlflow_env):
+        """Test the champion's logged params are read back with their types"""
+        import mlflow
+
+        mlflow.set_tracking_uri(mlflow_env)
+        logged = {
+            "n_estimators": 120,
+            "max_depth": 5,
+            "learning_rate": 0.05,
+            "subsample": 0.7,
+            "colsample_bytree": 1.0,
+            "reg_alpha": 0.0,
+            "reg_lambda": 2.5,
+        }
+        with mlflow.start_run() as run:
+            mlflow.log_params({**logged, "random_state": 42})
+        client = mlflow.MlflowClient()
+        client.create_registered_model("caries_model")
+        version = client.create_model_version(
+            "caries_model", f"runs:/{run.info.run_id}/model", run_id=run.info.run_id
+        )
+        client.set_registered_model_alias("caries_model", "champion", version.version)
+
+        params = champion_params("caries_model")
+
+        assert params == logged
+        assert isinstance(params["n_estimators"], int)
+        assert isinstance(params["reg_alpha"], float)
+        assert champion_params("missing_model") is None
+
+    def test_pruned_trial_stops_training(self, splits):
+        """Test a trial the pruner stops raises TrialPruned at that round"""
+        import optuna
+        import xgboost as xgb
+
+        trial = Mock()
+        trial.should_prune.side_effect = lambda: trial.report.call_count == 3
+        pruning = OptunaPruningCallback(trial)
+        X_train, y_train, X_test, y_test = splits
+        model = xgb.XGBClassifier(
+            n_estimators=50,
+            enable_categorical=True,
+            eval_metric="auc",
+            callbacks=[pruning],
+        )
+
+        with pytest.raises(optuna.TrialPruned):
+            model.fit(X_train, y_train, eval_set=[(X_test, y_test)], verbose=False)
+        assert pruning.rounds == 3
+        assert [call.kwargs["step"] for call in trial.report.call_args_list] == [
+            0,
+            1,
+            2,
+        ]
+
+    def test_unknown_pruner(self):
+        """Test an unknown pruner name is rejected"""
+        with pytest.raises(ValueError, match="Unknown pruner"):
+            make_pruner("hyperband-ish")
+
+    def test_trial_threads_split_cpus(self):
+        """Test workers share the CPUs instead of each using all of them"""
+        with patch("ml_function.available_cpus", return_value=8):
+            assert trial_threads(1) == 8
+            assert trial_threads(2) == 4
+            assert trial_threads(3) == 2
+            assert trial_threads(16) == 1
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
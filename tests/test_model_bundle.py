@@ -0,0 +1,232 @@
+"""
+Pytest tests for exported model bundles and serving from them
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+DEPLOY_SERVICE_DIR = os.path.join(os.path.dirname(__file__), "..", "deploy_service")
+sys.path.insert(0, DEPLOY_SERVICE_DIR)
+
+import model_bundle
+from model_bundle import (
+    BOOSTER_FILE,
+    SPEC_FILE,
+    export_bundle,
+    export_registered_bundle,
+    load_booster,
+    read_bundle,
+)
+from predict_function import CATEGORICAL_LEVELS, xgb_model
+
+
+@pytest.fixture
+def bundle_dir(tmp_path, trained_classifier):
+    return export_bundle(
+        trained_classifier,
+        str(tmp_path / "bundle"),
+        CATEGORICAL_LEVELS,
+        model_name="mlops_project",
+        model_version=7,
+    )
+
+
+def load_bundle_predictor(bundle_dir, **kwargs):
+    return xgb_model(
+        "mlops_project", "champion", engine="booster", bundle_dir=bundle_dir, **kwargs
+    )
+
+
+class TestExportBundle:
+    """Test the bundle written for a trained model"""
+
+    def test_spec(self, bundle_dir, trained_classifier):
+        """Test the spec records version, column order and category levels"""
+        with open(os.path.join(bundle_dir, SPEC_FILE)) as f:
+            spec = json.load(f)
+
+        assert spec["format_version"] == 2
+        assert spec["model_version"] == "7"
+        assert spec["feature_names"] == list(trained_classifier.feature_names_in_)
+        assert spec["categorical_levels"] == CATEGORICAL_LEVELS
+        assert spec["threshold"] == 0.5
+
+    def test_replaces_existing_bundle(self, bundle_dir, trained_classifier):
+        """Test re-exporting swaps the whole directory and leaves no staging"""
+        export_bundle(trained_classifier, bundle_dir, CATEGORICAL_LEVELS, "m", 8)
+
+        _, spec = read_bundle(bundle_dir)
+        assert spec["model_version"] == "8"
+        parent = os.path.dirname(bundle_dir)
+        assert [name for name in os.listdir(parent) if name.startswith(".")] == []
+
+    def test_unknown_format_rejected(self, bundle_dir):
+        """Test bundles of another format version are not loaded"""
+        path = os.path.join(bundle_dir, SPEC_FILE)
+        with open(path) as f:
+            spec = json.load(f)
+        spec["format_version"] = 99
+        with open(path, "w") as f:
+            json.dump(spec, f)
+
+        with pytest.raises(ValueError, match="Unsupported bundle format 99"):
+            read_bundle(bundle_dir)
+
+    def test_version_1_bundle_loads(self, bundle_dir):
+        """Test bundles written before the threshold was recorded still load"""
+        path = os.path.join(bundle_dir, SPEC_FILE)
+        with open(path) as f:
+            spec = json.load(f)
+        spec["format_version"] = 1
+        del spec["threshold"]
+        with open(path, "w") as f:
+            json.dump(spec, f)
+
+        _, spec = read_bundle(bundle_dir)
+        assert spec["threshold"] == 0.5
+
+
+def test_load_booster_matches_exported_model(bundle_dir, trained_classifier):
+    """Test the loaded booster scores like the model it was exported from"""
+    loaded = load_booster(os.path.join(bundle_dir, BOOSTER_FILE))
+    original = trained_classifier.get_booster()
+    X = np.random.default_rng(0).random((50, len(loaded.feature_names)))
+
+    assert loaded.feature_names == original.feature_names
+    assert loaded.feature_types == original.feature_types
+    np.testing.assert_array_equal(
+        loaded.inplace_predict(X, validate_features=False),
+        original.inplace_predict(X, validate_features=False),
+    )
+
+
+class TestBundlePredictor:
+    """Test xgb_model serving from a bundle"""
+
+    def test_matches_registry_model(
+        self, bundle_dir, predictor_factory, synthetic_features
+    ):
+        """Test bundle predictions equal those of the unpickled model"""
+        expected = predictor_factory(engine="booster")
+        predictor = load_bundle_predictor(bundle_dir)
+        records = synthetic_features.to_dict("records")
+
+        assert predictor.registry_version == "7"
+        assert predictor.load_seconds is not None
+        np.testing.assert_array_equal(
+            predictor.predict(records)["predict_proba"],
+            expected.predict(records)["predict_proba"],
+        )
+        np.testing.assert_array_equal(
+            predictor.predict(pd.DataFrame(records))["predict_proba"],
+            expected.predict(pd.DataFrame(records))["predict_proba"],
+        )
+
+    def test_bundle_threshold(self, tmp_path, trained_classifier, synthetic_features):
+        """Test predictions use the threshold recorded in the bundle"""
+        bundle_dir = export_bundle(
+            trained_classifier,
+            str(tmp_path / "bundle"),
+            CATEGORICAL_LEVELS,
+            threshold=0.8,
+        )
+        predictor = load_bundle_predictor(bundle_dir)
+        result = predictor.predict(synthetic_features.to_dict("records"))
+
+        assert predictor.threshold == 0.8
+        np.testing.assert_array_equal(
+            result["prediction"], (result["predict_proba"] > 0.8).astype(int)
+        )
+
+    def test_requires_booster_engine(self, bundle_dir):
+        """Test the sklearn engine, which needs the pickled wrapper, is refused"""
+        with pytest.raises(ValueError, match="'booster' engine only"):
+            xgb_model("mlops_project", "champion", bundle_dir=bundle_dir)
+
+    def test_mismatched_levels_rejected(self, tmp_path, trained_classifier):
+        """Test a bundle encoding categories differently is not served"""
+        levels = dict(CATEGORICAL_LEVELS, race=["malay", "chinese", "indian"])
+        bundle_dir = export_bundle(
+            trained_classifier, str(tmp_path / "bundle"), levels, "mlops_project", 1
+        )
+
+        with pytest.raises(ValueError, match="differ for \\['race'\\]"):
+            load_bundle_predictor(bundle_dir)
+
+    def test_serving_never_imports_mlflow(self, bundle_dir):
+        """Test the service imports and scores from a bundle without mlflow"""
+        env = dict(os.environ, MODEL_BUNDLE_DIR=bundle_dir)
+        env.pop("TESTING", None)
+        script = (
+            "import sys, service_test\n"
+            "assert service_test.service_state['ready']\n"
+            "print(service_test.predictor.registry_version,"
+            " any(name.split('.')[0] == 'mlflow' for name in sys.modules))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=DEPLOY_SERVICE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+
+        assert result.returncode == 0, result.stderr[-2000:]
+        assert result.stdout.split() == ["7", "False"]
+
+
+def test_export_command(file_registry, tmp_path, monkeypatch, capsys):
+    """Test the export command writes the bundle of the aliased version"""
+    output = str(tmp_path / "bundle")
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", f"file://{file_registry}")
+    monkeypatch.setattr(sys, "argv", ["model_bundle.py", "export", "--output", output])
+
+    model_bundle.main()
+
+    printed = json.loads(capsys.readouterr().out)
+    assert printed["model_version"] == "1"
+    assert printed["source"] == "pickled_model"
+    assert load_bundle_predictor(output).registry_version == "1"
+
+
+def test_export_prefers_logged_bundle(
+    file_registry, tmp_path, trained_classifier, synthetic_features
+):
+    """Test a version logged with its training bundle is exported from it"""
+    import mlflow
+    import mlflow.sklearn
+    from ml_function import log_model_bundle
+    from predict_function import preprocess_pd
+
+    with mlflow.start_run():
+        mlflow.sklearn.log_model(
+            sk_model=trained_classifier,
+            artifact_path="xgboost_model",
+            registered_model_name="bundled_model",
+        )
+        log_model_bundle(
+            trained_classifier, preprocess_pd(synthetic_features.copy()), 0.7
+        )
+
+    output = str(tmp_path / "bundle")
+    source = export_registered_bundle(
+        "bundled_model", "1", output, str(tmp_path / "scratch")
+    )
+
+    _, spec = read_bundle(output)
+    assert source == "logged_bundle"
+    assert spec["model_name"] == "bundled_model"
+    assert spec["model_version"] == "1"
+    assert spec["threshold"] == 0.7
+    assert spec["categorical_levels"] == CATEGORICAL_LEVELS
+    assert load_bundle_predictor(output).threshold == 0.7
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
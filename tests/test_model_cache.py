@@ -0,0 +1,131 @@
+"""
+Pytest tests for the local model artifact cache
+Uses a file-based MLflow registry in a temporary directory (conftest.file_registry)
+"""
+
+import os
+import sys
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "deploy_service"))
+
+from model_cache import MANIFEST_FILE, ModelCache, build_manifest
+from predict_function import xgb_model
+
+MODEL_NAME = "mlops_project"
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    return str(tmp_path / "model-cache")
+
+
+def no_network(*args, **kwargs):
+    raise AssertionError("network call on a warm cache")
+
+
+class TestModelCache:
+    """Test alias resolution, download and verification"""
+
+    def test_cold_fetch_downloads_entry(self, file_registry, cache_dir):
+        """Test a miss downloads into a version/digest keyed entry"""
+        version, artifact_dir = ModelCache(cache_dir).fetch(MODEL_NAME, "champion")
+
+        assert version == "1"
+        entry_dir = os.path.dirname(artifact_dir)
+        digest = os.path.basename(entry_dir)
+        assert entry_dir == os.path.join(cache_dir, MODEL_NAME, "1", digest)
+        assert os.path.isfile(os.path.join(entry_dir, MANIFEST_FILE))
+        assert os.path.isfile(os.path.join(artifact_dir, "MLmodel"))
+        assert build_manifest(artifact_dir)["digest"] == digest
+
+    def test_warm_fetch_skips_download(self, file_registry, cache_dir):
+        """Test a hit on the resolved version does not download again"""
+        cache = ModelCache(cache_dir)
+        first = cache.fetch(MODEL_NAME, "champion")
+
+        with patch("mlflow.artifacts.download_artifacts", no_network):
+            second = cache.fetch(MODEL_NAME, "champion")
+
+        assert second == first
+
+    def test_offline_fetch_needs_no_network(self, file_registry, cache_dir):
+        """Test a warm cache loads in offline mode with MLflow unreachable"""
+        expected = ModelCache(cache_dir).fetch(MODEL_NAME, "champion")
+
+        with patch.object(ModelCache, "resolve_alias", no_network), patch(
+            "mlflow.artifacts.download_artifacts", no_network
+        ):
+            result = ModelCache(cache_dir).fetch(MODEL_NAME, "champion", offline=True)
+
+        assert result == expected
+
+    def test_offline_fetch_cold_cache(self, cache_dir):
+        """Test offline mode fails clearly when nothing is cached"""
+        with pytest.raises(LookupError):
+            ModelCache(cache_dir).fetch(MODEL_NAME, "champion", offline=True)
+
+    def test_unreachable_registry_uses_cached_alias(self, file_registry, cache_dir):
+        """Test a registry failure falls back to the last cached version"""
+        expected = ModelCache(cache_dir).fetch(MODEL_NAME, "champion")
+
+        with patch.object(
+            ModelCache, "resolve_alias", side_effect=ConnectionError("unreachable")
+        ):
+            result = ModelCache(cache_dir).fetch(MODEL_NAME, "champion")
+
+        assert result == expected
+
+    def test_corrupt_entry_is_redownloaded(self, file_registry, cache_dir):
+        """Test an entry failing verification is discarded and fetched again"""
+        cache = ModelCache(cache_dir)
+        _, artifact_dir = cache.fetch(MODEL_NAME, "champion")
+        with open(os.path.join(artifact_dir, "MLmodel"), "a") as f:
+            f.write("tampered\n")
+
+        version, refetched_dir = cache.fetch(MODEL_NAME, "champion")
+
+        assert version == "1"
+        assert refetched_dir == artifact_dir
+        digest = os.path.basename(os.path.dirname(refetched_dir))
+        assert build_manifest(refetched_dir)["digest"] == digest
+
+    def test_corrupt_entry_offline(self, file_registry, cache_dir):
+        """Test offline mode refuses to load a tampered entry"""
+        _, artifact_dir = ModelCache(cache_dir).fetch(MODEL_NAME, "champion")
+        with open(os.path.join(artifact_dir, "MLmodel"), "a") as f:
+            f.write("tampered\n")
+
+        with pytest.raises(LookupError):
+            ModelCache(cache_dir).fetch(MODEL_NAME, "champion", offline=True)
+
+
+class TestCachedPredictor:
+    """Test xgb_model loading through the cache"""
+
+    def test_predictor_loads_from_cache(
+        self, file_registry, cache_dir, trained_classifier, synthetic_features
+    ):
+        """Test the cached model predicts like the registered one"""
+        ModelCache(cache_dir).fetch(MODEL_NAME, "champion")
+
+        with patch.object(ModelCache, "resolve_alias", no_network), patch(
+            "mlflow.artifacts.download_artifacts", no_network
+        ):
+            predictor = xgb_model(
+                MODEL_NAME, "champion", cache_dir=cache_dir, offline=True
+            )
+
+        assert predictor.registry_version == "1"
+        expected = trained_classifier.predict_proba(
+            predictor.encoder.encode(synthetic_features.to_dict("records"))
+        )[:, 1]
+        result = predictor.predict(synthetic_features.to_dict("records"))
+        np.testing.assert_allclose(result["predict_proba"], expected, rtol=1e-6)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
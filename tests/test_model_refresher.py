@@ -0,0 +1,199 @@
+"""
+Pytest tests for hot reloading the champion model
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from unittest.mock import Mock, patch
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "deploy_service"))
+
+import service_test
+from model_refresher import ModelRefresher
+from service_test import app
+
+# Worst acceptable single-request latency while a swap is in progress
+SWAP_LATENCY_BOUND_S = 0.5
+
+
+@pytest.fixture
+def installed():
+    """Records every predictor handed to on_swap"""
+    return []
+
+
+class TestModelRefresher:
+    """Test alias polling and swapping"""
+
+    def test_unchanged_alias_does_not_reload(self, installed):
+        """Test no load happens while the alias points at the served version"""
+        loader = Mock()
+        refresher = ModelRefresher(
+            load_predictor=loader,
+            resolve_version=lambda: "1",
+            on_swap=installed.append,
+            current_version="1",
+        )
+
+        assert refresher.check_once() is False
+        loader.assert_not_called()
+        assert installed == []
+
+    def test_moved_alias_loads_and_swaps(self, predictor_factory, installed):
+        """Test a new version is handed to on_swap, which does the warming"""
+        new_predictor = predictor_factory(version="2")
+        new_predictor.predict = Mock(wraps=new_predictor.predict)
+        refresher = ModelRefresher(
+            load_predictor=lambda: new_predictor,
+            resolve_version=lambda: "2",
+            on_swap=installed.append,
+            current_version="1",
+        )
+
+        assert refresher.check_once() is True
+        assert installed == [new_predictor]
+        assert refresher.current_version == "2"
+        new_predictor.predict.assert_not_called()
+
+    def test_failed_load_keeps_current_model(self, installed):
+        """Test a broken new version never reaches serving"""
+        refresher = ModelRefresher(
+            load_predictor=Mock(side_effect=RuntimeError("download failed")),
+            resolve_version=lambda: "2",
+            on_swap=installed.append,
+            current_version="1",
+        )
+
+        assert refresher.check_once() is False
+        assert installed == []
+        assert refresher.current_version == "1"
+
+    def test_failed_swap_retries_on_next_poll(self, predictor_factory, installed):
+        """Test an on_swap error keeps the current model and is retried"""
+        new_predictor = predictor_factory(version="2")
+        on_swap = Mock(side_effect=[RuntimeError("warm-up failed"), None])
+        refresher = ModelRefresher(
+            load_predictor=lambda: new_predictor,
+            resolve_version=lambda: "2",
+            on_swap=on_swap,
+            current_version="1",
+        )
+
+        assert refresher.check_once() is False
+        assert refresher.current_version == "1"
+        assert refresher.check_once() is True
+        assert refresher.current_version == "2"
+        assert on_swap.call_count == 2
+
+    def test_background_polling(self, predictor_factory, installed):
+        """Test the background thread picks up a promotion"""
+        new_predictor = predictor_factory(version="2")
+        refresher = ModelRefresher(
+            load_predictor=lambda: new_predictor,
+            resolve_version=lambda: "2",
+            on_swap=installed.append,
+            current_version="1",
+            interval=0.01,
+        )
+
+        refresher.start()
+        try:
+            deadline = time.monotonic() + 5
+            while not installed and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            refresher.stop(timeout=5)
+
+        assert installed == [new_predictor]
+
+
+def test_concurrent_requests_during_swap(predictor_factory, sample_patient_data):
+    """Test requests keep succeeding within the latency bound across a swap"""
+    old_predictor = predictor_factory(version="1")
+    new_predictor = predictor_factory(version="2")
+    refresher = ModelRefresher(
+        load_predictor=lambda: new_predictor,
+        resolve_version=lambda: "2",
+        on_swap=lambda p: setattr(service_test, "predictor", p),
+        current_version="1",
+    )
+    results = []
+    swapped_at = []
+    results_lock = threading.Lock()
+
+    def fire_requests():
+        client = app.test_client()
+        for _ in range(40):
+            started = time.perf_counter()
+            response = client.post("/predict", json=sample_patient_data)
+            elapsed = time.perf_counter() - started
+            with results_lock:
+                results.append((started, elapsed, response.status_code, response))
+
+    with patch("service_test.predictor", old_predictor):
+        threads = [threading.Thread(target=fire_requests) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.05)
+        assert refresher.check_once() is True
+        swapped_at.append(time.perf_counter())
+        for thread in threads:
+            thread.join()
+
+    assert len(results) == 8 * 40
+    assert all(status == 200 for _, _, status, _ in results)
+    assert max(elapsed for _, elapsed, _, _ in results) < SWAP_LATENCY_BOUND_S
+
+    versions = [json.loads(r.data)["model_version"] for _, _, _, r in results]
+    assert set(versions) <= {"1", "2"}
+    for started, _, _, response in results:
+        assert response.headers["X-Model-Version"] in {"1", "2"}
+        if started > swapped_at[0]:
+            assert json.loads(response.data)["model_version"] == "2"
+
+
+def test_swap_during_bulk_request(predictor_factory, sample_patient_data):
+    """Test a bulk request swapped mid-way is scored and labelled by one model"""
+    old_predictor = predictor_factory(version="1")
+    new_predictor = predictor_factory(version="2")
+    old_predictor.predict_encoded = Mock(wraps=old_predictor.predict_encoded)
+    new_predictor.predict_encoded = Mock(wraps=new_predictor.predict_encoded)
+    decode_table = service_test.request_schema.decode_table
+
+    def decode_then_swap(table, feature_names=None):
+        # The refresher installs the new version while the request validates
+        decoded = decode_table(table, feature_names)
+        service_test.predictor = new_predictor
+        return decoded
+
+    table = pa.Table.from_pandas(
+        pd.DataFrame([sample_patient_data] * 3), preserve_index=False
+    )
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+
+    with patch("service_test.predictor", old_predictor), patch.object(
+        service_test.request_schema, "decode_table", side_effect=decode_then_swap
+    ):
+        response = app.test_client().post(
+            "/predict_bulk",
+            data=sink.getvalue().to_pybytes(),
+            content_type="application/vnd.apache.arrow.stream",
+        )
+
+    assert response.status_code == 200
+    assert response.headers["X-Model-Version"] == "1"
+    old_predictor.predict_encoded.assert_called_once()
+    new_predictor.predict_encoded.assert_not_called()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
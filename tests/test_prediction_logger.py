@@ -0,0 +1,268 @@
+"""
+Pytest tests for the asynchronous Parquet prediction logger
+"""
+
+import os
+import sys
+import threading
+import time
+from unittest.mock import patch
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "deploy_service"))
+
+from prediction_logger import PredictionLogger
+from service_test import app
+
+
+def visible_files(directory):
+    return sorted(name for name in os.listdir(directory) if not name.startswith("."))
+
+
+def make_logger(tmp_path, **kwargs):
+    return PredictionLogger(str(tmp_path / "predictions"), **kwargs)
+
+
+class TestPredictionLogger:
+    """Test buffering, the written schema, rotation and dropping"""
+
+    def test_logged_rows_round_trip(self, tmp_path, sample_patient_data):
+        """Test logged records are written with their prediction metadata"""
+        prediction_logger = make_logger(tmp_path)
+        records = [dict(sample_patient_data, age=age) for age in (20, 30)]
+
+        prediction_logger.log(records, [0, 1], [0.2, 0.7], "3", 0.004, "/predict")
+        prediction_logger.stop(timeout=5)
+
+        logged = pd.read_parquet(prediction_logger.directory)
+        assert len(logged) == 2
+        assert logged["age"].tolist() == [20.0, 30.0]
+        assert logged["race"].tolist() == ["chinese", "chinese"]
+        assert logged["prediction"].tolist() == [0, 1]
+        assert logged["predict_proba"].tolist() == pytest.approx([0.2, 0.7])
+        assert logged["model_version"].tolist() == ["3", "3"]
+        assert logged["latency_ms"].tolist() == pytest.approx([4.0, 4.0])
+        assert logged["endpoint"].tolist() == ["/predict", "/predict"]
+        assert logged["model_role"].tolist() == ["champion", "champion"]
+        assert logged["request_id"].isna().all()
+        assert prediction_logger.stats()["written_rows"] == 2
+
+    def test_arrow_table_rows(self, tmp_path, sample_patient_data):
+        """Test columnar requests are logged like record lists"""
+        prediction_logger = make_logger(tmp_path)
+        table = pa.Table.from_pylist([sample_patient_data] * 2)
+
+        prediction_logger.log(table, [1, 0], [0.6, 0.4], "5", 0.01, "/predict_bulk")
+        prediction_logger.stop(timeout=5)
+
+        logged = pd.read_parquet(prediction_logger.directory)
+        assert logged["age"].tolist() == [30.0, 30.0]
+        assert logged["mother_edu"].tolist() == ["university"] * 2
+        assert logged["prediction"].tolist() == [1, 0]
+
+    def test_unparseable_values_logged_as_null(self, tmp_path, sample_patient_data):
+        """Test missing and invalid feature values become nulls"""
+        prediction_logger = make_logger(tmp_path)
+        record = dict(sample_patient_data, age="thirty")
+        del record["gender"]
+
+        prediction_logger.log([record], [0], [0.1], None, 0.001, "/predict")
+        prediction_logger.stop(timeout=5)
+
+        logged = pd.read_parquet(prediction_logger.directory)
+        assert logged["age"].isna().all()
+        assert logged["gender"].isna().all()
+        assert logged["model_version"].isna().all()
+
+    def test_open_file_hidden_until_rotated(self, tmp_path, sample_patient_data):
+        """Test readers only see complete files"""
+        prediction_logger = make_logger(tmp_path, flush_rows=1)
+
+        prediction_logger.log([sample_patient_data], [0], [0.1], "1", 0.001, "/p")
+        deadline = time.time() + 5
+        while prediction_logger.written_rows < 1 and time.time() < deadline:
+            time.sleep(0.01)
+
+        assert prediction_logger.written_rows == 1
+        assert visible_files(prediction_logger.directory) == []
+
+        prediction_logger.stop(timeout=5)
+        assert len(visible_files(prediction_logger.directory)) == 1
+
+    def test_rotates_by_size(self, tmp_path, sample_patient_data):
+        """Test a new file is started once the current one is large enough"""
+        prediction_logger = make_logger(tmp_path, flush_rows=1, rotate_bytes=1)
+
+        for _ in range(3):
+            prediction_logger.log([sample_patient_data], [0], [0.1], "1", 0.001, "/p")
+        prediction_logger.stop(timeout=5)
+
+        assert len(visible_files(prediction_logger.directory)) == 3
+        assert len(pd.read_parquet(prediction_logger.directory)) == 3
+
+    def test_drops_when_buffer_full(self, tmp_path, sample_patient_data):
+        """Test only the rows beyond max_pending_rows are dropped and counted"""
+        dropped = []
+        prediction_logger = make_logger(
+            tmp_path,
+            max_pending_rows=4,
+            flush_rows=100,
+            flush_interval=60,
+            on_drop=dropped.append,
+        )
+        batch = [sample_patient_data] * 3
+
+        assert prediction_logger.log(batch, [0] * 3, [0.1] * 3, "1", 0.01, "/p")
+        assert not prediction_logger.log(batch, [0] * 3, [0.1] * 3, "1", 0.01, "/p")
+        prediction_logger.stop(timeout=5)
+
+        assert dropped == [2]
+        stats = prediction_logger.stats()
+        assert stats["dropped_rows"] == 2
+        assert stats["written_rows"] == 4
+        assert stats["pending_rows"] == 0
+
+    def test_oversized_batch_partly_logged(self, tmp_path, sample_patient_data):
+        """Test a batch larger than the buffer keeps the rows that fit"""
+        dropped = []
+        prediction_logger = make_logger(
+            tmp_path,
+            max_pending_rows=4,
+            flush_rows=100,
+            flush_interval=60,
+            on_drop=dropped.append,
+        )
+        records = [dict(sample_patient_data, age=age) for age in range(6)]
+        table = pa.Table.from_pylist(records)
+
+        assert not prediction_logger.log(
+            table, [1] * 6, [0.6] * 6, "1", 0.01, "/predict_bulk"
+        )
+        assert not prediction_logger.log(records, [0] * 6, [0.1] * 6, "1", 0.01, "/p")
+        prediction_logger.stop(timeout=5)
+
+        assert dropped == [2, 6]
+        stats = prediction_logger.stats()
+        assert stats["logged_rows"] == 4
+        assert stats["dropped_rows"] == 8
+        logged = pd.read_parquet(prediction_logger.directory)
+        assert logged["age"].tolist() == [0.0, 1.0, 2.0, 3.0]
+        assert logged["prediction"].tolist() == [1] * 4
+
+    def test_log_does_not_wait_for_disk(self, tmp_path, sample_patient_data):
+        """Test a slow writer does not slow down log()"""
+        release = threading.Event()
+        prediction_logger = make_logger(tmp_path, flush_rows=1)
+
+        def slow_write(self, table, *args, **kwargs):
+            release.wait(5)
+
+        with patch("pyarrow.parquet.ParquetWriter.write_table", slow_write):
+            started = time.perf_counter()
+            for _ in range(100):
+                prediction_logger.log(
+                    [sample_patient_data], [0], [0.1], "1", 0.001, "/p"
+                )
+            elapsed = time.perf_counter() - started
+            release.set()
+            prediction_logger.stop(timeout=5)
+
+        assert elapsed < 0.5
+
+    def test_write_failure_counted_as_dropped(self, tmp_path, sample_patient_data):
+        """Test rows that fail to write are counted instead of raising"""
+        dropped = []
+        prediction_logger = make_logger(tmp_path, on_drop=dropped.append)
+
+        with patch(
+            "pyarrow.parquet.ParquetWriter.write_table",
+            side_effect=OSError("disk full"),
+        ):
+            prediction_logger.log([sample_patient_data], [0], [0.1], "1", 0.01, "/p")
+            prediction_logger.stop(timeout=5)
+
+        assert dropped == [1]
+        assert prediction_logger.stats()["dropped_rows"] == 1
+
+
+class TestServiceLogging:
+    """Test the endpoints hand scored records to the prediction logger"""
+
+    def test_endpoints_log_predictions(self, tmp_path, sample_patient_data):
+        """Test /predict and /predict_batch rows reach the Parquet log"""
+        prediction_logger = make_logger(tmp_path)
+        client = app.test_client()
+
+        with patch("service_test.prediction_logger", prediction_logger):
+            assert client.post("/predict", json=sample_patient_data).status_code == 200
+            response = client.post("/predict_batch", json=[sample_patient_data] * 3)
+            assert response.status_code == 200
+        prediction_logger.stop(timeout=5)
+
+        logged = pd.read_parquet(prediction_logger.directory)
+        assert logged["endpoint"].value_counts().to_dict() == {
+            "/predict_batch": 3,
+            "/predict": 1,
+        }
+        assert (logged["latency_ms"] >= 0).all()
+
+
+class TestLoadPredictionLog:
+    """Test the monitoring DAG's reader for the prediction log"""
+
+    def test_reads_rotated_files_only(self, tmp_path, sample_patient_data):
+        """Test complete files are read and the open file is skipped"""
+        from ml_function import load_prediction_log
+
+        prediction_logger = make_logger(tmp_path)
+        prediction_logger.log([sample_patient_data], [1], [0.9], "2", 0.01, "/p")
+        prediction_logger.stop(timeout=5)
+        open(os.path.join(prediction_logger.directory, ".partial.parquet"), "w").close()
+
+        logged = load_prediction_log(prediction_logger.directory)
+        assert logged["predict_proba"].tolist() == pytest.approx([0.9])
+
+    def test_challenger_rows_skipped(self, tmp_path, sample_patient_data):
+        """Test shadow scores are only read when asked for"""
+        from ml_function import load_prediction_log
+
+        prediction_logger = make_logger(tmp_path)
+        prediction_logger.log([sample_patient_data], [1], [0.9], "2", 0.01, "/p", "r")
+        prediction_logger.log(
+            [sample_patient_data], [0], [0.2], "3", 0.01, "/p", "r", "challenger"
+        )
+        prediction_logger.stop(timeout=5)
+
+        directory = prediction_logger.directory
+        assert load_prediction_log(directory)["model_version"].tolist() == ["2"]
+        challenger = load_prediction_log(directory, model_role="challenger")
+        assert challenger["model_version"].tolist() == ["3"]
+        assert len(load_prediction_log(directory, model_role=None)) == 2
+
+    def test_logs_without_roles_are_champion(self, tmp_path, sample_patient_data):
+        """Test files written before roles were logged still count as served"""
+        from ml_function import load_prediction_log
+
+        prediction_logger = make_logger(tmp_path)
+        prediction_logger.log([sample_patient_data], [1], [0.9], "2", 0.01, "/p")
+        prediction_logger.stop(timeout=5)
+        (path,) = visible_files(prediction_logger.directory)
+        path = os.path.join(prediction_logger.directory, path)
+        pq.write_table(pq.read_table(path).drop(["model_role", "request_id"]), path)
+
+        assert len(load_prediction_log(prediction_logger.directory)) == 1
+
+    def test_empty_directory(self, tmp_path):
+        """Test None is returned before anything has been logged"""
+        from ml_function import load_prediction_log
+
+        assert load_prediction_log(str(tmp_path)) is None
+        assert load_prediction_log(str(tmp_path / "missing")) is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
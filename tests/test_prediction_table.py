@@ -0,0 +1,125 @@
+"""
+Pytest tests for the precomputed prediction lookup table
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "deploy_service"))
+
+from predict_function import CATEGORICAL_LEVELS, FEATURE_COLUMNS
+from prediction_table import PredictionTable
+
+# Narrow ranges keep the grid small enough to build quickly in tests
+TEST_RANGES = {"age": (20, 40), "breast_feeding_month": (5, 20)}
+
+
+@pytest.fixture
+def live_predictor(predictor_factory):
+    return predictor_factory(engine="booster")
+
+
+@pytest.fixture
+def table_predictor(predictor_factory):
+    return predictor_factory(
+        engine="booster", lookup_table=True, table_ranges=TEST_RANGES
+    )
+
+
+@pytest.fixture
+def grid_records(synthetic_features):
+    """Records whose numerics all fall inside TEST_RANGES"""
+    df = synthetic_features.copy()
+    df["age"] = df["age"].clip(*TEST_RANGES["age"])
+    df["breast_feeding_month"] = df["breast_feeding_month"].clip(
+        *TEST_RANGES["breast_feeding_month"]
+    )
+    return df.to_dict("records")
+
+
+class TestPredictionTable:
+    """Test table construction, lookups and fallbacks"""
+
+    def test_table_covers_grid(self, table_predictor):
+        """Test every categorical combination and integer value is stored"""
+        stats = table_predictor.table.stats()
+
+        n_combinations = int(np.prod([len(v) for v in CATEGORICAL_LEVELS.values()]))
+        assert n_combinations == 576
+        assert stats["entries"] == n_combinations * 21 * 16
+        assert stats["memory_bytes"] == stats["entries"] * 4
+
+    def test_grid_parity_with_live_model(
+        self, table_predictor, live_predictor, grid_records
+    ):
+        """Test table answers match xgb_model.predict exactly on the grid"""
+        expected = live_predictor.predict(grid_records)
+
+        result = table_predictor.predict(grid_records)
+
+        np.testing.assert_array_equal(
+            result["predict_proba"], expected["predict_proba"]
+        )
+        np.testing.assert_array_equal(result["prediction"], expected["prediction"])
+        assert table_predictor.table.hit_rate == 1.0
+
+    def test_off_grid_falls_back_to_live_model(
+        self, table_predictor, live_predictor, sample_patient_data
+    ):
+        """Test out-of-range, fractional and unknown inputs use the live model"""
+        records = [
+            dict(sample_patient_data, age=95),
+            dict(sample_patient_data, breast_feeding_month=7.5),
+            dict(sample_patient_data, race="unknown_race"),
+            dict(sample_patient_data, age=None),
+            sample_patient_data,
+        ]
+        expected = live_predictor.predict(records)
+
+        result = table_predictor.predict(records)
+
+        np.testing.assert_array_equal(
+            result["predict_proba"], expected["predict_proba"]
+        )
+        stats = table_predictor.table.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 4
+
+    def test_check_parity(self, table_predictor, live_predictor):
+        """Test the table agrees with predict on decoded records, on and off grid"""
+        table = table_predictor.table
+
+        def predict_decoded(rows):
+            records = table_predictor._decode(rows)
+            return live_predictor.predict(records)["predict_proba"].to_numpy()
+
+        assert table.check_parity(table_predictor._predict_proba, predict_decoded) == 0
+        assert table.stats()["hits"] == 0
+
+    def test_check_parity_catches_mismatch(self, table_predictor):
+        """Test wrong stored entries and a wrong fallback are both reported"""
+        table = table_predictor.table
+        reference = table_predictor._predict_proba
+
+        assert table.check_parity(reference, reference) == 0
+        assert table.check_parity(lambda rows: reference(rows) + 0.25, reference) > 0.2
+
+        table.table += 0.25
+        assert table.check_parity(reference, reference) > 0.2
+
+    def test_missing_numeric_range(self):
+        """Test an unbounded numeric feature is rejected"""
+        with pytest.raises(ValueError, match="breast_feeding_month"):
+            PredictionTable(
+                FEATURE_COLUMNS,
+                CATEGORICAL_LEVELS,
+                score_fn=lambda rows: np.zeros(len(rows)),
+                numeric_ranges={"age": (0, 10)},
+            )
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,198 @@
+"""
+Pytest tests for the compiled request schema
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "deploy_service"))
+
+from predict_function import FeatureEncoder, preprocess_pd
+from request_schema import RequestSchema, SchemaError
+
+
+@pytest.fixture
+def schema():
+    return RequestSchema()
+
+
+class TestRequestSchema:
+    """Test per-field validation and normalization"""
+
+    def test_valid_record(self, schema, sample_patient_data):
+        """Test a valid record decodes without errors"""
+        decoded, errors = schema.decode(sample_patient_data)
+
+        assert errors == {}
+        assert decoded == sample_patient_data
+
+    def test_extra_fields_dropped(self, schema, sample_patient_data):
+        """Test fields outside the schema are not passed on"""
+        decoded = schema.decode_record(dict(sample_patient_data, patient_id=7))
+
+        assert "patient_id" not in decoded
+
+    def test_numeric_strings_and_nulls(self, schema, sample_patient_data):
+        """Test numeric strings are converted and nulls pass as missing"""
+        decoded = schema.decode_record(
+            dict(sample_patient_data, age="31", breast_feeding_month=None, race=None)
+        )
+
+        assert decoded["age"] == 31.0
+        assert decoded["breast_feeding_month"] is None
+        assert decoded["race"] is None
+
+    @pytest.mark.parametrize(
+        "value,message",
+        [
+            ("invalid_age", "must be a number"),
+            (True, "must be a number"),
+            ([30], "must be a number"),
+            (float("nan"), "must be a finite number"),
+            (-1, "must be between 0 and 120"),
+            (121, "must be between 0 and 120"),
+        ],
+    )
+    def test_invalid_numeric(self, schema, sample_patient_data, value, message):
+        """Test invalid numeric values are reported with a reason"""
+        _, errors = schema.decode(dict(sample_patient_data, age=value))
+
+        assert errors == {"age": message}
+
+    @pytest.mark.parametrize("value", ["unknown_race", "Chinese", ["chinese"], 1])
+    def test_invalid_category(self, schema, sample_patient_data, value):
+        """Test values outside the preprocess_pd levels are rejected"""
+        _, errors = schema.decode(dict(sample_patient_data, race=value))
+
+        assert errors == {"race": "must be one of ['chinese', 'malay', 'indian']"}
+
+    def test_missing_fields(self, schema):
+        """Test every missing field is reported, not just the first"""
+        _, errors = schema.decode({"race": "chinese", "age": 30})
+
+        assert len(errors) == 8
+        assert set(errors.values()) == {"is required"}
+
+    def test_not_an_object(self, schema):
+        """Test non-object records are rejected"""
+        _, errors = schema.decode(["chinese", 30])
+
+        assert errors == {"record": "must be a JSON object"}
+
+    def test_decode_record_raises(self, schema, sample_patient_data):
+        """Test decode_record raises a ValueError carrying the field errors"""
+        with pytest.raises(SchemaError) as excinfo:
+            schema.decode_record(dict(sample_patient_data, gender="x", age=-3))
+
+        assert isinstance(excinfo.value, ValueError)
+        assert set(excinfo.value.errors) == {"gender", "age"}
+        assert "gender: must be one of" in str(excinfo.value)
+
+    def test_decode_batch(self, schema, sample_patient_data):
+        """Test valid rows are kept in order and invalid rows reported"""
+        records = [
+            sample_patient_data,
+            dict(sample_patient_data, age="old"),
+            dict(sample_patient_data, age=40),
+            "not a record",
+        ]
+
+        valid, indices, errors = schema.decode_batch(records)
+
+        assert [record["age"] for record in valid] == [30, 40]
+        assert indices == [0, 2]
+        assert errors == {
+            1: {"age": "must be a number"},
+            3: {"record": "must be a JSON object"},
+        }
+
+    def test_decode_batch_normalizes(self, schema, sample_patient_data):
+        """Test the batch path converts and drops fields like decode does"""
+        records = [
+            dict(sample_patient_data, age="31", patient_id=1),
+            dict(sample_patient_data, breast_feeding_month=None),
+        ]
+
+        valid, _, errors = schema.decode_batch(records)
+
+        assert errors == {}
+        assert valid == [schema.decode_record(record) for record in records]
+        assert valid[0]["age"] == 31.0
+        assert "patient_id" not in valid[0]
+
+    def test_decode_batch_missing_field(self, schema, sample_patient_data):
+        """Test a field missing from one row only fails that row"""
+        incomplete = dict(sample_patient_data)
+        del incomplete["age"]
+
+        valid, indices, errors = schema.decode_batch([sample_patient_data, incomplete])
+
+        assert indices == [0]
+        assert errors == {1: {"age": "is required"}}
+
+
+class TestDecodeTable:
+    """Test column-wise decoding of Arrow tables"""
+
+    @pytest.fixture
+    def frame(self, sample_patient_data):
+        return pd.DataFrame(
+            [
+                sample_patient_data,
+                dict(sample_patient_data, race="malay", age=41, smoke_mother=None),
+                dict(sample_patient_data, race="indian", breast_feeding_month=None),
+            ]
+        )
+
+    @pytest.mark.parametrize("categorical", [False, True])
+    def test_matches_feature_encoder(self, schema, frame, categorical):
+        """Test string and dictionary columns encode like FeatureEncoder"""
+        source = preprocess_pd(frame.copy()) if categorical else frame
+        table = pa.Table.from_pandas(source, preserve_index=False)
+
+        encoded, errors = schema.decode_table(table)
+
+        assert errors == {}
+        expected = FeatureEncoder().encode(frame.to_dict("records"))
+        np.testing.assert_array_equal(encoded, expected)
+
+    def test_column_order(self, schema, frame):
+        """Test the matrix follows the requested feature order"""
+        table = pa.Table.from_pandas(frame[frame.columns[::-1]], preserve_index=False)
+        order = ["age", "race"]
+
+        encoded, _ = schema.decode_table(table, order)
+
+        assert encoded.shape == (3, 2)
+        assert encoded[:, 0].tolist() == [30, 41, 30]
+        assert encoded[:, 1].tolist() == [0, 1, 2]
+
+    def test_invalid_values(self, schema, frame):
+        """Test out-of-range and unknown values are reported per row"""
+        frame.loc[0, "age"] = -2
+        frame.loc[2, "race"] = "martian"
+
+        _, errors = schema.decode_table(pa.Table.from_pandas(frame))
+
+        assert errors == {
+            0: {"age": "must be between 0 and 120"},
+            2: {"race": "must be one of ['chinese', 'malay', 'indian']"},
+        }
+
+    def test_bad_columns(self, schema, frame):
+        """Test missing or mistyped columns fail the whole table"""
+        with pytest.raises(ValueError, match="Missing required column 'age'"):
+            schema.decode_table(pa.Table.from_pandas(frame.drop(columns="age")))
+
+        frame["age"] = frame["age"].astype(str)
+        with pytest.raises(ValueError, match="Column 'age' must be numeric"):
+            schema.decode_table(pa.Table.from_pandas(frame))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
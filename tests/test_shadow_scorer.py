@@ -0,0 +1,273 @@
+"""
+Pytest tests for champion/challenger shadow scoring
+"""
+
+import os
+import sys
+import threading
+import time
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "deploy_service"))
+
+os.environ["TESTING"] = "true"
+
+from prediction_logger import PredictionLogger
+from request_schema import RequestSchema
+from service_test import app
+from shadow_scorer import ShadowScorer
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+
+class SlowChallenger:
+    """Challenger that takes `delay` seconds per call without using the CPU"""
+
+    registry_version = "2"
+    threshold = 0.5
+
+    def __init__(self, delay=0.0, release=None, fail=False):
+        self.delay = delay
+        self.release = release
+        self.fail = fail
+        self.calls = 0
+
+    def predict_records(self, records):
+        self.calls += 1
+        if self.release is not None:
+            self.release.wait(5)
+        time.sleep(self.delay)
+        if self.fail:
+            raise ValueError("challenger broken")
+        n_rows = len(records)
+        return {
+            "prediction": np.ones(n_rows, dtype=int),
+            "predict_proba": np.full(n_rows, 0.9),
+        }
+
+
+class CpuBoundChallenger:
+    """
+    Challenger that scores a large batch with a real booster on every call,
+    about 80 ms of CPU outside the GIL, like a heavy production challenger
+    """
+
+    registry_version = "2"
+    threshold = 0.5
+
+    def __init__(self, predictor, record, batch_rows=100000):
+        self.predictor = predictor
+        self.batch = np.repeat(predictor.encoder.encode([record]), batch_rows, axis=0)
+
+    def predict_records(self, records):
+        proba = self.predictor.predict_encoded(self.batch)[: len(records)]
+        return {
+            "prediction": (proba > self.threshold).astype(int),
+            "predict_proba": proba,
+        }
+
+
+def make_scorer(tmp_path, challenger, **kwargs):
+    prediction_logger = PredictionLogger(str(tmp_path / "log"))
+    return ShadowScorer(challenger, prediction_logger, RequestSchema(), **kwargs)
+
+
+def read_log(prediction_logger):
+    prediction_logger.stop(timeout=5)
+    return pd.read_parquet(prediction_logger.directory)
+
+
+def arrow_body(records):
+    table = pa.Table.from_pylist(records)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+class TestShadowScorer:
+    """Test scoring with the challenger in the background"""
+
+    def test_submit_does_not_wait_for_challenger(self, tmp_path, sample_patient_data):
+        """Test submit returns at once and the challenger rows are logged later"""
+        scorer = make_scorer(tmp_path, SlowChallenger(delay=0.3))
+
+        started = time.perf_counter()
+        assert scorer.submit([sample_patient_data] * 2, "/predict_batch", "req-1")
+        assert time.perf_counter() - started < 0.1
+
+        scorer.stop()
+        logged = read_log(scorer.prediction_logger)
+        assert logged["model_role"].tolist() == ["challenger"] * 2
+        assert logged["request_id"].tolist() == ["req-1"] * 2
+        assert logged["model_version"].tolist() == ["2"] * 2
+        assert logged["predict_proba"].tolist() == pytest.approx([0.9, 0.9])
+        assert (logged["latency_ms"] >= 300).all()
+        assert scorer.stats()["scored_rows"] == 2
+
+    def test_requests_scored_together(self, tmp_path, sample_patient_data):
+        """Test records queued within max_delay share one challenger call"""
+        challenger = SlowChallenger()
+        scorer = make_scorer(tmp_path, challenger, max_delay=0.2)
+
+        for i in range(5):
+            scorer.submit([dict(sample_patient_data, age=20 + i)], "/predict", str(i))
+        scorer.stop()
+
+        logged = read_log(scorer.prediction_logger)
+        assert challenger.calls == 1
+        assert logged["request_id"].tolist() == ["0", "1", "2", "3", "4"]
+        assert logged["age"].tolist() == [20.0, 21.0, 22.0, 23.0, 24.0]
+
+    def test_drops_when_backlog_full(self, tmp_path, sample_patient_data):
+        """Test records beyond max_pending_rows are dropped and counted"""
+        release = threading.Event()
+        outcomes = []
+        scorer = make_scorer(
+            tmp_path,
+            SlowChallenger(release=release),
+            max_pending_rows=4,
+            on_outcome=lambda outcome, n: outcomes.append((outcome, n)),
+        )
+
+        assert scorer.submit([sample_patient_data] * 3, "/p", "a")
+        assert not scorer.submit([sample_patient_data] * 2, "/p", "b")
+        release.set()
+        scorer.stop()
+
+        stats = scorer.stats()
+        assert stats["scored_rows"] == 3
+        assert stats["dropped_rows"] == 2
+        assert stats["pending_rows"] == 0
+        assert sorted(outcomes) == [("dropped", 2), ("scored", 3)]
+
+    def test_challenger_failure_counted(self, tmp_path, sample_patient_data):
+        """Test a failing challenger is counted and logs nothing"""
+        scorer = make_scorer(tmp_path, SlowChallenger(fail=True))
+
+        assert scorer.submit([sample_patient_data], "/predict", "req-1")
+        scorer.stop()
+
+        assert scorer.stats()["failed_rows"] == 1
+        assert scorer.prediction_logger.stats()["logged_rows"] == 0
+        scorer.prediction_logger.stop(timeout=5)
+
+    def test_columnar_rows(self, tmp_path, predictor_factory, sample_patient_data):
+        """Test Arrow tables are decoded in the challenger's feature order"""
+        challenger = predictor_factory(version="2", engine="booster")
+        challenger.threshold = 0.0
+        scorer = make_scorer(tmp_path, challenger)
+        table = pa.Table.from_pylist([sample_patient_data] * 3)
+
+        assert scorer.submit(table, "/predict_bulk", "req-1")
+        scorer.stop()
+
+        logged = read_log(scorer.prediction_logger)
+        expected = challenger.predict([sample_patient_data])["predict_proba"][0]
+        assert logged["predict_proba"].tolist() == pytest.approx([expected] * 3)
+        assert logged["prediction"].tolist() == [1, 1, 1]
+
+
+class TestServiceShadowMode:
+    """Test the endpoints score with both models and log both outputs"""
+
+    def test_endpoints_log_champion_and_challenger(
+        self, tmp_path, predictor_factory, sample_patient_data
+    ):
+        """Test each endpoint logs a champion and a challenger row per record"""
+        champion = predictor_factory(version="1", engine="booster")
+        scorer = make_scorer(tmp_path, predictor_factory(version="2", engine="booster"))
+        client = app.test_client()
+
+        with patch("service_test.predictor", champion), patch(
+            "service_test.prediction_logger", scorer.prediction_logger
+        ), patch("service_test.shadow_scorer", scorer):
+            response = client.post("/predict", json=sample_patient_data)
+            assert response.json["model_version"] == "1"
+            response = client.post("/predict_batch", json=[sample_patient_data] * 2)
+            assert response.status_code == 200
+            response = client.post(
+                "/predict_bulk",
+                data=arrow_body([sample_patient_data] * 3),
+                headers={"Content-Type": ARROW_STREAM},
+            )
+            assert response.status_code == 200
+        scorer.stop()
+
+        logged = read_log(scorer.prediction_logger)
+        counts = logged.groupby(["endpoint", "model_role"]).size().to_dict()
+        assert counts == {
+            ("/predict", "champion"): 1,
+            ("/predict", "challenger"): 1,
+            ("/predict_batch", "champion"): 2,
+            ("/predict_batch", "challenger"): 2,
+            ("/predict_bulk", "champion"): 3,
+            ("/predict_bulk", "challenger"): 3,
+        }
+        # Every request id has as many challenger rows as champion rows
+        rows = logged.pivot_table(
+            index="request_id", columns="model_role", aggfunc="size"
+        )
+        assert len(rows) == 3
+        assert (rows["champion"] == rows["challenger"]).all()
+        versions = logged.groupby("model_role")["model_version"].unique()
+        assert versions["champion"].tolist() == ["1"]
+        assert versions["challenger"].tolist() == ["2"]
+
+    def test_champion_latency_unaffected_under_load(
+        self, tmp_path, predictor_factory, sample_patient_data
+    ):
+        """
+        Test concurrent requests keep their latency while a challenger keeps
+        the CPU busy; run at normal priority it adds 35-65% to p95 on one CPU
+        """
+        client_threads, requests_per_thread, rounds = 2, 80, 3
+
+        def send_requests(latencies):
+            def send():
+                client = app.test_client()
+                for _ in range(requests_per_thread):
+                    started = time.perf_counter()
+                    response = client.post("/predict", json=sample_patient_data)
+                    latencies.append(time.perf_counter() - started)
+                    assert response.status_code == 200
+
+            threads = [threading.Thread(target=send) for _ in range(client_threads)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        challenger = CpuBoundChallenger(
+            predictor_factory(version="2", engine="booster"), sample_patient_data
+        )
+        scorer = make_scorer(tmp_path, challenger, max_pending_rows=1000)
+        baseline, shadowed = [], []
+        with patch("service_test.prediction_logger", scorer.prediction_logger):
+            send_requests([])  # Warm up the app and the logger
+            # Alternate so drift in the machine's load hits both alike
+            for _ in range(rounds):
+                send_requests(baseline)
+                with patch("service_test.shadow_scorer", scorer):
+                    send_requests(shadowed)
+        scorer.stop()
+        scorer.prediction_logger.stop(timeout=5)
+
+        assert scorer.stats()["scored_rows"] == (
+            rounds * client_threads * requests_per_thread
+        )
+        baseline_p50, baseline_p95 = np.percentile(baseline, [50, 95])
+        shadowed_p50, shadowed_p95 = np.percentile(shadowed, [50, 95])
+        # p50 moves with how requests interleave on the GIL, so only a
+        # challenger on the response path would push it past this bound
+        assert shadowed_p50 < 1.5 * baseline_p50
+        assert shadowed_p95 < 1.25 * baseline_p95
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
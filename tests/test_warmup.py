@@ -0,0 +1,50 @@
+"""
+Pytest tests for service warmup
+"""
+
+import os
+import sys
+from unittest.mock import Mock
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "deploy_service"))
+
+from predict_function import CATEGORICAL_LEVELS
+from request_schema import RequestSchema
+from warmup import synthetic_records, warm_predictor
+
+
+class TestSyntheticRecords:
+    """Test the records sent during warmup"""
+
+    def test_records_are_valid(self):
+        """Test every synthetic record passes request validation"""
+        records = synthetic_records(50)
+
+        _, indices, errors = RequestSchema().decode_batch(records)
+
+        assert errors == {}
+        assert indices == list(range(50))
+
+    def test_every_level_covered(self):
+        """Test all category levels are exercised"""
+        records = synthetic_records(3)
+
+        for col, levels in CATEGORICAL_LEVELS.items():
+            assert {record[col] for record in records} == set(levels)
+
+
+def test_warm_predictor_scores_single_and_batch():
+    """Test a swapped-in predictor is exercised on both request shapes"""
+    predictor = Mock()
+
+    warm_predictor(predictor, n_records=16)
+
+    calls = [call.args[0] for call in predictor.predict.call_args_list]
+    assert any(isinstance(arg, dict) for arg in calls)
+    assert any(isinstance(arg, list) and len(arg) == 16 for arg in calls)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])